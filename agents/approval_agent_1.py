@@ -5,9 +5,14 @@ from approval import ApprovalSystem
 class ApprovalAgent1:
     """First approval step - pauses pipeline for human review"""
     
-    def __init__(self):
+    reads = ('early_policy_agent',)
+    writes = ('approval_agent_1',)
+    approval_step = 3
+    
+    def __init__(self, block: bool = True):
         self.db = Database()
         self.approval_system = ApprovalSystem()
+        self.block = block  # False parks the pipeline instead of waiting
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Execute first approval step"""
@@ -20,7 +25,7 @@ class ApprovalAgent1:
         
         # Wait for human approval
         approved = self.approval_system.wait_for_approval(
-            pr_number, 3, "/approve-step 3"
+            pr_number, 3, "/approve-step 3", block=self.block
         )
         
         result = {
@@ -29,7 +34,10 @@ class ApprovalAgent1:
             'timestamp': 'pending' if approved is None else 'completed'
         }
         
-        if not approved:
+        if approved is None:
+            # No decision yet; the caller resumes this step later
+            result['pipeline_status'] = 'parked'
+        elif not approved:
             # Halt pipeline
             self.db.halt_pipeline(pr_number, 'approval_agent_1', 'Step 3 rejected')
             result['pipeline_status'] = 'halted'
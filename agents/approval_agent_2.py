@@ -5,9 +5,14 @@ from approval import ApprovalSystem
 class ApprovalAgent2:
     """Second approval step - pauses pipeline for final human review"""
     
-    def __init__(self):
+    reads = ('summarizer_agent', 'reviewer_agent', 'deep_policy_agent', 'ask_agent')
+    writes = ('approval_agent_2',)
+    approval_step = 8
+    
+    def __init__(self, block: bool = True):
         self.db = Database()
         self.approval_system = ApprovalSystem()
+        self.block = block  # False parks the pipeline instead of waiting
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Execute second approval step"""
@@ -15,16 +20,19 @@ class ApprovalAgent2:
         
         # Wait for human approval
         approved = self.approval_system.wait_for_approval(
-            pr_number, 8, "/approve-step 8"
+            pr_number, 8, "/approve-step 8", block=self.block
         )
         
         result = {
             'approved': approved,
             'step': 8,
-            'timestamp': 'completed'
+            'timestamp': 'pending' if approved is None else 'completed'
         }
         
-        if not approved:
+        if approved is None:
+            # No decision yet; the caller resumes this step later
+            result['pipeline_status'] = 'parked'
+        elif not approved:
             # Halt pipeline
             self.db.halt_pipeline(pr_number, 'approval_agent_2', 'Step 8 rejected')
             result['pipeline_status'] = 'halted'
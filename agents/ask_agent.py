@@ -1,37 +1,17 @@
 from typing import Dict, Any, List
 from db import Database
-from config import Config
-import requests
+from llm_client import create_llm_client
 
 class AskAgent:
     """Generates clarifying questions for the PR reviewer"""
     
+    reads = ('ingestion_agent', 'reviewer_agent', 'deep_policy_agent')
+    writes = ('ask_agent',)
+    prompt_version = 1  # Bump when the prompt template changes
+    
     def __init__(self):
         self.db = Database()
-        self.llm_config = Config.get_llm_config()
-    
-    def _call_llm(self, prompt: str) -> str:
-        """Call LLM with given prompt"""
-        headers = {
-            'Authorization': f'Bearer {self.llm_config["api_key"]}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': self.llm_config['model'],
-            'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': self.llm_config['temperature']
-        }
-        
-        base_url = 'https://api.openai.com/v1'
-        if 'base_url' in self.llm_config:
-            base_url = self.llm_config['base_url']
-        
-        response = requests.post(f'{base_url}/chat/completions', 
-                               headers=headers, json=data)
-        response.raise_for_status()
-        
-        return response.json()['choices'][0]['message']['content']
+        self.llm_client = create_llm_client(agent_name='ask_agent', db=self.db)
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Generate clarifying questions"""
@@ -65,7 +45,7 @@ class AskAgent:
         """
         
         try:
-            questions_text = self._call_llm(prompt)
+            questions_text = self.llm_client.complete(prompt)
             
             # Parse questions from response
             questions = [
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from db import Database
 from github_client import GitHubClient
 from config import Config
@@ -6,6 +6,17 @@ from config import Config
 class CoordinatorAgent:
     """Compiles final review from all agent outputs and posts to PR"""
     
+    reads = ('early_policy_agent', 'summarizer_agent', 'reviewer_agent',
+             'deep_policy_agent', 'ask_agent', 'approval_agent_2')
+    writes = ('coordinator_agent',)
+    
+    # Stages that only check files changed since the last reviewed head, with
+    # the result key reporting their success
+    INCREMENTAL_STAGES = {
+        'reviewer_agent': 'review_success',
+        'deep_policy_agent': 'analysis_success'
+    }
+    
     def __init__(self):
         self.db = Database()
         self.github_client = GitHubClient()
@@ -17,30 +28,69 @@ class CoordinatorAgent:
         # Get all agent outputs
         all_outputs = self.db.get_all_agent_outputs(pr_number)
         
+        # Findings for files left untouched since an earlier reviewed head
+        ingestion = all_outputs.get('ingestion_agent', {})
+        carried_findings = self._carried_findings(pr_number, ingestion)
+        
         # Compile final review
-        final_review = self._compile_final_review(all_outputs)
+        final_review = self._compile_final_review(all_outputs, carried_findings)
         
         # Post to GitHub
         try:
             self.github_client.create_comment(pr_number, final_review)
             post_success = True
+            
+            # Later pushes are reviewed incrementally from this head, so it is
+            # recorded only once every incremental stage has covered its files
+            if self._incremental_stages_succeeded(all_outputs):
+                self.db.save_review_state(pr_number, ingestion.get('head_sha', ''), {
+                    f['filename']: f.get('sha', '') for f in ingestion.get('changed_files', [])
+                })
         except Exception as e:
             print(f"Failed to post comment: {e}")
             post_success = False
+            post_error = str(e)
         
         result = {
             'final_review_generated': True,
             'review_posted': post_success,
             'agents_processed': len(all_outputs),
+            'carried_findings': len(carried_findings),
             'review_length': len(final_review)
         }
+        if not post_success:
+            result['error'] = post_error
         
         # Save to database
         self.db.save_agent_output(pr_number, 'coordinator_agent', result)
         
         return result
     
-    def _compile_final_review(self, all_outputs: Dict[str, Any]) -> str:
+    def _incremental_stages_succeeded(self, all_outputs: Dict[str, Any]) -> bool:
+        for agent_name, success_key in self.INCREMENTAL_STAGES.items():
+            output = all_outputs.get(agent_name) or {}
+            if not output.get(success_key) or 'error' in output:
+                return False
+        return True
+    
+    def _carried_findings(self, pr_number: int, ingestion: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Earlier findings still covering files that are part of the PR but were
+        not re-reviewed, whichever head they were saved at (a re-run at an
+        already reviewed head re-reviews nothing and carries everything)
+        """
+        current_files = {f['filename'] for f in ingestion.get('changed_files', [])}
+        reviewed = set(ingestion.get('files_to_review', current_files))
+        
+        carried = []
+        for entry in self.db.get_review_findings(pr_number):
+            filenames = [f for f in entry['filenames'] if f in current_files and f not in reviewed]
+            if filenames and entry['findings']:
+                carried.append(dict(entry, filenames=filenames))
+        return carried
+    
+    def _compile_final_review(self, all_outputs: Dict[str, Any],
+                              carried_findings: List[Dict[str, Any]] = ()) -> str:
         """Compile final review from all agent outputs"""
         review_parts = []
         
@@ -95,6 +145,20 @@ class CoordinatorAgent:
                     review_parts.append(f"- {question}")
                 review_parts.append("")
         
+        # Findings carried over from earlier pushes
+        if carried_findings:
+            review_parts.append("## 🕘 Earlier Findings (files unchanged since last review)")
+            for entry in carried_findings:
+                files = ", ".join(f"`{f}`" for f in entry['filenames'])
+                review_parts.append(f"**{entry['agent_name']}** at `{entry['head_sha'][:7]}` for {files}:")
+                findings = entry['findings']
+                if isinstance(findings, list):
+                    for finding in findings:
+                        review_parts.append(f"- {finding}")
+                else:
+                    review_parts.append(findings)
+                review_parts.append("")
+        
         review_parts.append("---")
         review_parts.append("*This review was automatically generated by the Multi-Agent PR Review Orchestrator*")
         
@@ -1,38 +1,19 @@
-from typing import Dict, Any, List
+from typing import Dict, Any
 from db import Database
-from config import Config
-import requests
-import re
+from llm_client import create_llm_client
+from policy_rules import RuleEngine
 
 class DeepPolicyAgent:
     """Enforces coding standards, documentation, naming, security, and test expectations"""
     
+    reads = ('ingestion_agent', 'reviewer_agent')
+    writes = ('deep_policy_agent',)
+    prompt_version = 2  # Bump when the prompt template changes
+    
     def __init__(self):
         self.db = Database()
-        self.llm_config = Config.get_llm_config()
-    
-    def _call_llm(self, prompt: str) -> str:
-        """Call LLM with given prompt"""
-        headers = {
-            'Authorization': f'Bearer {self.llm_config["api_key"]}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': self.llm_config['model'],
-            'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': self.llm_config['temperature']
-        }
-        
-        base_url = 'https://api.openai.com/v1'
-        if 'base_url' in self.llm_config:
-            base_url = self.llm_config['base_url']
-        
-        response = requests.post(f'{base_url}/chat/completions', 
-                               headers=headers, json=data)
-        response.raise_for_status()
-        
-        return response.json()['choices'][0]['message']['content']
+        self.llm_client = create_llm_client(agent_name='deep_policy_agent', db=self.db)
+        self.rule_engine = RuleEngine()
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Enforce deep policy checks"""
@@ -50,24 +31,34 @@ class DeepPolicyAgent:
         policy_violations = []
         standards_met = []
         
-        # Check file types and patterns
-        for file in pr_data.get('changed_files', []):
-            filename = file.get('filename', '')
-            
-            # Check for documentation in new files
-            if self._is_source_file(filename) and not self._has_test_file(filename, pr_data):
-                policy_violations.append(f"Missing test file for: {filename}")
-            
-            # Check naming conventions
-            if not self._check_naming_conventions(filename):
-                policy_violations.append(f"Poor naming convention: {filename}")
+        # On incremental runs only files changed since the last reviewed head are
+        # checked; companion rules such as missing tests still see every changed file
+        changed_files = self.db.get_changed_files(pr_number, include_patch=True, include_hunks=True)
+        all_filenames = [f['filename'] for f in changed_files]
+        to_review = set(pr_data.get('files_to_review', all_filenames))
+        files = [f for f in all_filenames if f in to_review]
+        
+        # Deterministic rule checks in a single pass over files and patches
+        rule_violations = self.rule_engine.evaluate(changed_files, files)
+        policy_violations.extend(violation['message'] for violation in rule_violations)
+        
+        if not files:
+            result = {
+                'policy_violations': [],
+                'standards_met': standards_met,
+                'llm_analysis': "No files changed since the last review.",
+                'files_checked': 0,
+                'analysis_success': True
+            }
+            self.db.save_agent_output(pr_number, 'deep_policy_agent', result)
+            return result
         
         # Use LLM for deeper policy analysis
         prompt = f"""
         Analyze this PR for compliance with software engineering standards:
         
         PR: {pr_data.get('title', 'N/A')}
-        Files Changed: {[f['filename'] for f in pr_data.get('changed_files', [])]}
+        Files Changed: {files}
         
         Review Findings: {review_data.get('review_findings', 'N/A') if review_data else 'N/A'}
         
@@ -84,28 +75,38 @@ class DeepPolicyAgent:
         """
         
         try:
-            policy_analysis = self._call_llm(prompt)
+            policy_analysis = self.llm_client.complete(prompt)
             
             # Parse LLM response for violations
+            llm_violations = []
             if "violation" in policy_analysis.lower() or "issue" in policy_analysis.lower():
-                policy_violations.extend([
+                llm_violations = [
                     line.strip() for line in policy_analysis.split('\n') 
                     if line.strip() and not line.strip().startswith('#')
-                ])
+                ]
+            policy_violations.extend(llm_violations)
             
             result = {
                 'policy_violations': policy_violations,
                 'standards_met': standards_met,
                 'llm_analysis': policy_analysis,
-                'files_checked': len(pr_data.get('changed_files', [])),
+                'files_checked': len(files),
                 'analysis_success': True
             }
+            # Rule violations are kept per file; the LLM's analysis covers all checked files
+            by_file = {}
+            for violation in rule_violations:
+                by_file.setdefault(violation['filename'], []).append(violation['message'])
+            findings = [([filename], messages) for filename, messages in by_file.items()]
+            findings.append((files, llm_violations))
+            self.db.save_review_findings(pr_number, 'deep_policy_agent', pr_data.get('head_sha', ''),
+                                         files, findings)
         except Exception as e:
             result = {
                 'policy_violations': policy_violations,
                 'standards_met': standards_met,
                 'llm_analysis': f"Failed LLM analysis: {str(e)}",
-                'files_checked': len(pr_data.get('changed_files', [])),
+                'files_checked': len(files),
                 'analysis_success': False,
                 'error': str(e)
             }
@@ -114,25 +115,3 @@ class DeepPolicyAgent:
         self.db.save_agent_output(pr_number, 'deep_policy_agent', result)
         
         return result
-    
-    def _is_source_file(self, filename: str) -> bool:
-        """Check if file is a source code file"""
-        source_extensions = ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs']
-        return any(filename.endswith(ext) for ext in source_extensions)
-    
-    def _has_test_file(self, filename: str, pr_data: Dict[str, Any]) -> bool:
-        """Check if corresponding test file exists in changes"""
-        test_patterns = ['test_', '_test.', 'spec.', 'test/']
-        changed_files = [f['filename'] for f in pr_data.get('changed_files', [])]
-        
-        for test_file in changed_files:
-            if any(pattern in test_file for pattern in test_patterns):
-                return True
-        return False
-    
-    def _check_naming_conventions(self, filename: str) -> bool:
-        """Check filename follows conventions"""
-        # Basic check for snake_case or kebab-case
-        if '_' in filename or '-' in filename:
-            return True
-        return not any(c.isupper() for c in filename if c.isalpha())
\ No newline at end of file
@@ -4,6 +4,9 @@ from db import Database
 class EarlyPolicyAgent:
     """Checks basic PR issues and policies"""
     
+    reads = ('ingestion_agent',)
+    writes = ('early_policy_agent',)
+    
     def __init__(self):
         self.db = Database()
     
@@ -29,10 +32,19 @@ class EarlyPolicyAgent:
         if base_branch not in ['main', 'master', 'develop']:
             warnings.append(f"Unconventional base branch: {base_branch}")
         
-        # Check diff size
-        total_changes = 0
-        for file in pr_data.get('changed_files', []):
-            total_changes += file.get('changes', 0)
+        # Check diff size from the hunks parsed at ingestion (no patch text is
+        # loaded); files without hunks, e.g. binary or with a patch GitHub
+        # left out, fall back to GitHub's own counts
+        files = self.db.get_changed_files(pr_number, include_hunks=True)
+        total_additions = total_deletions = 0
+        for file in files:
+            if file['hunks']:
+                total_additions += sum(hunk.additions for hunk in file['hunks'])
+                total_deletions += sum(hunk.deletions for hunk in file['hunks'])
+            else:
+                total_additions += file['additions'] or 0
+                total_deletions += file['deletions'] or 0
+        total_changes = total_additions + total_deletions
         
         if total_changes > 1000:
             issues.append(f"PR is too large ({total_changes} changes). Consider breaking it down.")
@@ -40,7 +52,7 @@ class EarlyPolicyAgent:
             warnings.append(f"Large PR ({total_changes} changes). Review may take longer.")
         
         # Check number of files
-        num_files = len(pr_data.get('changed_files', []))
+        num_files = len(files)
         if num_files > 50:
             issues.append(f"Too many files changed ({num_files}). Consider smaller scope.")
         
@@ -48,6 +60,8 @@ class EarlyPolicyAgent:
             'issues_found': issues,
             'warnings': warnings,
             'total_changes': total_changes,
+            'total_additions': total_additions,
+            'total_deletions': total_deletions,
             'num_files': num_files,
             'has_description': bool(description and len(description) >= 10),
             'base_branch_approved': base_branch in ['main', 'master', 'develop']
@@ -1,22 +1,30 @@
 # agents/ingestion_agent.py
 
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from github_client import GitHubClient
 from db import Database
+from config import Config
+from blob_store import BlobStore
+from diff_model import parse_patch
+import metrics
 
 class IngestionAgent:
     """Fetches PR metadata, changed files, diffs, and stores them into SQLite"""
 
+    reads = ()
+    writes = ('ingestion_agent',)
+
     def __init__(self):
         self.github_client = GitHubClient()
         self.db = Database()  # <-- matches your db.py
+        self.blob_store = BlobStore()
 
     def run(self, pr_number: int) -> Dict[str, Any]:
         print(f"[IngestionAgent] Running ingestion for PR #{pr_number}")
 
         # --- Fetch PR metadata ---
         pr_details = self.github_client.get_pr_details(pr_number)
-        files = self.github_client.get_pr_files(pr_number)
 
         head_sha = pr_details.get("head", {}).get("sha")
         head_ref = pr_details.get("head", {}).get("ref")
@@ -35,33 +43,81 @@ class IngestionAgent:
             "changed_files": []
         }
 
-        # --- Process changed files ---
-        for f in files:
-            filename = f.get("filename")
-            patch = f.get("patch", "")
+        # --- Stream changed files page by page, fetching contents concurrently ---
+        ref = head_sha or head_ref
+        with ThreadPoolExecutor(max_workers=Config.INGESTION_FETCH_CONCURRENCY) as executor:
+            fetches = [
+                (f, executor.submit(self._fetch_content, f, ref))
+                for f in self.github_client.iter_pr_files(pr_number)
+            ]
 
-            # Try to fetch full file content
-            content = None
-            try:
-                ref = head_sha or head_ref
-                if filename and ref:
-                    content = self.github_client.get_file_content(filename, ref)
-            except Exception as e:
-                print(f"[IngestionAgent] Could not fetch file content for {filename}: {e}")
+        # --- Process changed files in their original order ---
+        for f, fetch in fetches:
+            content = fetch.result()
+            patch = f.get("patch", "")
 
             pr_data["changed_files"].append({
-                "filename": filename,
+                "filename": f.get("filename"),
                 "status": f.get("status", ""),
                 "additions": f.get("additions", 0),
                 "deletions": f.get("deletions", 0),
                 "changes": f.get("changes", 0),
-                "patch": patch[:20000],  # limit stored size
-                "content": content
+                "sha": f.get("sha", ""),
+                "patch": patch,  # full diff; reviews are chunked to the token budget
+                "content": content,
+                "hunks": parse_patch(patch)  # parsed once, stored for downstream agents
             })
 
-        # --- Save into SQLite using your EXACT db API ---
+        # --- Only files changed since the last reviewed head need a fresh review ---
+        review_state = self.db.get_review_state(pr_number)
+        pr_data["last_reviewed_sha"] = review_state["head_sha"] if review_state else ""
+        pr_data["files_to_review"] = self._files_to_review(pr_data["changed_files"], review_state)
+
+        # --- Save into SQLite: file rows (with bodies) plus a metadata-only PR record ---
+        self.db.save_changed_files(pr_number, pr_data["changed_files"])
+        for file in pr_data["changed_files"]:
+            del file["patch"], file["content"], file["hunks"]
         self.db.save_agent_output(pr_number, "ingestion_agent", pr_data)
 
         print(f"[IngestionAgent] Saved ingestion output for PR #{pr_number}")
 
         return pr_data
+
+    def _files_to_review(self, changed_files: List[Dict[str, Any]],
+                         review_state: Optional[Dict[str, Any]]) -> List[str]:
+        """Files whose blob SHA differs from the one seen at the last reviewed head"""
+        if not review_state:
+            return [f["filename"] for f in changed_files]
+
+        reviewed_shas = review_state["file_shas"]
+        return [
+            f["filename"] for f in changed_files
+            if not f["sha"] or reviewed_shas.get(f["filename"]) != f["sha"]
+        ]
+
+    def _fetch_content(self, file: Dict[str, Any], ref: Optional[str]) -> Optional[str]:
+        """
+        Get one file's content, consulting the local blob store by git blob SHA
+        before going to the network. Failures are logged and yield None.
+        """
+        filename = file.get("filename")
+        sha = file.get("sha")
+        if not filename or not ref or file.get("status") == "removed":
+            return None
+
+        if sha:
+            content = self.blob_store.get(sha)
+            if content is not None:
+                metrics.incr("cache_hits", "blob_store")
+                return content
+            metrics.incr("cache_misses", "blob_store")
+
+        try:
+            content = self.github_client.get_file_content(filename, ref)
+        except Exception as e:
+            print(f"[IngestionAgent] Could not fetch file content for {filename}: {e}")
+            return None
+
+        if sha and content is not None:
+            self.blob_store.put(sha, content)
+        return content
@@ -1,38 +1,24 @@
-from typing import Dict, Any
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
 from db import Database
+from llm_client import create_llm_client
+from chunker import Chunk, estimate_tokens, pack_chunks, render_chunk
 from config import Config
-import requests
-import json
+
+# A line opening one file's section of a chunk review, e.g. "### `src/app.py`"
+FILE_HEADING = re.compile(r'^#{1,6}\s*(?:File:\s*)?`?(?P<filename>[^`]+?)`?\s*:?\s*$')
 
 class ReviewerAgent:
     """Performs deep code review for logic issues, bugs, and code smells"""
     
+    reads = ('ingestion_agent', 'approval_agent_1')
+    writes = ('reviewer_agent',)
+    prompt_version = 3  # Bump when the prompt template changes
+    
     def __init__(self):
         self.db = Database()
-        self.llm_config = Config.get_llm_config()
-    
-    def _call_llm(self, prompt: str) -> str:
-        """Call LLM with given prompt"""
-        headers = {
-            'Authorization': f'Bearer {self.llm_config["api_key"]}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': self.llm_config['model'],
-            'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': self.llm_config['temperature']
-        }
-        
-        base_url = 'https://api.openai.com/v1'
-        if 'base_url' in self.llm_config:
-            base_url = self.llm_config['base_url']
-        
-        response = requests.post(f'{base_url}/chat/completions', 
-                               headers=headers, json=data)
-        response.raise_for_status()
-        
-        return response.json()['choices'][0]['message']['content']
+        self.llm_client = create_llm_client(agent_name='reviewer_agent', db=self.db)
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Perform deep code review"""
@@ -43,21 +29,135 @@ class ReviewerAgent:
         if not pr_data:
             raise ValueError("No ingestion data found")
         
-        # Prepare code context for review
-        code_context = ""
-        for file in pr_data.get('changed_files', []):
-            filename = file.get('filename', '')
-            patch = file.get('patch', '')[:2000]  # Limit size
-            code_context += f"File: {filename}\nChanges:\n{patch}\n\n"
+        # On incremental runs only files changed since the last reviewed head are sent
+        files = self.db.get_changed_files(pr_number, include_patch=True, include_hunks=True,
+                                          filenames=pr_data.get('files_to_review'))
+        if not files:
+            result = {
+                'review_findings': "No files changed since the last review.",
+                'files_reviewed': 0,
+                'review_success': True,
+                'incremental': True
+            }
+            self.db.save_agent_output(pr_number, 'reviewer_agent', result)
+            return result
+        
+        # Pack the whole diff into prompts that fit the token budget
+        chunks = pack_chunks(files, Config.REVIEW_CHUNK_TOKEN_BUDGET)
+        if not chunks:
+            # Only binary, renamed or otherwise patchless files: nothing to send
+            result = {
+                'review_findings': "No reviewable changes (no textual diff).",
+                'files_reviewed': len(files),
+                'chunks_reviewed': 0,
+                'review_success': True,
+                'incremental': bool(pr_data.get('last_reviewed_sha'))
+            }
+            # Earlier findings about these files no longer describe them
+            self.db.save_review_findings(pr_number, 'reviewer_agent', pr_data.get('head_sha', ''),
+                                         [f['filename'] for f in files], [])
+            self.db.save_agent_output(pr_number, 'reviewer_agent', result)
+            return result
+        
+        try:
+            review, chunk_reviews = self._review_chunks(pr_data, chunks)
+            
+            result = {
+                'review_findings': review,
+                'files_reviewed': len(files),
+                'chunks_reviewed': len(chunks),
+                'review_success': True,
+                'review_categories': ['logic', 'bugs', 'smells', 'performance', 'security'],
+                'incremental': bool(pr_data.get('last_reviewed_sha'))
+            }
+            # Findings are kept per file so a later push re-reviewing one file
+            # does not carry stale findings about it
+            findings = [
+                entry for chunk, chunk_review in zip(chunks, chunk_reviews)
+                for entry in self._findings_by_file(chunk_review, [name for name, _ in chunk])
+            ]
+            self.db.save_review_findings(pr_number, 'reviewer_agent', pr_data.get('head_sha', ''),
+                                         [f['filename'] for f in files], findings)
+        except Exception as e:
+            result = {
+                'review_findings': f"Failed to generate review: {str(e)}",
+                'files_reviewed': len(files),
+                'review_success': False,
+                'error': str(e)
+            }
+        
+        # Save to database
+        self.db.save_agent_output(pr_number, 'reviewer_agent', result)
+        
+        return result
+    
+    def _review_chunks(self, pr_data: Dict[str, Any], chunks: List[Chunk]) -> Tuple[str, List[str]]:
+        """Review each chunk concurrently, then merge the chunk reviews into one.
+        Returns the merged review and the per-chunk reviews."""
+        with ThreadPoolExecutor(max_workers=Config.REVIEW_MAX_CONCURRENCY) as executor:
+            chunk_reviews = list(executor.map(
+                lambda chunk: self.llm_client.complete(self._review_prompt(pr_data, chunk, len(chunks))),
+                chunks
+            ))
         
-        prompt = f"""
+            # Merge in rounds so each reduce prompt also stays within the budget
+            reviews = chunk_reviews
+            while len(reviews) > 1:
+                groups = self._group_reviews(reviews)
+                reviews = list(executor.map(
+                    lambda group: self.llm_client.complete(self._reduce_prompt(pr_data, group)),
+                    groups
+                ))
+        return reviews[0], chunk_reviews
+    
+    def _findings_by_file(self, review: str, filenames: List[str]) -> List[Tuple[List[str], str]]:
+        """
+        Split a chunk review into (filenames, findings) entries at its per-file
+        headings. Text that cannot be tied to a single file stays one entry
+        covering every file of the chunk.
+        """
+        names = set(filenames)
+        sections = {None: []}
+        current = None
+        for line in review.splitlines():
+            heading = FILE_HEADING.match(line.strip())
+            if heading and heading.group('filename') in names:
+                current = heading.group('filename')
+                sections.setdefault(current, [])
+            else:
+                sections[current].append(line)
+        
+        entries = [([name], "\n".join(lines).strip()) for name, lines in sections.items() if name]
+        unattributed = "\n".join(sections[None]).strip()
+        if unattributed:
+            entries.append((sorted(names), unattributed))
+        return entries
+    
+    def _group_reviews(self, reviews: List[str]) -> List[List[str]]:
+        """Group chunk reviews into reduce batches under the token budget, at least two per batch"""
+        groups, current, used = [], [], 0
+        for review in reviews:
+            cost = estimate_tokens(review)
+            if len(current) >= 2 and used + cost > Config.REVIEW_CHUNK_TOKEN_BUDGET:
+                groups.append(current)
+                current, used = [], 0
+            current.append(review)
+            used += cost
+        groups.append(current)
+        return groups
+    
+    def _review_prompt(self, pr_data: Dict[str, Any], chunk: Chunk, total_chunks: int) -> str:
+        scope = (f"This is one of {total_chunks} parts of the diff; review only the changes shown."
+                 if total_chunks > 1 else "")
+        return f"""
         Perform a thorough code review for the following pull request:
         
         Title: {pr_data.get('title', 'N/A')}
         Description: {pr_data.get('description', 'N/A')}
+        {scope}
         
         Code Changes:
-        {code_context}
+        {render_chunk(chunk)}
         
         Please analyze for:
         1. Logic errors or bugs
@@ -67,32 +167,30 @@ class ReviewerAgent:
         5. Maintainability concerns
         6. Edge cases not handled
         
-        Provide specific, actionable feedback. Format your response as:
+        Provide specific, actionable feedback, grouped by file. Start each file's
+        section with a line "### <filename>" and format it as:
         - **Critical Issues**: [list any critical problems]
         - **Suggestions**: [list improvement suggestions]
         - **Questions**: [any clarifying questions about the implementation]
         
         Be constructive and technical in your review.
         """
+    
+    def _reduce_prompt(self, pr_data: Dict[str, Any], reviews: List[str]) -> str:
+        partial_reviews = "\n\n".join(
+            f"Partial review {i}:\n{review}" for i, review in enumerate(reviews, 1)
+        )
+        return f"""
+        The following are code reviews of different parts of one pull request:
         
-        try:
-            review = self._call_llm(prompt)
-            
-            result = {
-                'review_findings': review,
-                'files_reviewed': len(pr_data.get('changed_files', [])),
-                'review_success': True,
-                'review_categories': ['logic', 'bugs', 'smells', 'performance', 'security']
-            }
-        except Exception as e:
-            result = {
-                'review_findings': f"Failed to generate review: {str(e)}",
-                'files_reviewed': len(pr_data.get('changed_files', [])),
-                'review_success': False,
-                'error': str(e)
-            }
+        Title: {pr_data.get('title', 'N/A')}
         
-        # Save to database
-        self.db.save_agent_output(pr_number, 'reviewer_agent', result)
+        {partial_reviews}
         
-        return result
\ No newline at end of file
+        Merge them into a single review. Remove duplicate findings, keep the
+        file names each finding refers to, and order issues by severity.
+        Format your response as:
+        - **Critical Issues**: [list any critical problems]
+        - **Suggestions**: [list improvement suggestions]
+        - **Questions**: [any clarifying questions about the implementation]
+        """
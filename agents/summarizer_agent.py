@@ -1,57 +1,22 @@
-from typing import Dict, Any
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
 from db import Database
+from llm_client import create_llm_client
 from config import Config
-import requests
-import json
+import metrics
 
 class SummarizerAgent:
     """Creates LLM-generated summary of PR changes"""
     
+    reads = ('ingestion_agent', 'approval_agent_1')
+    writes = ('summarizer_agent',)
+    prompt_version = 2  # Bump when the prompt template changes
+    
     def __init__(self):
         self.db = Database()
-        self.llm_config = Config.get_llm_config()
-    
-    def _call_llm(self, prompt: str) -> str:
-        """Call LLM with given prompt"""
-        if Config.LLM_PROVIDER == 'openai':
-            return self._call_openai(prompt)
-        elif Config.LLM_PROVIDER == 'llama':
-            return self._call_groq(prompt)
-        elif Config.LLM_PROVIDER == 'mistral':
-            return self._call_mistral(prompt)
-        else:
-            raise ValueError(f"Unsupported LLM: {Config.LLM_PROVIDER}")
-    
-    def _call_openai(self, prompt: str) -> str:
-        """Call OpenAI-compatible API"""
-        headers = {
-            'Authorization': f'Bearer {self.llm_config["api_key"]}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': self.llm_config['model'],
-            'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': self.llm_config['temperature']
-        }
-        
-        base_url = 'https://api.openai.com/v1'
-        if 'base_url' in self.llm_config:
-            base_url = self.llm_config['base_url']
-        
-        response = requests.post(f'{base_url}/chat/completions', 
-                               headers=headers, json=data)
-        response.raise_for_status()
-        
-        return response.json()['choices'][0]['message']['content']
-    
-    def _call_groq(self, prompt: str) -> str:
-        """Call Groq API for Llama"""
-        return self._call_openai(prompt)  # Same interface
-    
-    def _call_mistral(self, prompt: str) -> str:
-        """Call Mistral API"""
-        return self._call_openai(prompt)  # Same interface
+        self.llm_client = create_llm_client(agent_name='summarizer_agent', db=self.db)
     
     def run(self, pr_number: int) -> Dict[str, Any]:
         """Generate PR summary"""
@@ -61,40 +26,28 @@ class SummarizerAgent:
         pr_data = self.db.get_agent_output(pr_number, 'ingestion_agent')
         if not pr_data:
             raise ValueError("No ingestion data found")
-        
-        # Prepare prompt for LLM
-        prompt = f"""
-        Please provide a concise summary of this pull request:
-        
-        Title: {pr_data.get('title', 'N/A')}
-        Description: {pr_data.get('description', 'N/A')}
-        
-        Changed Files ({len(pr_data.get('changed_files', []))} files):
-        {json.dumps(pr_data.get('changed_files', []), indent=2)}
-        
-        Please summarize:
-        1. What this PR aims to accomplish
-        2. Key changes made
-        3. Potential impact areas
-        4. Any notable patterns or concerns
-        
-        Keep the summary professional and technical.
-        """
+        changed_files = self.db.get_changed_files(pr_number, include_patch=True)
         
         try:
-            summary = self._call_llm(prompt)
+            # First pass: a short summary per file, reused for unchanged diffs
+            file_summaries, summarized = self._summarize_files(changed_files)
+            
+            # Second pass: the PR summary from the per-file summaries
+            prompt = self._pr_summary_prompt(pr_data, changed_files, file_summaries)
+            summary = self.llm_client.complete(prompt)
             
             result = {
                 'summary': summary,
                 'summary_length': len(summary),
-                'files_analyzed': len(pr_data.get('changed_files', [])),
+                'files_analyzed': len(changed_files),
+                'files_summarized': summarized,
                 'generation_success': True
             }
         except Exception as e:
             result = {
                 'summary': f"Failed to generate summary: {str(e)}",
                 'summary_length': 0,
-                'files_analyzed': len(pr_data.get('changed_files', [])),
+                'files_analyzed': len(changed_files),
                 'generation_success': False,
                 'error': str(e)
             }
@@ -102,4 +55,82 @@ class SummarizerAgent:
         # Save to database
         self.db.save_agent_output(pr_number, 'summarizer_agent', result)
         
-        return result
\ No newline at end of file
+        return result
+    
+    def _pr_summary_prompt(self, pr_data: Dict[str, Any], changed_files: List[Dict[str, Any]],
+                           file_summaries: Dict[str, str]) -> str:
+        overview = "\n".join(
+            f"- {f['filename']} ({f.get('status', '')}, +{f.get('additions', 0)}/-{f.get('deletions', 0)}): "
+            f"{file_summaries[f['filename']]}"
+            for f in changed_files
+        )
+        return f"""
+        Please provide a concise summary of this pull request:
+        
+        Title: {pr_data.get('title', 'N/A')}
+        Description: {pr_data.get('description', 'N/A')}
+        
+        Changed Files ({len(changed_files)} files), with a summary of each:
+        {overview}
+        
+        Please summarize:
+        1. What this PR aims to accomplish
+        2. Key changes made
+        3. Potential impact areas
+        4. Any notable patterns or concerns
+        
+        Keep the summary professional and technical.
+        """
+    
+    def _summarize_files(self, changed_files: List[Dict[str, Any]]) -> Tuple[Dict[str, str], int]:
+        """
+        Summarize each file's patch in parallel. Summaries are cached by the
+        file's name, status and patch, so files unchanged since an earlier push
+        are never re-summarized while a renamed file or a different diff of the
+        same blob gets its own summary. Returns the summary per filename and
+        how many were newly generated.
+        """
+        model = self.llm_client.llm_config['model']
+        keys = {file['filename']: self._summary_key(file) for file in changed_files}
+        cached = self.db.get_file_summaries(list(keys.values()), model, self.prompt_version)
+        
+        summaries = {}
+        missing = []
+        for file in changed_files:
+            if keys[file['filename']] in cached:
+                summaries[file['filename']] = cached[keys[file['filename']]]
+            else:
+                missing.append(file)
+        metrics.incr('cache_hits', 'file_summary', len(changed_files) - len(missing))
+        
+        with ThreadPoolExecutor(max_workers=Config.SUMMARY_MAX_CONCURRENCY) as executor:
+            generated = list(executor.map(self._summarize_file, missing))
+        
+        metrics.incr('cache_misses', 'file_summary', len(missing))
+        for file, summary in zip(missing, generated):
+            summaries[file['filename']] = summary
+        self.db.save_file_summaries({
+            keys[file['filename']]: summary for file, summary in zip(missing, generated)
+        }, model, self.prompt_version)
+        
+        return summaries, len(missing)
+    
+    def _patch_excerpt(self, file: Dict[str, Any]) -> str:
+        # A file summary only needs the gist, so very long patches are cut to one prompt budget
+        return (file.get('patch') or '')[:Config.REVIEW_CHUNK_TOKEN_BUDGET * Config.CHARS_PER_TOKEN]
+    
+    def _summary_key(self, file: Dict[str, Any]) -> str:
+        """Hash of everything the file's summary prompt is built from"""
+        payload = json.dumps([file['filename'], file.get('status', 'modified'), self._patch_excerpt(file)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _summarize_file(self, file: Dict[str, Any]) -> str:
+        patch = self._patch_excerpt(file)
+        prompt = f"""
+        Summarize the change to {file['filename']} ({file.get('status', 'modified')}) in one or two sentences.
+        Focus on what behavior changed, not on formatting.
+        
+        Diff:
+        {patch or '(no textual diff)'}
+        """
+        return self.llm_client.complete(prompt).strip()
@@ -1,10 +1,188 @@
-import time
-from typing import List, Dict, Any
-from typing import Optional
+import os
+import re
+import socket
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable
+from typing import Optional, Tuple
 from github_client import GitHubClient
 from config import Config
 from db import Database
 
+APPROVAL_COMMAND = re.compile(r'/(approve|reject)-step\s+(\d+)', re.IGNORECASE)
+
+def parse_approval_command(body: str) -> Optional[Tuple[bool, int]]:
+    """Parse the last /approve-step N or /reject-step N command in a comment"""
+    matches = APPROVAL_COMMAND.findall(body or '')
+    if not matches:
+        return None
+    action, step = matches[-1]
+    return action.lower() == 'approve', int(step)
+
+class ApprovalEvents:
+    """Wakes threads waiting for approval decisions recorded in this process"""
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._subscribers = set()
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    def notify(self):
+        """Signal that a new decision has been recorded"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+            for event in self._subscribers:
+                event.set()
+    
+    def subscribe(self, event: threading.Event):
+        """Also set event on every new decision, for loops waiting on other things too"""
+        with self._condition:
+            self._subscribers.add(event)
+    
+    def unsubscribe(self, event: threading.Event):
+        with self._condition:
+            self._subscribers.discard(event)
+    
+    def wait(self, seen_generation: int, timeout: float) -> bool:
+        """Wait until a decision newer than seen_generation arrives or timeout expires"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._generation != seen_generation, timeout
+            )
+
+# Shared by the webhook listener and every waiting ApprovalSystem in the process
+approval_events = ApprovalEvents()
+
+class RepoCommentPoller:
+    """
+    Polls the repository-level /issues/comments endpoint once per interval on
+    behalf of every waiting approval gate, instead of one request per PR.
+    The cursor is persisted in the database and a lease there makes sure only
+    one process polls at a time. The interval doubles while nothing changes.
+    """
+    
+    NAME = 'repo_comments'
+    
+    def __init__(self, github_client: Optional[GitHubClient] = None,
+                 db: Optional[Database] = None):
+        self.db = db or Database()
+        self.github_client = github_client or GitHubClient(self.db)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self._lock = threading.Lock()
+        self._local_waits = 0
+        self._thread = None
+        self._wake = threading.Event()
+    
+    def register(self):
+        """Note a waiting gate in this process and make sure the poller runs"""
+        # With no poller active anywhere, restart the cursor at now: the gate's
+        # own initial comment check covers everything posted before it
+        if not self.db.is_poller_lease_held(self.NAME):
+            self.db.save_poll_cursor(self.NAME, datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+        
+        with self._lock:
+            if self._local_waits == 0:
+                # A previous unregister may have woken a thread that is still
+                # running; it must go back to waiting out its interval
+                self._wake.clear()
+            self._local_waits += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+    
+    def unregister(self):
+        with self._lock:
+            self._local_waits -= 1
+            if self._local_waits == 0:
+                self._wake.set()
+    
+    def _run(self):
+        interval = Config.POLL_INTERVAL_SECONDS
+        try:
+            while True:
+                with self._lock:
+                    # Exit only if no gate registered since the wake-up; giving up
+                    # the lease under the lock keeps a replacement thread's lease intact
+                    if self._local_waits == 0:
+                        self.db.release_poller_lease(self.NAME, self.owner)
+                        self._thread = None
+                        return
+                
+                lease_ttl = Config.APPROVAL_POLL_MAX_INTERVAL_SECONDS * 2
+                if self.db.acquire_poller_lease(self.NAME, self.owner, lease_ttl):
+                    try:
+                        changed = self.poll_once()
+                    except Exception as e:
+                        print(f"Shared comment poll failed: {e}")
+                        changed = False
+                    
+                    # Back off while the repository is quiet
+                    if changed:
+                        interval = Config.POLL_INTERVAL_SECONDS
+                    else:
+                        interval = min(interval * 2, Config.APPROVAL_POLL_MAX_INTERVAL_SECONDS)
+                
+                self._wake.wait(interval)
+        except BaseException:
+            with self._lock:
+                self.db.release_poller_lease(self.NAME, self.owner)
+                self._thread = None
+            raise
+    
+    def poll_once(self) -> bool:
+        """
+        Fetch comments updated since the cursor and record approval commands
+        for every waiting gate. Returns True if any comment was new.
+        """
+        cursor = self.db.get_poll_cursor(self.NAME) or ''
+        waiting = set(self.db.get_approval_waits())
+        newest = cursor
+        recorded = False
+        
+        for comment in self.github_client.iter_repo_comments(since=cursor or None):
+            newest = max(newest, comment.get('updated_at', ''))
+            
+            command = parse_approval_command(comment.get('body', ''))
+            if command is None:
+                continue
+            
+            approved, step = command
+            pr_number = int(comment.get('issue_url', '').rsplit('/', 1)[-1] or 0)
+            if (pr_number, step) in waiting:
+                self.db.save_approval(pr_number, step, approved,
+                                      comment.get('user', {}).get('login', ''),
+                                      comment.get('body'))
+                recorded = True
+        
+        if recorded:
+            approval_events.notify()
+        if newest != cursor:
+            self.db.save_poll_cursor(self.NAME, newest)
+            return True
+        return False
+
+_comment_poller = None
+_comment_poller_lock = threading.Lock()
+
+def get_comment_poller() -> RepoCommentPoller:
+    """Get the process-wide shared comment poller"""
+    global _comment_poller
+    with _comment_poller_lock:
+        if _comment_poller is None:
+            _comment_poller = RepoCommentPoller()
+        return _comment_poller
+
+def reset_after_fork():
+    """Drop the poller singleton (and its thread state) inherited from a parent process"""
+    global _comment_poller, _comment_poller_lock
+    _comment_poller = None
+    _comment_poller_lock = threading.Lock()
+
 class ApprovalSystem:
     """Handles approval polling and decision making"""
     
@@ -13,54 +191,74 @@ class ApprovalSystem:
         self.db = Database()
     
     def wait_for_approval(self, pr_number: int, approval_step: int, 
-                         expected_command: str) -> bool:
+                         expected_command: str, block: bool = True) -> Optional[bool]:
         """
         Poll for approval command and return decision
-        Returns True if approved, False if rejected
+        Returns True if approved, False if rejected, and None if block is
+        False and no decision has been made yet
+        
+        Decisions recorded by the webhook listener or the shared repository
+        comment poller wake the wait immediately.
         """
-        print(f"Waiting for approval step {approval_step} on PR #{pr_number}")
+        print(f"Waiting for approval step {approval_step} on PR #{pr_number} "
+              f"(comment '{expected_command}' to continue)")
         
-        for attempt in range(Config.MAX_POLL_ATTEMPTS):
-            print(f"Polling attempt {attempt + 1}/{Config.MAX_POLL_ATTEMPTS}")
-            
-            # Check for existing approval in database
-            existing_approval = self.db.get_approval(pr_number, approval_step)
-            if existing_approval:
-                return existing_approval['approved']
-            
-            # Check for new comments
-            comments = self.github_client.get_pr_comments(pr_number)
+        # Check for existing approval in database
+        existing_approval = self.db.get_approval(pr_number, approval_step)
+        if existing_approval:
+            return existing_approval['approved']
+        
+        if not block:
+            return self._check_comments_for_approval(
+                self.github_client.iter_pr_comments(pr_number), pr_number, approval_step
+            )
+        
+        # One shared repository poller watches comments for every waiting PR;
+        # register before the initial check so no comment falls in between
+        poller = get_comment_poller()
+        self.db.add_approval_wait(pr_number, approval_step)
+        poller.register()
+        try:
+            # Commands posted before this gate was reached
             latest_decision = self._check_comments_for_approval(
-                comments, expected_command, pr_number, approval_step
+                self.github_client.iter_pr_comments(pr_number), pr_number, approval_step
             )
-            
             if latest_decision is not None:
                 return latest_decision
             
-            # Wait before next poll
-            time.sleep(Config.POLL_INTERVAL_SECONDS)
+            for attempt in range(Config.MAX_POLL_ATTEMPTS):
+                print(f"Polling attempt {attempt + 1}/{Config.MAX_POLL_ATTEMPTS}")
+                seen_generation = approval_events.generation
+                
+                existing_approval = self.db.get_approval(pr_number, approval_step)
+                if existing_approval:
+                    return existing_approval['approved']
+                
+                # Wait until the poller or webhook records a decision, re-checking
+                # the database each interval for decisions made by other processes
+                approval_events.wait(seen_generation, Config.POLL_INTERVAL_SECONDS)
+        finally:
+            poller.unregister()
+            self.db.remove_approval_wait(pr_number, approval_step)
         
         # Timeout - treat as rejection
         self.db.save_approval(pr_number, approval_step, False, 
                              "system", "Approval timeout")
         return False
     
-    def _check_comments_for_approval(self, comments: List[Dict[str, Any]], 
-                                   expected_command: str, pr_number: int, 
-                                   approval_step: int) -> Optional[bool]:
-        """Check comments for approval/rejection commands"""
-        for comment in reversed(comments):  # Check newest first
-            body = comment.get('body', '').strip().lower()
-            author = comment.get('user', {}).get('login', '')
-            
-            if expected_command.lower() in body:
-                if '/approve-step' in body:
-                    self.db.save_approval(pr_number, approval_step, True, 
-                                         author, comment.get('body'))
-                    return True
-                elif '/reject-step' in body:
-                    self.db.save_approval(pr_number, approval_step, False, 
-                                         author, comment.get('body'))
-                    return False
+    def _check_comments_for_approval(self, comments: Iterable[Dict[str, Any]], 
+                                   pr_number: int, approval_step: int) -> Optional[bool]:
+        """Check comments for approval/rejection commands; the newest command wins"""
+        decision = None
+        for comment in comments:  # Streamed oldest first
+            command = parse_approval_command(comment.get('body', ''))
+            if command and command[1] == approval_step:
+                author = comment.get('user', {}).get('login', '')
+                decision = (command[0], author, comment.get('body'))
+        
+        if decision is None:
+            return None
         
-        return None
\ No newline at end of file
+        approved, author, text = decision
+        self.db.save_approval(pr_number, approval_step, approved, author, text)
+        return approved
\ No newline at end of file
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for agent output codecs.
+
+Compares encode/decode time and stored size of every available serializer and
+compression combination against the original json.dumps/json.loads text path,
+using a synthetic ingestion payload.
+
+    python benchmarks/bench_codec.py --files 200 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+
+
+def make_ingestion_payload(num_files: int, lines_per_file: int = 200) -> dict:
+    """Build an ingestion-shaped payload with code-like patches and contents"""
+    rng = random.Random(42)
+    words = ['self', 'return', 'data', 'result', 'if', 'for', 'in', 'None', 'def', 'value',
+             'config', 'pr_number', 'response', 'json', 'files', 'print', 'import', 'else']
+
+    def code_line():
+        indent = '    ' * rng.randint(0, 3)
+        return indent + ' '.join(rng.choice(words) for _ in range(rng.randint(2, 9)))
+
+    changed_files = []
+    for i in range(num_files):
+        content = '\n'.join(code_line() for _ in range(lines_per_file))
+        patch = '@@ -1,20 +1,24 @@\n' + '\n'.join(
+            rng.choice('+- ') + code_line() for _ in range(40)
+        )
+        changed_files.append({
+            'filename': f"src/{''.join(rng.choices(string.ascii_lowercase, k=8))}_{i}.py",
+            'status': 'modified',
+            'additions': rng.randint(0, 200),
+            'deletions': rng.randint(0, 200),
+            'changes': rng.randint(0, 400),
+            'sha': ''.join(rng.choices('0123456789abcdef', k=40)),
+            'patch': patch,
+            'content': content
+        })
+
+    return {'title': 'Synthetic PR', 'description': 'Benchmark payload', 'changed_files': changed_files}
+
+
+def time_call(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Agent output codec benchmark')
+    parser.add_argument('--files', type=int, default=200, help='Changed files in the payload')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per codec')
+    args = parser.parse_args()
+
+    data = make_ingestion_payload(args.files)
+
+    rows = []
+    baseline = json.dumps(data)
+    rows.append(('json text (current)',
+                 time_call(lambda: json.dumps(data), args.repeat),
+                 time_call(lambda: json.loads(baseline), args.repeat),
+                 len(baseline.encode('utf-8'))))
+
+    serializers = ['json'] + (['msgpack'] if codec.msgpack else [])
+    compressions = ['none', 'zlib'] + (['zstd'] if codec.zstandard else [])
+    for serializer in serializers:
+        for compression in compressions:
+            encoded = codec.encode(data, serializer, compression)
+            assert codec.decode(encoded) == data
+            rows.append((f'{serializer}+{compression}',
+                         time_call(lambda: codec.encode(data, serializer, compression), args.repeat),
+                         time_call(lambda: codec.decode(encoded), args.repeat),
+                         len(encoded)))
+
+    print(f"Payload: {args.files} files, best of {args.repeat} runs")
+    print(f"{'codec':<22}{'encode ms':>12}{'decode ms':>12}{'size KiB':>12}{'ratio':>8}")
+    for name, encode_ms, decode_ms, size in rows:
+        print(f"{name:<22}{encode_ms:>12.2f}{decode_ms:>12.2f}{size / 1024:>12.1f}"
+              f"{size / rows[0][3]:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of the full PR review pipeline.
+
+Starts local stand-ins for the GitHub REST endpoints GitHubClient uses and for
+an OpenAI-compatible /chat/completions endpoint, each with configurable
+latency and response size, then runs the pipeline on synthetic PRs of the
+requested sizes. A PR's number is its file count; both approval gates find an
+approve comment already posted.
+
+Each size runs in a fresh process and working directory, so databases, caches
+and peak memory start clean. End-to-end and per-stage timings come from the
+pipeline's own metrics. Results are printed and can be written as JSON to
+track regressions.
+
+    python benchmarks/bench_pipeline.py --sizes 1,100,1000,3000 --llm-latency-ms 200 --output bench.json
+"""
+import argparse
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO = 'bench/synthetic'
+WORDS = ['self', 'return', 'data', 'result', 'if', 'for', 'in', 'None', 'def', 'value',
+         'config', 'pr_number', 'response', 'json', 'files', 'print', 'import', 'else']
+
+
+def code_line(rng: random.Random) -> str:
+    return '    ' * rng.randint(0, 3) + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 9)))
+
+
+def head_sha(pr_number: int) -> str:
+    """The PR number is recoverable from the head SHA used as the contents ref"""
+    return f"{pr_number:040x}"
+
+
+def file_name(index: int) -> str:
+    """Every fifth file is a test so the missing-test policy sees a realistic mix"""
+    if index % 5 == 4:
+        return f"tests/test_module_{index}.py"
+    return f"src/pkg_{index % 20}/module_{index}.py"
+
+
+def file_content(pr_number: int, index: int, lines: int) -> str:
+    rng = random.Random(pr_number * 100003 + index)
+    return '\n'.join(code_line(rng) for _ in range(lines)) + '\n'
+
+
+def file_patch(pr_number: int, index: int, lines: int) -> str:
+    """One hunk of context, added and removed lines with a consistent header"""
+    rng = random.Random(pr_number * 100019 + index)
+    body, old_count, new_count = [], 0, 0
+    for _ in range(lines):
+        marker = rng.choice(' +-')
+        old_count += marker != '+'
+        new_count += marker != '-'
+        body.append(marker + code_line(rng))
+    return f"@@ -1,{old_count} +1,{new_count} @@\n" + '\n'.join(body)
+
+
+@lru_cache(maxsize=8)
+def pr_files(pr_number: int, patch_lines: int) -> List[Dict[str, Any]]:
+    """The files listing of a synthetic PR; its number is its file count"""
+    files = []
+    for index in range(pr_number):
+        patch = file_patch(pr_number, index, patch_lines)
+        additions, deletions = patch.count('\n+'), patch.count('\n-')
+        files.append({
+            'filename': file_name(index),
+            'status': 'modified',
+            'additions': additions,
+            'deletions': deletions,
+            'changes': additions + deletions,
+            'sha': hashlib.sha1(f"{pr_number}:{index}".encode()).hexdigest(),
+            'patch': patch
+        })
+    return files
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """The GitHub REST endpoints used by GitHubClient, serving synthetic PRs"""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    content_lines = 200
+    patch_lines = 40
+    per_page_max = 100
+
+    def _send_json(self, body: Any, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self) -> Optional[List[str]]:
+        time.sleep(self.latency)
+        prefix = f"/repos/{REPO}/"
+        path = urlparse(self.path).path
+        return path[len(prefix):].split('/') if path.startswith(prefix) else None
+
+    def do_GET(self):
+        parts = self._route()
+        query = parse_qs(urlparse(self.path).query)
+
+        if parts and parts[0] == 'pulls' and len(parts) == 2:
+            pr_number = int(parts[1])
+            self._send_json({
+                'number': pr_number,
+                'title': f"Synthetic PR with {pr_number} files",
+                'body': 'Generated by the offline pipeline benchmark',
+                'user': {'login': 'bench'},
+                'state': 'open',
+                'base': {'ref': 'main', 'sha': '0' * 40},
+                'head': {'ref': f"bench-{pr_number}", 'sha': head_sha(pr_number)},
+                'created_at': '2024-01-01T00:00:00Z',
+                'updated_at': '2024-01-01T00:00:00Z'
+            })
+        elif parts and parts[0] == 'pulls' and parts[2:] == ['files']:
+            files = pr_files(int(parts[1]), self.patch_lines)
+            per_page = min(int(query.get('per_page', ['30'])[0]), self.per_page_max)
+            page = int(query.get('page', ['1'])[0])
+            headers = {}
+            if page * per_page < len(files):
+                next_url = (f"http://{self.headers['Host']}/repos/{REPO}/pulls/{parts[1]}/files"
+                            f"?per_page={per_page}&page={page + 1}")
+                headers['Link'] = f'<{next_url}>; rel="next"'
+            self._send_json(files[(page - 1) * per_page:page * per_page], headers=headers)
+        elif parts and parts[0] == 'contents':
+            index = int(re.search(r'_(\d+)\.py$', '/'.join(parts[1:])).group(1))
+            content = file_content(int(query['ref'][0], 16), index, self.content_lines)
+            self._send_json({'encoding': 'base64',
+                             'content': base64.b64encode(content.encode('utf-8')).decode('ascii')})
+        elif parts and parts[0] == 'issues' and parts[2:] == ['comments']:
+            # Both gates are already approved when the pipeline reaches them
+            self._send_json([
+                {'id': step, 'body': f"/approve-step {step}", 'user': {'login': 'bench'},
+                 'updated_at': '2024-01-01T00:00:00Z'}
+                for step in (3, 8)
+            ])
+        elif parts == ['issues', 'comments']:
+            self._send_json([])
+        else:
+            self._send_json({'message': 'Not Found'}, status=404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        parts = self._route()
+        if parts and parts[0] == 'issues' and parts[2:] == ['comments']:
+            self._send_json({'id': 1}, status=201)
+        elif parts and parts[0] == 'issues' and parts[2:] == ['labels']:
+            self._send_json([])
+        else:
+            self._send_json({'message': 'Not Found'}, status=404)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """An OpenAI-compatible /chat/completions endpoint, streamed or plain"""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0        # Seconds before the first token
+    token_interval = 0.0  # Seconds between streamed tokens
+    tokens = 200          # Reply length in tokens
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        time.sleep(self.latency)
+        words = [WORDS[i % len(WORDS)] + ' ' for i in range(self.tokens)]
+
+        if not request.get('stream'):
+            payload = json.dumps({
+                'choices': [{'message': {'role': 'assistant', 'content': ''.join(words)}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': self.tokens}
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for word in words:
+            event = json.dumps({'choices': [{'delta': {'content': word}}]})
+            self._write_chunk(f"data: {event}\n\n".encode('utf-8'))
+            if self.token_interval:
+                time.sleep(self.token_interval)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class BenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Workers drop their keep-alive connections when they exit
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(handler: type, **attributes) -> ThreadingHTTPServer:
+    server = BenchServer(('127.0.0.1', 0), type(handler.__name__, (handler,), attributes))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_size(pr_number: int, warm: bool, trace_memory: bool, verbose: bool) -> List[Dict[str, Any]]:
+    """Run the pipeline for one synthetic PR in a fresh working directory"""
+    workdir = tempfile.mkdtemp(prefix='ingagent-bench-')
+    os.chdir(workdir)
+    # Imported here, in the worker, so Config reads the benchmark environment
+    from db import Database
+    from main import PROrchestrator, STAGES
+
+    runs = []
+    try:
+        for label in ('cold', 'warm') if warm else ('cold',):
+            baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if trace_memory:
+                tracemalloc.start()
+            with open(os.devnull, 'w') as devnull, \
+                    contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+                result = PROrchestrator().run_pipeline(pr_number)
+            traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            tracemalloc.stop()
+
+            values = Database().get_recent_metrics(1)[0]['values']
+            total = lambda kind: sum(v for (k, _), v in values.items() if k == kind)
+            runs.append({
+                'files': pr_number,
+                'run': label,
+                'status': result['status'],
+                'error': result.get('error'),
+                'seconds': values.get(('pipeline_seconds', '')),
+                'stages': {name: values[('stage_seconds', name)] for name in STAGES
+                           if ('stage_seconds', name) in values},
+                'github_requests': total('github_requests'),
+                'github_bytes': total('github_bytes'),
+                'llm_calls': total('llm_calls'),
+                'llm_prompt_tokens': total('llm_prompt_tokens'),
+                'baseline_rss_mb': baseline_rss / 1024,
+                'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                'traced_peak_mb': traced_peak / 2**20 if traced_peak is not None else None
+            })
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end pipeline benchmark')
+    parser.add_argument('--sizes', default='1,10,100,1000,3000',
+                        help='Comma-separated changed-file counts (GitHub lists at most 3000)')
+    parser.add_argument('--github-latency-ms', type=float, default=0, help='Delay of every GitHub response')
+    parser.add_argument('--llm-latency-ms', type=float, default=0, help='Delay before the first LLM token')
+    parser.add_argument('--llm-token-ms', type=float, default=0, help='Delay between streamed LLM tokens')
+    parser.add_argument('--llm-tokens', type=int, default=200, help='LLM reply length in tokens')
+    parser.add_argument('--content-lines', type=int, default=200, help='Lines per file content')
+    parser.add_argument('--patch-lines', type=int, default=40, help='Lines per file patch')
+    parser.add_argument('--no-streaming', action='store_true', help='Request plain JSON completions')
+    parser.add_argument('--rate-limit', action='store_true',
+                        help='Keep the client-side LLM rate limiter on (off by default to time the pipeline)')
+    parser.add_argument('--warm', action='store_true',
+                        help='Run each PR a second time against the warm caches')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report the peak of Python allocations (slows the run)')
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline output')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    github = start_server(FakeGitHubHandler, latency=args.github_latency_ms / 1000,
+                          content_lines=args.content_lines, patch_lines=args.patch_lines)
+    llm = start_server(FakeLLMHandler, latency=args.llm_latency_ms / 1000,
+                       token_interval=args.llm_token_ms / 1000, tokens=args.llm_tokens)
+
+    # Workers inherit this environment; it takes precedence over any .env file
+    os.environ.update({
+        'GITHUB_API_URL': f"http://127.0.0.1:{github.server_port}",
+        'GITHUB_REPO': REPO,
+        'GITHUB_TOKEN': 'bench',
+        'LLM_PROVIDER': 'openai',
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{llm.server_port}",
+        'OPENAI_API_KEY': 'bench',
+        'LLM_STREAMING': 'false' if args.no_streaming else 'true',
+        'LLM_RATE_LIMIT_ENABLED': 'true' if args.rate_limit else 'false',
+        'LLM_HEDGE_ENABLED': 'false',
+        'LLM_CACHE_ENABLED': 'true' if args.warm else 'false',
+        'METRICS_ENABLED': 'true',
+        'METRICS_TEXTFILE_PATH': '',
+        'APPROVAL_WEBHOOK_ENABLED': 'false'
+    })
+
+    results = []
+    for size in sizes:
+        # A fresh process per size keeps module state and peak RSS independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            results.extend(executor.submit(run_size, size, args.warm, args.trace_memory,
+                                           args.verbose).result())
+
+    print(f"{'files':>6}{'run':>6}{'status':>11}{'total s':>10}{'GH req':>8}{'LLM calls':>11}"
+          f"{'peak RSS MB':>13}")
+    for run in results:
+        print(f"{run['files']:>6}{run['run']:>6}{run['status']:>11}{run['seconds'] or 0:>10.2f}"
+              f"{run['github_requests']:>8.0f}{run['llm_calls']:>11.0f}{run['peak_rss_mb']:>13.1f}")
+        for name, seconds in run['stages'].items():
+            print(f"{'':>12}{name:<24}{seconds:>8.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'parameters': vars(args),
+                'python': sys.version.split()[0],
+                'results': results
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
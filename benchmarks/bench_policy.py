@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DeepPolicyAgent's deterministic checks.
+
+Compares the compiled RuleEngine against the per-file helpers it replaced
+(a missing-test scan over every changed filename per source file, plus the
+naming check) on a synthetic monorepo-sized PR. The engine additionally scans
+every added patch line for secrets and debug statements.
+
+    python benchmarks/bench_policy.py --files 3000 --repeat 10
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from policy_rules import RuleEngine
+
+
+# The helpers DeepPolicyAgent used before the rule engine
+def legacy_is_source_file(filename: str) -> bool:
+    source_extensions = ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs']
+    return any(filename.endswith(ext) for ext in source_extensions)
+
+
+def legacy_has_test_file(filename: str, changed_files: List[str]) -> bool:
+    test_patterns = ['test_', '_test.', 'spec.', 'test/']
+    for test_file in changed_files:
+        if any(pattern in test_file for pattern in test_patterns):
+            return True
+    return False
+
+
+def legacy_check_naming_conventions(filename: str) -> bool:
+    if '_' in filename or '-' in filename:
+        return True
+    return not any(c.isupper() for c in filename if c.isalpha())
+
+
+def legacy_checks(filenames: List[str]) -> List[str]:
+    violations = []
+    for filename in filenames:
+        if legacy_is_source_file(filename) and not legacy_has_test_file(filename, filenames):
+            violations.append(f"Missing test file for: {filename}")
+        if not legacy_check_naming_conventions(filename):
+            violations.append(f"Poor naming convention: {filename}")
+    return violations
+
+
+def make_files(num_files: int) -> List[dict]:
+    """Synthetic PR without test files, the legacy helpers' worst case"""
+    rng = random.Random(7)
+    extensions = ['.py', '.ts', '.go', '.java', '.md', '.json']
+    files = []
+    for i in range(num_files):
+        name = ''.join(rng.choices(string.ascii_letters, k=10))
+        lines = [rng.choice('+- ') + ' '.join(rng.choices(string.ascii_lowercase, k=6))
+                 for _ in range(30)]
+        files.append({
+            'filename': f"pkg{i % 50}/module{i}/{name}{rng.choice(extensions)}",
+            'patch': '@@ -1,20 +1,24 @@\n' + '\n'.join(lines)
+        })
+    return files
+
+
+def time_call(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Policy rule engine benchmark')
+    parser.add_argument('--files', type=int, default=3000, help='Changed files in the PR')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed repetitions')
+    args = parser.parse_args()
+
+    files = make_files(args.files)
+    filenames = [f['filename'] for f in files]
+
+    compile_ms = time_call(RuleEngine, args.repeat)
+    engine = RuleEngine()
+    filename_only = [{'filename': name} for name in filenames]
+
+    # Same findings as the legacy helpers on the checks they both cover
+    legacy = legacy_checks(filenames)
+    compiled = [v['message'] for v in engine.evaluate(filename_only)
+                if v['rule'] in ('missing-tests', 'naming')]
+    assert sorted(legacy) == sorted(compiled)
+
+    print(f"PR: {args.files} files, best of {args.repeat} runs")
+    print(f"{'check':<40}{'ms':>10}")
+    print(f"{'legacy helpers (filenames)':<40}{time_call(lambda: legacy_checks(filenames), args.repeat):>10.2f}")
+    print(f"{'rule engine compile':<40}{compile_ms:>10.2f}")
+    print(f"{'rule engine (filenames)':<40}{time_call(lambda: engine.evaluate(filename_only), args.repeat):>10.2f}")
+    print(f"{'rule engine (filenames + patches)':<40}{time_call(lambda: engine.evaluate(files), args.repeat):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from typing import Optional
+from config import Config
+
+# One-byte header marking how a blob file is stored
+RAW = b'r'
+ZLIB = b'z'
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Compute the git blob SHA-1 of raw file bytes"""
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+class BlobStore:
+    """On-disk content-addressed store for file contents keyed by git blob SHA"""
+
+    def __init__(self, root: Optional[str] = None, compress: Optional[bool] = None):
+        self.root = root or Config.BLOB_STORE_DIR
+        self.compress = Config.BLOB_STORE_COMPRESS if compress is None else compress
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha[2:])
+
+    def __contains__(self, sha: str) -> bool:
+        return os.path.exists(self._path(sha))
+
+    def get(self, sha: str) -> Optional[str]:
+        """Get stored content for a blob SHA, or None if it has not been seen"""
+        try:
+            with open(self._path(sha), 'rb') as f:
+                stored = f.read()
+        except FileNotFoundError:
+            return None
+
+        data = zlib.decompress(stored[1:]) if stored[:1] == ZLIB else stored[1:]
+        return data.decode('utf-8')
+
+    def put(self, sha: str, content: str) -> bool:
+        """
+        Store content under its blob SHA. Content that does not hash to the
+        given SHA is rejected so a bad fetch can never poison the store.
+        """
+        data = content.encode('utf-8')
+        if git_blob_sha(data) != sha:
+            return False
+
+        path = self._path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stored = ZLIB + zlib.compress(data) if self.compress else RAW + data
+
+        # Write to a temporary file first so concurrent readers never see partial blobs
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(stored)
+        os.replace(tmp_path, path)
+        return True
@@ -0,0 +1,70 @@
+import re
+from typing import Dict, Any, List, Tuple
+from config import Config
+
+HUNK_HEADER = re.compile(r'^@@ ', re.MULTILINE)
+
+# A chunk is a list of (filename, diff text) pieces sent together in one prompt
+Chunk = List[Tuple[str, str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting prompts, without a tokenizer dependency"""
+    return len(text) // Config.CHARS_PER_TOKEN + 1
+
+
+def split_hunks(patch: str) -> List[str]:
+    """Split a unified diff patch into its hunks"""
+    starts = [m.start() for m in HUNK_HEADER.finditer(patch)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [patch[start:end] for start, end in zip(starts, starts[1:] + [len(patch)]) if patch[start:end]]
+
+
+def _split_lines(text: str, budget: int) -> List[str]:
+    """Split an oversized hunk on line boundaries into pieces under the budget"""
+    pieces, current = [], ''
+    for line in text.splitlines(keepends=True):
+        if current and estimate_tokens(current + line) > budget:
+            pieces.append(current)
+            current = ''
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack_chunks(files: List[Dict[str, Any]], budget: int) -> List[Chunk]:
+    """
+    Pack the hunks of each file's patch into chunks whose estimated size stays
+    under the token budget. Hunks of one file stay together and in order where
+    they fit; a hunk larger than the whole budget is split on line boundaries.
+    """
+    chunks, current, used = [], [], 0
+    for file in files:
+        filename = file.get('filename', '')
+        overhead = estimate_tokens(f"File: {filename}\nChanges:\n\n")
+        patch = file.get('patch') or ''
+        # Hunk boundaries parsed at ingestion are reused when available
+        hunks = [hunk.text(patch) for hunk in file.get('hunks') or ()] or split_hunks(patch)
+        for hunk in hunks:
+            for piece in _split_lines(hunk, max(budget - overhead, 1)):
+                cost = overhead + estimate_tokens(piece)
+                if current and used + cost > budget:
+                    chunks.append(current)
+                    current, used = [], 0
+                if current and current[-1][0] == filename:
+                    # Continue the same file without repeating its header
+                    current[-1] = (filename, current[-1][1] + piece)
+                    used += estimate_tokens(piece)
+                else:
+                    current.append((filename, piece))
+                    used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def render_chunk(chunk: Chunk) -> str:
+    """Format a chunk's diff pieces for a prompt"""
+    return "".join(f"File: {filename}\nChanges:\n{text}\n\n" for filename, text in chunk)
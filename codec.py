@@ -0,0 +1,90 @@
+import json
+import zlib
+from typing import Any, Optional, Union
+from config import Config
+
+# Optional faster serializer and compressor; JSON and zlib are always available
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The first byte of every encoded value: serializer id in the high nibble,
+# compression id in the low nibble. Legacy rows are plain JSON text and have
+# no header at all.
+SERIALIZERS = {'json': 1, 'msgpack': 2}
+COMPRESSIONS = {'none': 0, 'zlib': 1, 'zstd': 2}
+
+# Payloads smaller than this are stored uncompressed
+MIN_COMPRESS_BYTES = 512
+
+
+def _serializer_name(name: Optional[str]) -> str:
+    name = name or Config.OUTPUT_SERIALIZER
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unsupported serializer: {name}")
+    if name == 'msgpack' and msgpack is None:
+        return 'json'
+    return name
+
+
+def _compression_name(name: Optional[str]) -> str:
+    name = name or Config.OUTPUT_COMPRESSION
+    if name not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {name}")
+    if name == 'zstd' and zstandard is None:
+        return 'zlib'
+    return name
+
+
+def encode(data: Any, serializer: Optional[str] = None,
+           compression: Optional[str] = None) -> bytes:
+    """Serialize and compress a value, prefixed with a one-byte codec header"""
+    serializer = _serializer_name(serializer)
+    compression = _compression_name(compression)
+
+    if serializer == 'msgpack':
+        payload = msgpack.packb(data, use_bin_type=True)
+    else:
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    if len(payload) < MIN_COMPRESS_BYTES:
+        compression = 'none'
+    if compression == 'zlib':
+        payload = zlib.compress(payload, Config.OUTPUT_COMPRESSION_LEVEL)
+    elif compression == 'zstd':
+        payload = zstandard.ZstdCompressor(level=Config.OUTPUT_COMPRESSION_LEVEL).compress(payload)
+
+    header = SERIALIZERS[serializer] << 4 | COMPRESSIONS[compression]
+    return bytes([header]) + payload
+
+
+def decode(stored: Union[bytes, str]) -> Any:
+    """Decode a value written by encode, or a legacy JSON text row"""
+    if isinstance(stored, str):
+        return json.loads(stored)
+
+    header, payload = stored[0], stored[1:]
+    serializer, compression = header >> 4, header & 0x0F
+
+    if compression == COMPRESSIONS['zlib']:
+        payload = zlib.decompress(payload)
+    elif compression == COMPRESSIONS['zstd']:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this value")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compression != COMPRESSIONS['none']:
+        raise ValueError(f"Unknown compression id: {compression}")
+
+    if serializer == SERIALIZERS['msgpack']:
+        if msgpack is None:
+            raise RuntimeError("msgpack is required to read this value")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    if serializer == SERIALIZERS['json']:
+        return json.loads(payload)
+    raise ValueError(f"Unknown serializer id: {serializer}")
@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,13 +10,26 @@ class Config:
     # GitHub Configuration
     GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
     GITHUB_REPO = os.getenv('GITHUB_REPO')
+    GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')  # GitHub Enterprise or a local stand-in
+    GITHUB_CONDITIONAL_REQUESTS = os.getenv('GITHUB_CONDITIONAL_REQUESTS', 'true').lower() == 'true'
+    GITHUB_HTTP_CACHE_MAX_ENTRIES = int(os.getenv('GITHUB_HTTP_CACHE_MAX_ENTRIES', '2000'))
+    GITHUB_HTTP_CACHE_TTL_SECONDS = int(os.getenv('GITHUB_HTTP_CACHE_TTL_SECONDS', '86400'))  # 1 day unused
     
     # Database Configuration
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///review.db')
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')  # OFF, NORMAL, FULL
+    
+    # Agent output encoding; msgpack and zstd fall back to json and zlib if not installed
+    OUTPUT_SERIALIZER = os.getenv('OUTPUT_SERIALIZER', 'msgpack')  # json, msgpack
+    OUTPUT_COMPRESSION = os.getenv('OUTPUT_COMPRESSION', 'zstd')  # none, zlib, zstd
+    OUTPUT_COMPRESSION_LEVEL = int(os.getenv('OUTPUT_COMPRESSION_LEVEL', '3'))
     
     # LLM Configuration
     LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'openai')  # openai, llama, mistral
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    MISTRAL_API_KEY = os.getenv('MISTRAL_API_KEY')
     ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     
@@ -24,32 +37,98 @@ class Config:
     MODEL_NAME = os.getenv('MODEL_NAME', 'gpt-4')
     TEMPERATURE = float(os.getenv('TEMPERATURE', '0.1'))
     
+    # LLM Client Settings
+    LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+    LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '120'))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv('LLM_RETRY_BACKOFF_SECONDS', '1.0'))
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '10'))
+    LLM_STREAMING = os.getenv('LLM_STREAMING', 'true').lower() == 'true'
+    LLM_STREAM_STALL_SECONDS = float(os.getenv('LLM_STREAM_STALL_SECONDS', '30'))  # abort streams silent this long
+    
+    # Client-side rate limits per provider (requests and tokens per minute). Limiters
+    # live in each process; batch mode splits these limits and LLM_MAX_CONCURRENCY
+    # evenly across its worker processes so together they stay within the quota.
+    LLM_RATE_LIMIT_ENABLED = os.getenv('LLM_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LLM_RATE_LIMITS = {
+        'openai': {'rpm': int(os.getenv('OPENAI_RPM', '500')), 'tpm': int(os.getenv('OPENAI_TPM', '30000'))},
+        'llama': {'rpm': int(os.getenv('GROQ_RPM', '30')), 'tpm': int(os.getenv('GROQ_TPM', '6000'))},
+        'mistral': {'rpm': int(os.getenv('MISTRAL_RPM', '60')), 'tpm': int(os.getenv('MISTRAL_TPM', '500000'))}
+    }
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))  # upper bound for adaptive concurrency
+    LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv('LLM_EXPECTED_COMPLETION_TOKENS', '500'))
+    
+    # Hedged requests: if the primary provider is slower than its usual latency
+    # percentile, the prompt also goes to a secondary provider and the first answer wins.
+    # Prompts are only ever sent to the providers listed in LLM_HEDGE_PROVIDERS.
+    LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_PROVIDERS = [p for p in os.getenv('LLM_HEDGE_PROVIDERS', '').split(',') if p]  # e.g. llama,mistral
+    LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+    LLM_HEDGE_INITIAL_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_INITIAL_DELAY_SECONDS', '10'))
+    
+    # LLM Completion Cache
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', '604800'))  # 7 days
+    
+    # Token-budgeted review prompts (map-reduce over diff chunks)
+    CHARS_PER_TOKEN = int(os.getenv('CHARS_PER_TOKEN', '4'))
+    REVIEW_CHUNK_TOKEN_BUDGET = int(os.getenv('REVIEW_CHUNK_TOKEN_BUDGET', '6000'))
+    REVIEW_MAX_CONCURRENCY = int(os.getenv('REVIEW_MAX_CONCURRENCY', '4'))
+    SUMMARY_MAX_CONCURRENCY = int(os.getenv('SUMMARY_MAX_CONCURRENCY', '4'))
+    
     # Agent Configuration
     MAX_POLL_ATTEMPTS = int(os.getenv('MAX_POLL_ATTEMPTS', '50'))
     POLL_INTERVAL_SECONDS = int(os.getenv('POLL_INTERVAL_SECONDS', '30'))
+    APPROVAL_POLL_MAX_INTERVAL_SECONDS = int(os.getenv('APPROVAL_POLL_MAX_INTERVAL_SECONDS', '240'))
+    PIPELINE_MAX_WORKERS = int(os.getenv('PIPELINE_MAX_WORKERS', '4'))
+    INGESTION_FETCH_CONCURRENCY = int(os.getenv('INGESTION_FETCH_CONCURRENCY', '8'))
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))  # PR pipelines run at once in batch mode
+    
+    # Pipeline metrics (stored per run in review.db; optional Prometheus textfile)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TEXTFILE_PATH = os.getenv('METRICS_TEXTFILE_PATH')  # e.g. /var/lib/node_exporter/ingagent.prom
+    
+    # Approval Webhook (event-driven approvals; polling stays as the fallback)
+    APPROVAL_WEBHOOK_ENABLED = os.getenv('APPROVAL_WEBHOOK_ENABLED', 'false').lower() == 'true'
+    APPROVAL_WEBHOOK_HOST = os.getenv('APPROVAL_WEBHOOK_HOST', '0.0.0.0')
+    APPROVAL_WEBHOOK_PORT = int(os.getenv('APPROVAL_WEBHOOK_PORT', '8787'))
+    GITHUB_WEBHOOK_SECRET = os.getenv('GITHUB_WEBHOOK_SECRET')
+    
+    # Blob Store Configuration
+    BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', '.blob_cache')
+    BLOB_STORE_COMPRESS = os.getenv('BLOB_STORE_COMPRESS', 'true').lower() == 'true'
     
     @classmethod
-    def get_llm_config(cls) -> Dict[str, Any]:
-        """Get LLM configuration based on provider"""
-        if cls.LLM_PROVIDER == 'openai':
+    def get_llm_config(cls, provider: Optional[str] = None) -> Dict[str, Any]:
+        """Get LLM configuration for a provider, LLM_PROVIDER by default"""
+        provider = provider or cls.LLM_PROVIDER
+        if provider == 'openai':
             return {
+                'provider': 'openai',
                 'model': cls.MODEL_NAME,
                 'api_key': cls.OPENAI_API_KEY,
+                'base_url': cls.OPENAI_BASE_URL,
                 'temperature': cls.TEMPERATURE
             }
-        elif cls.LLM_PROVIDER == 'llama':
+        elif provider == 'llama':
             return {
+                'provider': 'llama',
                 'model': 'llama3-70b-8192',
                 'api_key': cls.GROQ_API_KEY,
                 'base_url': 'https://api.groq.com/openai/v1',
                 'temperature': cls.TEMPERATURE
             }
-        elif cls.LLM_PROVIDER == 'mistral':
+        elif provider == 'mistral':
             return {
+                'provider': 'mistral',
                 'model': 'mistral-large-latest',
-                'api_key': cls.OPENAI_API_KEY,  # Using OpenAI-compatible endpoint
+                # OpenAI-compatible endpoint; deployments predating MISTRAL_API_KEY used the OpenAI key
+                'api_key': cls.MISTRAL_API_KEY or cls.OPENAI_API_KEY,
                 'base_url': 'https://api.mistral.ai/v1',
                 'temperature': cls.TEMPERATURE
             }
         else:
-            raise ValueError(f"Unsupported LLM provider: {cls.LLM_PROVIDER}")
\ No newline at end of file
+            raise ValueError(f"Unsupported LLM provider: {provider}")
\ No newline at end of file
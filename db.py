@@ -1,18 +1,95 @@
 import sqlite3
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config import Config
+from diff_model import Hunk
+import codec
+
+# One long-lived connection per thread and database file, keyed by process id
+# as well so a forked child never reuses a connection opened by its parent
+_local = threading.local()
+
+# Database files whose schema has been initialized by this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# Connections inherited across fork; kept referenced so they are never closed
+# (or finalized) in the child, which would disturb the parent's locks
+_inherited_connections = []
+
+def reset_after_fork():
+    """Forget the connections and schema state inherited from a parent process"""
+    global _local, _init_lock
+    _inherited_connections.append(getattr(_local, 'connections', None))
+    _local = threading.local()
+    _init_lock = threading.Lock()
+    _initialized_paths.clear()
 
 class Database:
     """SQLite database operations for PR review system"""
     
     def __init__(self, db_path: str = "review.db"):
         self.db_path = db_path
-        self._init_db()
+        
+        key = os.path.abspath(db_path)
+        with _init_lock:
+            if key not in _initialized_paths:
+                self._init_db()
+                _initialized_paths.add(key)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use"""
+        connections = getattr(_local, 'connections', None)
+        if connections is None:
+            connections = _local.connections = {}
+        
+        key = (os.getpid(), self.db_path)
+        conn = connections.get(key)
+        if conn is None:
+            # Autocommit mode: writes are grouped with explicit transactions instead
+            conn = sqlite3.connect(self.db_path, timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={Config.DB_SYNCHRONOUS}')
+            conn.execute(f'PRAGMA busy_timeout={Config.DB_BUSY_TIMEOUT_MS}')
+            connections[key] = conn
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a batch of writes in one explicit transaction. BEGIN IMMEDIATE takes
+        the write lock up front so concurrent writers wait on busy_timeout instead
+        of failing. Nested calls join the outer transaction.
+        """
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
+    def close(self):
+        """Close this thread's connection to the database"""
+        connections = getattr(_local, 'connections', {})
+        conn = connections.pop((os.getpid(), self.db_path), None)
+        if conn is not None:
+            conn.close()
     
     def _init_db(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             # Agent outputs table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS agent_outputs (
@@ -51,82 +128,555 @@ class Database:
                 )
             ''')
             
-            conn.commit()
+            # Conditional-request cache for GitHub API responses
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body TEXT NOT NULL,
+                    links TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_accessed REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            
+            # Entries are evicted by last use, which was added after http_cache
+            # was introduced; older rows count as unused and expire first
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(http_cache)')]
+            if 'last_accessed' not in columns:
+                conn.execute('ALTER TABLE http_cache ADD COLUMN last_accessed REAL NOT NULL DEFAULT 0')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_http_cache_last_accessed
+                ON http_cache (last_accessed)
+            ''')
+            
+            # Last successfully reviewed head per PR, with the blob SHA of each file
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS review_state (
+                    pr_number INTEGER PRIMARY KEY,
+                    head_sha TEXT NOT NULL,
+                    file_shas TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Latest findings per reviewed file (or file set), carried forward by incremental reviews
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS review_findings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pr_number INTEGER NOT NULL,
+                    agent_name TEXT NOT NULL,
+                    head_sha TEXT NOT NULL,
+                    filenames TEXT NOT NULL,
+                    findings TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # One row per changed file; patch and content are only read when asked for
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS changed_files (
+                    pr_number INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    status TEXT,
+                    additions INTEGER DEFAULT 0,
+                    deletions INTEGER DEFAULT 0,
+                    changes INTEGER DEFAULT 0,
+                    sha TEXT,
+                    patch TEXT,
+                    content TEXT,
+                    hunks BLOB,
+                    PRIMARY KEY (pr_number, filename)
+                )
+            ''')
+            
+            # Parsed diff hunks were added after changed_files was introduced
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(changed_files)')]
+            if 'hunks' not in columns:
+                conn.execute('ALTER TABLE changed_files ADD COLUMN hunks BLOB')
+            
+            # Approval gates currently waiting for a decision
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS approval_waits (
+                    pr_number INTEGER NOT NULL,
+                    approval_step INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (pr_number, approval_step)
+                )
+            ''')
+            
+            # Cursor and lease of the shared repository comment poller
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS poller_state (
+                    name TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    lease_owner TEXT,
+                    lease_expires REAL
+                )
+            ''')
+            
+            # Per-file change summaries keyed by a hash of the summary prompt's inputs.
+            # Summaries were first keyed by blob SHA alone, which a rename or a
+            # different diff of the same blob shares; those rows are discarded
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(file_summaries)')]
+            if columns and 'summary_key' not in columns:
+                conn.execute('DROP TABLE file_summaries')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS file_summaries (
+                    summary_key TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version INTEGER NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (summary_key, model, prompt_version)
+                )
+            ''')
+            
+            # Latency and throughput of each LLM call, per agent
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_calls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    agent_name TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    streamed BOOLEAN NOT NULL,
+                    ttft_ms REAL,
+                    duration_ms REAL NOT NULL,
+                    completion_tokens INTEGER,
+                    tokens_per_second REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Per-run pipeline metrics: stage wall times, API usage and cache counters
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    pr_number INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id)')
+            
+            # Fingerprint of the inputs each stored agent output was computed from
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS agent_fingerprints (
+                    pr_number INTEGER NOT NULL,
+                    agent_name TEXT NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (pr_number, agent_name)
+                )
+            ''')
     
     def save_agent_output(self, pr_number: int, agent_name: str, output_data: Dict[str, Any]):
         """Save agent output to database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             conn.execute('''
                 INSERT OR REPLACE INTO agent_outputs (pr_number, agent_name, output_data)
                 VALUES (?, ?, ?)
-            ''', (pr_number, agent_name, json.dumps(output_data)))
-            conn.commit()
+            ''', (pr_number, agent_name, codec.encode(output_data)))
     
     def get_agent_output(self, pr_number: int, agent_name: str) -> Optional[Dict[str, Any]]:
         """Get agent output from database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT output_data FROM agent_outputs 
-                WHERE pr_number = ? AND agent_name = ?
-            ''', (pr_number, agent_name))
-            
-            result = cursor.fetchone()
-            return json.loads(result[0]) if result else None
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT output_data FROM agent_outputs 
+            WHERE pr_number = ? AND agent_name = ?
+        ''', (pr_number, agent_name))
+        
+        result = cursor.fetchone()
+        return codec.decode(result[0]) if result else None
     
     def save_approval(self, pr_number: int, approval_step: int, approved: bool, 
                      comment_author: str = None, comment_text: str = None):
         """Save approval decision"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             conn.execute('''
                 INSERT OR REPLACE INTO approvals (pr_number, approval_step, approved, comment_author, comment_text)
                 VALUES (?, ?, ?, ?, ?)
             ''', (pr_number, approval_step, approved, comment_author, comment_text))
-            conn.commit()
     
     def get_approval(self, pr_number: int, approval_step: int) -> Optional[Dict[str, Any]]:
         """Get approval decision"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT approved, comment_author, comment_text, created_at 
-                FROM approvals WHERE pr_number = ? AND approval_step = ?
-            ''', (pr_number, approval_step))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'approved': bool(result[0]),
-                    'comment_author': result[1],
-                    'comment_text': result[2],
-                    'created_at': result[3]
-                }
-            return None
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT approved, comment_author, comment_text, created_at 
+            FROM approvals WHERE pr_number = ? AND approval_step = ?
+        ''', (pr_number, approval_step))
+        
+        result = cursor.fetchone()
+        if result:
+            return {
+                'approved': bool(result[0]),
+                'comment_author': result[1],
+                'comment_text': result[2],
+                'created_at': result[3]
+            }
+        return None
     
     def halt_pipeline(self, pr_number: int, step_name: str, reason: str = None):
         """Mark pipeline as halted"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             conn.execute('''
                 INSERT OR REPLACE INTO halted (pr_number, step_name, reason)
                 VALUES (?, ?, ?)
             ''', (pr_number, step_name, reason))
-            conn.commit()
     
     def is_pipeline_halted(self, pr_number: int) -> bool:
         """Check if pipeline is halted"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT 1 FROM halted WHERE pr_number = ?
-            ''', (pr_number,))
-            return cursor.fetchone() is not None
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT 1 FROM halted WHERE pr_number = ?
+        ''', (pr_number,))
+        return cursor.fetchone() is not None
     
     def get_all_agent_outputs(self, pr_number: int) -> Dict[str, Any]:
         """Get all agent outputs for a PR"""
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT agent_name, output_data FROM agent_outputs 
+            WHERE pr_number = ? ORDER BY created_at
+        ''', (pr_number,))
+        
+        results = {}
+        for agent_name, output_data in cursor.fetchall():
+            results[agent_name] = codec.decode(output_data)
+        return results
+    
+    def get_http_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get cached validators and body for a GitHub API URL, unless unused past the TTL"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT etag, last_modified, body, links FROM http_cache
+            WHERE url = ? AND last_accessed >= ?
+        ''', (url, time.time() - Config.GITHUB_HTTP_CACHE_TTL_SECONDS))
+        
+        result = cursor.fetchone()
+        if result:
+            return {
+                'etag': result[0],
+                'last_modified': result[1],
+                'body': codec.decode(result[2]),
+                'links': json.loads(result[3])
+            }
+        return None
+    
+    def touch_http_cache(self, url: str):
+        """Mark a cached response as just used, after the server confirmed it is current"""
+        with self.transaction() as conn:
+            conn.execute('''
+                UPDATE http_cache SET last_accessed = ? WHERE url = ?
+            ''', (time.time(), url))
+    
+    def save_http_cache(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                        body: Any, links: Dict[str, Any]):
+        """
+        Save validators and (compressed) body of a GitHub API response, then
+        evict entries unused past the TTL and the least recently used ones
+        over the size bound
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, links, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (url, etag, last_modified, codec.encode(body), json.dumps(links), now))
+            
+            conn.execute('''
+                DELETE FROM http_cache WHERE last_accessed < ?
+            ''', (now - Config.GITHUB_HTTP_CACHE_TTL_SECONDS,))
+            conn.execute('''
+                DELETE FROM http_cache WHERE url IN (
+                    SELECT url FROM http_cache
+                    ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            ''', (Config.GITHUB_HTTP_CACHE_MAX_ENTRIES,))
+    
+    def get_review_state(self, pr_number: int) -> Optional[Dict[str, Any]]:
+        """Get the last successfully reviewed head and its file blob SHAs"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT head_sha, file_shas FROM review_state WHERE pr_number = ?
+        ''', (pr_number,))
+        
+        result = cursor.fetchone()
+        if result:
+            return {'head_sha': result[0], 'file_shas': json.loads(result[1])}
+        return None
+    
+    def save_review_state(self, pr_number: int, head_sha: str, file_shas: Dict[str, str]):
+        """Record the head that was just reviewed successfully"""
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO review_state (pr_number, head_sha, file_shas)
+                VALUES (?, ?, ?)
+            ''', (pr_number, head_sha, json.dumps(file_shas)))
+    
+    def save_review_findings(self, pr_number: int, agent_name: str, head_sha: str,
+                             reviewed: List[str], findings: List[Tuple[List[str], Any]]):
+        """
+        Save an agent's findings for the files it just reviewed, as (filenames,
+        findings) entries: one per file where the agent can tell which file a
+        finding is about. Older findings of the same agent that cover any
+        re-reviewed file are dropped whole, since they may describe that file's
+        old version.
+        """
+        reviewed = set(reviewed)
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+                SELECT id, filenames FROM review_findings
+                WHERE pr_number = ? AND agent_name = ?
+            ''', (pr_number, agent_name))
+            
+            stale = [(row_id,) for row_id, row_filenames in cursor.fetchall()
+                     if reviewed.intersection(json.loads(row_filenames))]
+            conn.executemany('DELETE FROM review_findings WHERE id = ?', stale)
+            
+            conn.executemany('''
+                INSERT INTO review_findings (pr_number, agent_name, head_sha, filenames, findings)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (pr_number, agent_name, head_sha, json.dumps(filenames), json.dumps(entry))
+                for filenames, entry in findings if filenames and entry
+            ])
+    
+    def get_review_findings(self, pr_number: int) -> List[Dict[str, Any]]:
+        """Get all stored findings for a PR, oldest first"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT agent_name, head_sha, filenames, findings FROM review_findings
+            WHERE pr_number = ? ORDER BY id
+        ''', (pr_number,))
+        
+        return [
+            {
+                'agent_name': agent_name,
+                'head_sha': head_sha,
+                'filenames': json.loads(filenames),
+                'findings': json.loads(findings)
+            }
+            for agent_name, head_sha, filenames, findings in cursor.fetchall()
+        ]
+    
+    def save_changed_files(self, pr_number: int, files: List[Dict[str, Any]]):
+        """Replace the stored changed files of a PR, keeping their order"""
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM changed_files WHERE pr_number = ?', (pr_number,))
+            conn.executemany('''
+                INSERT INTO changed_files (pr_number, position, filename, status, additions,
+                                           deletions, changes, sha, patch, content, hunks)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (pr_number, position, f['filename'], f.get('status', ''), f.get('additions', 0),
+                 f.get('deletions', 0), f.get('changes', 0), f.get('sha', ''),
+                 f.get('patch', ''), f.get('content'),
+                 codec.encode([hunk.to_record() for hunk in f['hunks']]) if 'hunks' in f else None)
+                for position, f in enumerate(files)
+            ])
+    
+    def get_changed_files(self, pr_number: int, include_patch: bool = False,
+                          include_content: bool = False, include_hunks: bool = False,
+                          filenames: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get changed files of a PR in their original order. Only metadata is
+        loaded unless the patch, full content or parsed hunks are requested.
+        """
+        columns = ['filename', 'status', 'additions', 'deletions', 'changes', 'sha']
+        if include_patch:
+            columns.append('patch')
+        if include_content:
+            columns.append('content')
+        if include_hunks:
+            columns.append('hunks')
+        
+        conn = self._connect()
+        cursor = conn.execute(f'''
+            SELECT {', '.join(columns)} FROM changed_files
+            WHERE pr_number = ? ORDER BY position
+        ''', (pr_number,))
+        
+        wanted = set(filenames) if filenames is not None else None
+        files = [
+            dict(zip(columns, row)) for row in cursor.fetchall()
+            if wanted is None or row[0] in wanted
+        ]
+        if include_hunks:
+            for f in files:
+                f['hunks'] = [Hunk.from_record(r) for r in codec.decode(f['hunks'])] if f['hunks'] else []
+        return files
+    
+    def get_diff_stats(self, pr_number: int) -> Dict[str, int]:
+        """Get the number of changed files and total line changes of a PR"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(changes), 0) FROM changed_files WHERE pr_number = ?
+        ''', (pr_number,))
+        
+        num_files, total_changes = cursor.fetchone()
+        return {'num_files': num_files, 'total_changes': total_changes}
+    
+    def add_approval_wait(self, pr_number: int, approval_step: int):
+        """Register a gate as waiting for an approval decision"""
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO approval_waits (pr_number, approval_step) VALUES (?, ?)
+            ''', (pr_number, approval_step))
+    
+    def remove_approval_wait(self, pr_number: int, approval_step: int):
+        """Unregister a waiting gate"""
+        with self.transaction() as conn:
+            conn.execute('''
+                DELETE FROM approval_waits WHERE pr_number = ? AND approval_step = ?
+            ''', (pr_number, approval_step))
+    
+    def get_approval_waits(self) -> List[Tuple[int, int]]:
+        """Get (pr_number, approval_step) of every waiting gate"""
+        conn = self._connect()
+        cursor = conn.execute('SELECT pr_number, approval_step FROM approval_waits')
+        return [tuple(row) for row in cursor.fetchall()]
+    
+    def acquire_poller_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the lease of a named poller; only one owner holds it at a time"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute('INSERT OR IGNORE INTO poller_state (name) VALUES (?)', (name,))
             cursor = conn.execute('''
-                SELECT agent_name, output_data FROM agent_outputs 
-                WHERE pr_number = ? ORDER BY created_at
-            ''', (pr_number,))
-            
-            results = {}
-            for agent_name, output_data in cursor.fetchall():
-                results[agent_name] = json.loads(output_data)
-            return results
\ No newline at end of file
+                UPDATE poller_state SET lease_owner = ?, lease_expires = ?
+                WHERE name = ? AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires < ?)
+            ''', (owner, now + ttl_seconds, name, owner, now))
+            return cursor.rowcount == 1
+    
+    def is_poller_lease_held(self, name: str) -> bool:
+        """Check whether any owner currently holds an unexpired poller lease"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT 1 FROM poller_state
+            WHERE name = ? AND lease_owner IS NOT NULL AND lease_expires >= ?
+        ''', (name, time.time()))
+        return cursor.fetchone() is not None
+    
+    def release_poller_lease(self, name: str, owner: str):
+        """Give up a poller lease held by owner"""
+        with self.transaction() as conn:
+            conn.execute('''
+                UPDATE poller_state SET lease_owner = NULL, lease_expires = NULL
+                WHERE name = ? AND lease_owner = ?
+            ''', (name, owner))
+    
+    def get_poll_cursor(self, name: str) -> Optional[str]:
+        """Get the persisted cursor of a named poller"""
+        conn = self._connect()
+        cursor = conn.execute('SELECT cursor FROM poller_state WHERE name = ?', (name,))
+        result = cursor.fetchone()
+        return result[0] if result else None
+    
+    def save_poll_cursor(self, name: str, poll_cursor: str):
+        """Persist the cursor of a named poller"""
+        with self.transaction() as conn:
+            conn.execute('INSERT OR IGNORE INTO poller_state (name) VALUES (?)', (name,))
+            conn.execute('''
+                UPDATE poller_state SET cursor = ? WHERE name = ?
+            ''', (poll_cursor, name))
+    
+    def get_agent_fingerprint(self, pr_number: int, agent_name: str) -> Optional[str]:
+        """Get the input fingerprint recorded for an agent's stored output"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT input_hash FROM agent_fingerprints WHERE pr_number = ? AND agent_name = ?
+        ''', (pr_number, agent_name))
+        result = cursor.fetchone()
+        return result[0] if result else None
+    
+    def save_agent_fingerprint(self, pr_number: int, agent_name: str, input_hash: str):
+        """Record the input fingerprint of an agent's stored output"""
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO agent_fingerprints (pr_number, agent_name, input_hash)
+                VALUES (?, ?, ?)
+            ''', (pr_number, agent_name, input_hash))
+    
+    def delete_agent_fingerprint(self, pr_number: int, agent_name: str):
+        """Forget an agent's input fingerprint so its output is not reused"""
+        with self.transaction() as conn:
+            conn.execute('''
+                DELETE FROM agent_fingerprints WHERE pr_number = ? AND agent_name = ?
+            ''', (pr_number, agent_name))
+    
+    def get_file_summaries(self, summary_keys: List[str], model: str,
+                           prompt_version: int) -> Dict[str, str]:
+        """Get cached file summaries by summary key, for the given model and prompt version"""
+        conn = self._connect()
+        summaries = {}
+        unique_keys = list(dict.fromkeys(summary_keys))
+        # Stay under SQLite's bound-parameter limit on very large PRs
+        for i in range(0, len(unique_keys), 500):
+            batch = unique_keys[i:i + 500]
+            cursor = conn.execute(f'''
+                SELECT summary_key, summary FROM file_summaries
+                WHERE model = ? AND prompt_version = ? AND summary_key IN ({','.join('?' * len(batch))})
+            ''', [model, prompt_version] + batch)
+            summaries.update(cursor.fetchall())
+        return summaries
+    
+    def save_file_summaries(self, summaries: Dict[str, str], model: str, prompt_version: int):
+        """Cache file summaries by summary key"""
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO file_summaries (summary_key, model, prompt_version, summary)
+                VALUES (?, ?, ?, ?)
+            ''', [(key, model, prompt_version, summary) for key, summary in summaries.items()])
+    
+    def save_llm_call(self, agent_name: str, metrics: Dict[str, Any]):
+        """Record the timing of one LLM call made by an agent"""
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO llm_calls (agent_name, provider, model, streamed, ttft_ms,
+                                       duration_ms, completion_tokens, tokens_per_second)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (agent_name, metrics['provider'], metrics['model'], metrics['streamed'],
+                  metrics.get('ttft_ms'), metrics['duration_ms'],
+                  metrics.get('completion_tokens'), metrics.get('tokens_per_second')))
+    
+    def get_llm_call_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get call count, mean time-to-first-token and mean tokens per second per agent"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT agent_name, COUNT(*), AVG(ttft_ms), AVG(duration_ms), AVG(tokens_per_second)
+            FROM llm_calls GROUP BY agent_name ORDER BY agent_name
+        ''')
+        return {
+            row[0]: {'calls': row[1], 'avg_ttft_ms': row[2], 'avg_duration_ms': row[3],
+                     'avg_tokens_per_second': row[4]}
+            for row in cursor.fetchall()
+        }
+    
+    def save_metrics(self, run_id: str, pr_number: int, rows: List[Tuple[str, str, float]]):
+        """Record a pipeline run's (kind, name, value) metrics"""
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO metrics (run_id, pr_number, kind, name, value) VALUES (?, ?, ?, ?, ?)
+            ''', [(run_id, pr_number, kind, name, value) for kind, name, value in rows])
+    
+    def get_recent_metrics(self, runs: int) -> List[Dict[str, Any]]:
+        """Get the metrics of the most recent runs, one dict per run, newest first"""
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT run_id, pr_number, kind, name, value FROM metrics
+            WHERE run_id IN (
+                SELECT run_id FROM metrics GROUP BY run_id ORDER BY MAX(id) DESC LIMIT ?
+            )
+            ORDER BY id DESC
+        ''', (runs,))
+        
+        by_run = {}
+        for run_id, pr_number, kind, name, value in cursor.fetchall():
+            run = by_run.setdefault(run_id, {'run_id': run_id, 'pr_number': pr_number, 'values': {}})
+            run['values'][(kind, name)] = value
+        return list(by_run.values())
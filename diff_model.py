@@ -0,0 +1,110 @@
+import re
+from array import array
+from typing import Any, List, Optional, Tuple
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@', re.MULTILINE)
+
+
+def _ranges(lines: array) -> List[int]:
+    """Collapse sorted line numbers into a flat [start, end, start, end, ...] list"""
+    flat = []
+    for line in lines:
+        if flat and line == flat[-1] + 1:
+            flat[-1] = line
+        else:
+            flat.extend((line, line))
+    return flat
+
+
+def _expand(flat: List[int]) -> array:
+    lines = array('I')
+    for start, end in zip(flat[::2], flat[1::2]):
+        lines.extend(range(start, end + 1))
+    return lines
+
+
+class Hunk:
+    """One hunk of a unified diff, with the line numbers it adds and removes"""
+
+    __slots__ = ('old_start', 'old_count', 'new_start', 'new_count',
+                 'offset', 'length', 'added', 'removed')
+
+    def __init__(self, old_start: int, old_count: int, new_start: int, new_count: int,
+                 offset: int, length: int, added: array, removed: array):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.offset = offset    # Position of the hunk in the patch text
+        self.length = length
+        self.added = added      # Line numbers in the new file
+        self.removed = removed  # Line numbers in the old file
+
+    @property
+    def additions(self) -> int:
+        return len(self.added)
+
+    @property
+    def deletions(self) -> int:
+        return len(self.removed)
+
+    def text(self, patch: str) -> str:
+        """This hunk's slice of the patch it was parsed from"""
+        return patch[self.offset:self.offset + self.length]
+
+    def added_ranges(self) -> List[Tuple[int, int]]:
+        """Added lines as inclusive (start, end) ranges in the new file"""
+        flat = _ranges(self.added)
+        return list(zip(flat[::2], flat[1::2]))
+
+    def removed_ranges(self) -> List[Tuple[int, int]]:
+        """Removed lines as inclusive (start, end) ranges in the old file"""
+        flat = _ranges(self.removed)
+        return list(zip(flat[::2], flat[1::2]))
+
+    def to_record(self) -> List[Any]:
+        """Compact list form for storage; line numbers are kept as ranges"""
+        return [self.old_start, self.old_count, self.new_start, self.new_count,
+                self.offset, self.length, _ranges(self.added), _ranges(self.removed)]
+
+    @classmethod
+    def from_record(cls, record: List[Any]) -> 'Hunk':
+        old_start, old_count, new_start, new_count, offset, length, added, removed = record
+        return cls(old_start, old_count, new_start, new_count, offset, length,
+                   _expand(added), _expand(removed))
+
+
+def parse_patch(patch: Optional[str]) -> List[Hunk]:
+    """Parse a GitHub file patch (unified diff hunks without file headers)"""
+    if not patch:
+        return []
+
+    headers = list(HUNK_HEADER.finditer(patch))
+    hunks = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(patch)
+        old_start, old_count, new_start, new_count = (
+            int(header.group(1)), int(header.group(2) or 1),
+            int(header.group(3)), int(header.group(4) or 1)
+        )
+
+        added, removed = array('I'), array('I')
+        old_line, new_line = old_start, new_start
+        body_start = patch.find('\n', header.end(), end)
+        body = patch[body_start + 1:end] if body_start != -1 else ''
+        for line in body.split('\n'):
+            marker = line[:1]
+            if marker == '+':
+                added.append(new_line)
+                new_line += 1
+            elif marker == '-':
+                removed.append(old_line)
+                old_line += 1
+            elif marker == ' ':
+                old_line += 1
+                new_line += 1
+            # '\ No newline at end of file' does not advance either side
+
+        hunks.append(Hunk(old_start, old_count, new_start, new_count,
+                          header.start(), end - header.start(), added, removed))
+    return hunks
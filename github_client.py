@@ -1,39 +1,114 @@
 import requests
 import base64
-from typing import Dict, Any, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from config import Config
+from db import Database
+import metrics
+
+def _count_response(response: requests.Response, *args, **kwargs):
+    metrics.incr('github_requests')
+    metrics.incr('github_bytes', value=len(response.content))
+
+# Shared keep-alive session for all GitHub API calls in this process
+_session = requests.Session()
+_session.hooks['response'].append(_count_response)
 
 class GitHubClient:
     """GitHub API client for PR operations"""
     
-    def __init__(self):
+    PER_PAGE = 100  # GitHub's maximum page size for listing endpoints
+    
+    # Query parameters that move on every poll; leaving them out of the cache
+    # key keeps one entry per listing instead of one per cursor
+    VOLATILE_PARAMS = ('since',)
+    
+    def __init__(self, db: Optional[Database] = None):
         self.token = Config.GITHUB_TOKEN
         self.repo = Config.GITHUB_REPO
-        self.base_url = f"https://api.github.com/repos/{self.repo}"
+        self.base_url = f"{Config.GITHUB_API_URL.rstrip('/')}/repos/{self.repo}"
         self.headers = {
             'Authorization': f'token {self.token}',
             'Accept': 'application/vnd.github.v3+json',
             'X-GitHub-Api-Version': '2022-11-28'
         }
+        self.db = db or Database()
+    
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        GET a JSON resource, revalidating any cached copy with If-None-Match /
+        If-Modified-Since. A 304 is served from the cache and does not count
+        against the rate limit. Returns the body and the Link relations.
+        """
+        cache_key = self._cache_key(url, params)
+        cached = None
+        headers = self.headers
+        
+        if Config.GITHUB_CONDITIONAL_REQUESTS:
+            cached = self.db.get_http_cache(cache_key)
+            if cached:
+                headers = dict(self.headers)
+                if cached['etag']:
+                    headers['If-None-Match'] = cached['etag']
+                if cached['last_modified']:
+                    headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = _session.get(url, headers=headers, params=params)
+        if response.status_code == 304 and cached:
+            metrics.incr('cache_hits', 'github_etag')
+            self.db.touch_http_cache(cache_key)
+            return cached['body'], cached['links']
+        response.raise_for_status()
+        if Config.GITHUB_CONDITIONAL_REQUESTS:
+            metrics.incr('cache_misses', 'github_etag')
+        
+        body = response.json()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if Config.GITHUB_CONDITIONAL_REQUESTS and (etag or last_modified):
+            self.db.save_http_cache(cache_key, etag, last_modified, body, response.links)
+        return body, response.links
+    
+    def _cache_key(self, url: str, params: Optional[Dict[str, Any]]) -> str:
+        """The full request URL without its volatile query parameters"""
+        parts = urlsplit(requests.Request('GET', url, params=params).prepare().url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if k not in self.VOLATILE_PARAMS]
+        return urlunsplit(parts._replace(query=urlencode(query)))
     
     def get_pr_details(self, pr_number: int) -> Dict[str, Any]:
         """Get PR metadata and details"""
         url = f"{self.base_url}/pulls/{pr_number}"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        pr_details, _ = self._get_json(url)
+        return pr_details
+    
+    def _paginate(self, url: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield items from a listing endpoint, following Link rel="next" lazily"""
+        params = dict(params or {}, per_page=self.PER_PAGE)
+        while url:
+            items, links = self._get_json(url, params)
+            yield from items
+            
+            # The next link already carries per_page and page in its query string
+            url = links.get('next', {}).get('url')
+            params = None
+    
+    def iter_open_prs(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the repository's open PRs, one page at a time"""
+        return self._paginate(f"{self.base_url}/pulls", {'state': 'open'})
+    
+    def iter_pr_files(self, pr_number: int) -> Iterator[Dict[str, Any]]:
+        """Iterate over files changed in PR, one page at a time"""
+        return self._paginate(f"{self.base_url}/pulls/{pr_number}/files")
     
     def get_pr_files(self, pr_number: int) -> List[Dict[str, Any]]:
         """Get list of files changed in PR"""
-        url = f"{self.base_url}/pulls/{pr_number}/files"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return list(self.iter_pr_files(pr_number))
     
     def get_file_content(self, file_path: str, ref: str) -> Optional[str]:
         """Get file content from repository"""
         url = f"{self.base_url}/contents/{file_path}?ref={ref}"
-        response = requests.get(url, headers=self.headers)
+        response = _session.get(url, headers=self.headers)
         if response.status_code == 404:
             return None
         response.raise_for_status()
@@ -43,23 +118,31 @@ class GitHubClient:
             return base64.b64decode(content_data['content']).decode('utf-8')
         return content_data.get('content', '')
     
+    def iter_pr_comments(self, pr_number: int) -> Iterator[Dict[str, Any]]:
+        """Iterate over comments on a PR, oldest first, one page at a time"""
+        return self._paginate(f"{self.base_url}/issues/{pr_number}/comments")
+    
+    def iter_repo_comments(self, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over issue and PR comments across the repository, least recently updated first"""
+        params = {'sort': 'updated', 'direction': 'asc'}
+        if since:
+            params['since'] = since
+        return self._paginate(f"{self.base_url}/issues/comments", params)
+    
     def get_pr_comments(self, pr_number: int) -> List[Dict[str, Any]]:
         """Get all comments on a PR"""
-        url = f"{self.base_url}/issues/{pr_number}/comments"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return list(self.iter_pr_comments(pr_number))
     
     def create_comment(self, pr_number: int, body: str):
         """Create a comment on a PR"""
         url = f"{self.base_url}/issues/{pr_number}/comments"
-        response = requests.post(url, headers=self.headers, json={'body': body})
+        response = _session.post(url, headers=self.headers, json={'body': body})
         response.raise_for_status()
         return response.json()
     
     def add_labels(self, pr_number: int, labels: List[str]):
         """Add labels to a PR"""
         url = f"{self.base_url}/issues/{pr_number}/labels"
-        response = requests.post(url, headers=self.headers, json={'labels': labels})
+        response = _session.post(url, headers=self.headers, json={'labels': labels})
         response.raise_for_status()
         return response.json()
\ No newline at end of file
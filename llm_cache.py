@@ -0,0 +1,146 @@
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+from config import Config
+import metrics
+
+# One connection per thread and cache file, reused across calls
+_local = threading.local()
+
+class LLMCache:
+    """Persistent content-addressed cache for LLM completions with LRU eviction and TTL"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None):
+        self.db_path = db_path or Config.LLM_CACHE_PATH
+        self.max_entries = max_entries if max_entries is not None else Config.LLM_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.LLM_CACHE_TTL_SECONDS
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use. WAL and a busy
+        timeout let batch worker processes share the cache instead of failing
+        with "database is locked".
+        """
+        connections = getattr(_local, 'connections', None)
+        if connections is None:
+            connections = _local.connections = {}
+
+        # Keyed by process too: a forked worker must not reuse its parent's connection
+        key = (os.getpid(), self.db_path)
+        conn = connections.get(key)
+        if conn is None:
+            # Autocommit mode: writes are grouped with explicit transactions instead
+            conn = sqlite3.connect(self.db_path, timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA busy_timeout={Config.DB_BUSY_TIMEOUT_MS}')
+            connections[key] = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run writes in one transaction holding the write lock from the start"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _init_db(self):
+        """Initialize cache tables"""
+        with self._transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    completion TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed
+                ON llm_cache (last_accessed)
+            ''')
+
+            # Single-row hit/miss counters
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('INSERT OR IGNORE INTO llm_cache_stats (id) VALUES (1)')
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, prompt: str) -> str:
+        """Hash the inputs that determine a completion"""
+        payload = json.dumps([provider, model, temperature, prompt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Get a cached completion, or None on a miss or expired entry"""
+        now = time.time()
+        # The lookup only reads; the write lock is taken for the bookkeeping alone
+        result = self._connect().execute('''
+            SELECT completion, created_at FROM llm_cache WHERE cache_key = ?
+        ''', (cache_key,)).fetchone()
+        expired = result is not None and now - result[1] > self.ttl_seconds
+        if expired:
+            result = None
+
+        with self._transaction() as conn:
+            if expired:
+                conn.execute('DELETE FROM llm_cache WHERE cache_key = ?', (cache_key,))
+            if result:
+                conn.execute('''
+                    UPDATE llm_cache SET last_accessed = ? WHERE cache_key = ?
+                ''', (now, cache_key))
+                conn.execute('UPDATE llm_cache_stats SET hits = hits + 1 WHERE id = 1')
+            else:
+                conn.execute('UPDATE llm_cache_stats SET misses = misses + 1 WHERE id = 1')
+        metrics.incr('cache_hits' if result else 'cache_misses', 'llm')
+
+        return result[0] if result else None
+
+    def put(self, cache_key: str, completion: str):
+        """Store a completion and evict least recently used entries over the size bound"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_cache (cache_key, completion, created_at, last_accessed)
+                VALUES (?, ?, ?, ?)
+            ''', (cache_key, completion, now, now))
+
+            conn.execute('''
+                DELETE FROM llm_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache
+                    ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current entry count"""
+        conn = self._connect()
+        hits, misses = conn.execute(
+            'SELECT hits, misses FROM llm_cache_stats WHERE id = 1'
+        ).fetchone()
+        entries = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'entries': entries,
+            'hit_rate': hits / total if total else 0.0
+        }
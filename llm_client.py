@@ -0,0 +1,357 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+from chunker import estimate_tokens
+from config import Config
+from db import Database
+from llm_cache import LLMCache
+from rate_limiter import get_limiter, parse_retry_after
+import metrics
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+
+# Status codes worth another attempt: rate limiting and transient upstream failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# Recent time-to-first-token (or full duration, when not streamed) per provider, in seconds
+_latencies: Dict[str, Deque[float]] = {}
+_latencies_lock = threading.Lock()
+
+
+class StreamStalledError(requests.Timeout):
+    """A streamed completion stopped producing tokens before it finished"""
+
+
+class LLMCancelledError(Exception):
+    """A hedged call was abandoned because another provider answered first"""
+
+
+def get_session(base_url: str) -> requests.Session:
+    """Get the shared keep-alive session for an LLM endpoint"""
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.LLM_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[base_url] = session
+        return session
+
+
+def record_latency(provider: str, seconds: float):
+    """Remember how long a provider took to start answering"""
+    with _latencies_lock:
+        _latencies.setdefault(provider, deque(maxlen=500)).append(seconds)
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on a provider before hedging: its latency at LLM_HEDGE_PERCENTILE"""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(provider, ()))
+    if len(samples) < Config.LLM_HEDGE_MIN_SAMPLES:
+        return Config.LLM_HEDGE_INITIAL_DELAY_SECONDS
+    index = min(len(samples) - 1, int(len(samples) * Config.LLM_HEDGE_PERCENTILE / 100))
+    return samples[index]
+
+
+class LLMClient:
+    """OpenAI-compatible chat completion client shared by all LLM agents"""
+
+    def __init__(self, llm_config: Optional[Dict[str, Any]] = None,
+                 cache: Optional[LLMCache] = None, agent_name: Optional[str] = None,
+                 db: Optional[Database] = None):
+        self.llm_config = llm_config or Config.get_llm_config()
+        self.provider = self.llm_config.get('provider', Config.LLM_PROVIDER)
+        self.base_url = self.llm_config.get('base_url', DEFAULT_BASE_URL).rstrip('/')
+        self.session = get_session(self.base_url)
+        self.timeout = (Config.LLM_CONNECT_TIMEOUT, Config.LLM_READ_TIMEOUT)
+        self.max_retries = Config.LLM_MAX_RETRIES
+        self.cache = cache if cache is not None else (LLMCache() if Config.LLM_CACHE_ENABLED else None)
+        self.stream = Config.LLM_STREAMING
+        self.limiter = get_limiter(self.provider) if Config.LLM_RATE_LIMIT_ENABLED else None
+        # Call timings are recorded per agent when the client is named
+        self.agent_name = agent_name
+        self.db = db if db is not None or agent_name is None else Database()
+
+    def cached(self, prompt: str) -> Optional[str]:
+        """Get a cached completion for a prompt without calling the provider"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(prompt))
+
+    def _cache_key(self, prompt: str) -> str:
+        return LLMCache.make_key(self.provider, self.llm_config['model'],
+                                 self.llm_config['temperature'], prompt)
+
+    def complete(self, prompt: str, first_token: Optional[threading.Event] = None,
+                 cancelled: Optional[threading.Event] = None) -> str:
+        """
+        Send a single-message chat completion and return the reply text. The
+        first_token event is set once the reply starts arriving; setting
+        cancelled abandons the call.
+        """
+        cached = self.cached(prompt)
+        if cached is not None:
+            return cached
+
+        data = {
+            'model': self.llm_config['model'],
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': self.llm_config['temperature']
+        }
+        if self.stream:
+            data['stream'] = True
+
+        # Token cost is estimated up front and settled once the reply size is known
+        prompt_tokens = estimate_tokens(prompt)
+        estimated_cost = prompt_tokens + Config.LLM_EXPECTED_COMPLETION_TOKENS
+        completion, call_metrics = self._post(
+            '/chat/completions', data,
+            lambda response, started: self._read_completion(response, started, first_token, cancelled),
+            estimated_cost, cancelled
+        )
+        if call_metrics.get('ttft_ms') is None and (cancelled is None or not cancelled.is_set()):
+            # Streams record their time to first token as it arrives; an abandoned
+            # call's latency is recorded by the hedging client instead
+            record_latency(self.provider, call_metrics['duration_ms'] / 1000)
+        metrics.incr('llm_calls', self.provider)
+        metrics.incr('llm_prompt_tokens', self.provider, prompt_tokens)
+        metrics.incr('llm_completion_tokens', self.provider, call_metrics.get('completion_tokens') or 0)
+        metrics.incr('llm_latency_ms', self.provider, call_metrics['duration_ms'])
+
+        if self.limiter is not None and call_metrics.get('completion_tokens') is not None:
+            self.limiter.tokens.adjust(prompt_tokens + call_metrics['completion_tokens'] - estimated_cost)
+        if self.db is not None:
+            self.db.save_llm_call(self.agent_name, call_metrics)
+        if self.cache is not None:
+            self.cache.put(self._cache_key(prompt), completion)
+        return completion
+
+    def _read_completion(self, response: requests.Response, started: float,
+                         first_token_event: Optional[threading.Event] = None,
+                         cancelled: Optional[threading.Event] = None) -> Tuple[str, Dict[str, Any]]:
+        """Read a streamed or plain completion response, timing it from started"""
+        call_metrics = {'provider': self.provider, 'model': self.llm_config['model']}
+
+        # Endpoints that ignore 'stream' answer with a plain JSON body
+        if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+            body = response.json()
+            duration = time.monotonic() - started
+            tokens = body.get('usage', {}).get('completion_tokens')
+            call_metrics.update(streamed=False, duration_ms=duration * 1000, completion_tokens=tokens,
+                           tokens_per_second=tokens / duration if tokens and duration else None)
+            return body['choices'][0]['message']['content'], call_metrics
+
+        parts = []
+        first_token = None
+        last_token = time.monotonic()
+        for line in response.iter_lines():
+            # Silence is caught by the socket read timeout; this also catches
+            # streams that only send keep-alive comments
+            now = time.monotonic()
+            if cancelled is not None and cancelled.is_set():
+                response.close()
+                raise LLMCancelledError(f"Abandoned stream from {response.url}")
+            if now - last_token > Config.LLM_STREAM_STALL_SECONDS:
+                response.close()
+                raise StreamStalledError(f"No tokens for {Config.LLM_STREAM_STALL_SECONDS}s "
+                                         f"from {response.url}")
+
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+
+            choices = json.loads(payload).get('choices') or [{}]
+            content = choices[0].get('delta', {}).get('content')
+            if content:
+                parts.append(content)
+                last_token = now
+                if first_token is None:
+                    first_token = now
+                    # Recorded now so a stream abandoned later still counts
+                    record_latency(self.provider, first_token - started)
+                    if first_token_event is not None:
+                        first_token_event.set()
+
+        duration = time.monotonic() - started
+        # Each content chunk carries about one token
+        generation = last_token - first_token if first_token is not None else 0
+        call_metrics.update(streamed=True, duration_ms=duration * 1000,
+                       ttft_ms=(first_token - started) * 1000 if first_token is not None else None,
+                       completion_tokens=len(parts),
+                       tokens_per_second=len(parts) / generation if generation else None)
+        return ''.join(parts), call_metrics
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {self.llm_config["api_key"]}',
+            'Content-Type': 'application/json'
+        }
+
+    def _post(self, path: str, data: Dict[str, Any],
+              read: Callable[[requests.Response, float], Any], estimated_tokens: int = 0,
+              cancelled: Optional[threading.Event] = None) -> Any:
+        """
+        POST to the provider and read the response with read, retrying connection
+        errors, timeouts (including stalled streams) and retryable status codes.
+        Each attempt passes through the provider's rate limiter, which honors
+        Retry-After and adapts concurrency to throttling.
+        """
+        url = f'{self.base_url}{path}'
+        stream = bool(data.get('stream'))
+        # While streaming, the read timeout bounds the silence between chunks
+        timeout = (self.timeout[0], Config.LLM_STREAM_STALL_SECONDS) if stream else self.timeout
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if cancelled is not None and cancelled.is_set():
+                raise LLMCancelledError(f"Abandoned call to {url}")
+            if self.limiter is not None:
+                self.limiter.acquire(estimated_tokens)
+                if cancelled is not None and cancelled.is_set():
+                    # Cancelled while waiting for quota: give it back unused
+                    self.limiter.requests.adjust(-1)
+                    self.limiter.tokens.adjust(-estimated_tokens)
+                    self.limiter.release()
+                    raise LLMCancelledError(f"Abandoned call to {url}")
+            outcome = {}
+            started = time.monotonic()
+            try:
+                response = self.session.post(url, headers=self._headers(), json=data,
+                                             timeout=timeout, stream=stream)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    with response:
+                        result = read(response, started)
+                    outcome['succeeded'] = True
+                    return result
+                if response.status_code == 429:
+                    outcome.update(throttled=True,
+                                   retry_after=parse_retry_after(response.headers.get('Retry-After')))
+                last_error = requests.HTTPError(
+                    f"{response.status_code} from {url}", response=response
+                )
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(**outcome)
+
+            if attempt < self.max_retries:
+                # Throttled calls wait out Retry-After in the limiter instead
+                if not outcome.get('retry_after'):
+                    time.sleep(Config.LLM_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+        raise last_error
+
+
+class HedgedLLMClient:
+    """
+    Sends each prompt to the primary provider and, if it has not started
+    answering within its usual latency percentile, to a secondary provider as
+    well. The first good answer wins and the other call is abandoned. A failed
+    call fails over to the next provider straight away.
+    """
+
+    def __init__(self, clients: List[LLMClient], agent_name: Optional[str] = None):
+        self.clients = clients
+        self.primary = clients[0]
+        self.llm_config = self.primary.llm_config
+        self.agent_name = agent_name
+
+    def complete(self, prompt: str) -> str:
+        # Each client consults its own cache when called, so a cached answer
+        # returns at once and is looked up (and counted) once per call
+        outcomes = queue.Queue()
+        cancels = []
+        backups = list(self.clients[1:])
+        launched_at = {}
+        finished = set()
+
+        def launch(client: LLMClient) -> threading.Event:
+            launched_at[client] = time.monotonic()
+            started = threading.Event()
+            cancelled = threading.Event()
+            cancels.append(cancelled)
+
+            def call():
+                try:
+                    outcomes.put((client, client.complete(prompt, started, cancelled), None))
+                except Exception as e:
+                    outcomes.put((client, None, e))
+                finally:
+                    started.set()
+
+            # Daemon threads: an abandoned non-streamed call must not hold up the winner
+            threading.Thread(target=call, daemon=True).start()
+            return started
+
+        primary_started = launch(self.primary)
+        running = 1
+        delay = hedge_delay(self.primary.provider)
+        hedge_at = time.monotonic() + delay
+        hedged = False
+        last_error = None
+
+        while running:
+            timeout = max(0.0, hedge_at - time.monotonic()) if backups and not hedged else None
+            try:
+                client, completion, error = outcomes.get(timeout=timeout)
+            except queue.Empty:
+                hedged = True
+                if not primary_started.is_set():
+                    print(f"[LLM] {self.primary.provider} slower than {delay:.1f}s, "
+                          f"hedging with {backups[0].provider}")
+                    launch(backups.pop(0))
+                    running += 1
+                continue
+
+            running -= 1
+            finished.add(client)
+            if error is None:
+                for cancelled in cancels:
+                    cancelled.set()
+                if self.primary not in finished and not primary_started.is_set():
+                    # The primary lost the race before answering: it took at least
+                    # this long, and leaving it out would drag the hedge delay lower
+                    record_latency(self.primary.provider, time.monotonic() - launched_at[self.primary])
+                print(f"[LLM] {self.agent_name or 'call'} served by {client.provider}")
+                return completion
+
+            last_error = error
+            if running == 0 and backups:
+                hedged = True
+                print(f"[LLM] {client.provider} failed ({error}), failing over to {backups[0].provider}")
+                launch(backups.pop(0))
+                running += 1
+
+        raise last_error
+
+
+def create_llm_client(agent_name: Optional[str] = None,
+                      db: Optional[Database] = None):
+    """Create the LLM client for an agent, hedged across providers when enabled"""
+    primary = LLMClient(agent_name=agent_name, db=db)
+    if not Config.LLM_HEDGE_ENABLED:
+        return primary
+
+    # Hedging is opt-in per provider: prompts never go to a provider not listed
+    secondaries = []
+    for provider in Config.LLM_HEDGE_PROVIDERS:
+        llm_config = Config.get_llm_config(provider)
+        if provider != primary.provider and llm_config.get('api_key'):
+            secondaries.append(LLMClient(llm_config, agent_name=agent_name, db=db))
+
+    return HedgedLLMClient([primary] + secondaries, agent_name) if secondaries else primary
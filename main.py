@@ -2,7 +2,11 @@
 import sys
 import os
 import argparse
-from typing import Dict, Any
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,90 +20,109 @@ from agents.deep_policy_agent import DeepPolicyAgent
 from agents.ask_agent import AskAgent
 from agents.approval_agent_2 import ApprovalAgent2
 from agents.coordinator_agent import CoordinatorAgent
+from approval import ApprovalSystem, approval_events, get_comment_poller
+from approval import reset_after_fork as reset_approval_after_fork
 from db import Database
+from db import reset_after_fork as reset_db_after_fork
+from github_client import GitHubClient
+from scheduler import StageScheduler
+from stage_memo import MemoizedStage
+from profiling import ProfiledStage
+from rate_limiter import share_limits
+import metrics
+from webhook_server import ApprovalWebhookServer
 from config import Config
 
+# Result key and progress label for each pipeline stage
+STAGES = {
+    'ingestion_agent': ('ingestion', '1. Running Ingestion Agent...'),
+    'early_policy_agent': ('early_policy', '2. Running Early Policy Agent...'),
+    'approval_agent_1': ('approval_1', '3. Running Approval Agent #1...'),
+    'summarizer_agent': ('summarizer', '4. Running Summarizer Agent...'),
+    'reviewer_agent': ('reviewer', '5. Running Reviewer Agent...'),
+    'deep_policy_agent': ('deep_policy', '6. Running Deep Policy Agent...'),
+    'ask_agent': ('ask', '7. Running Ask Agent...'),
+    'approval_agent_2': ('approval_2', '8. Running Approval Agent #2...'),
+    'coordinator_agent': ('coordinator', '9. Running Coordinator Agent...')
+}
+
 class PROrchestrator:
-    """Main orchestrator that runs the 9-agent pipeline in strict order"""
+    """Main orchestrator that runs the 9-agent pipeline as a dependency graph"""
     
-    def __init__(self):
+    def __init__(self, park_at_gates: bool = False, force: bool = False,
+                 profile_dir: Optional[str] = None):
         self.db = Database()
+        self.github_client = GitHubClient(self.db)
+        # In batch mode a gate without a decision parks the PR instead of
+        # holding a worker while it waits
         self.agents = {
             'ingestion_agent': IngestionAgent(),
             'early_policy_agent': EarlyPolicyAgent(),
-            'approval_agent_1': ApprovalAgent1(),
+            'approval_agent_1': ApprovalAgent1(block=not park_at_gates),
             'summarizer_agent': SummarizerAgent(),
             'reviewer_agent': ReviewerAgent(),
             'deep_policy_agent': DeepPolicyAgent(),
             'ask_agent': AskAgent(),
-            'approval_agent_2': ApprovalAgent2(),
+            'approval_agent_2': ApprovalAgent2(block=not park_at_gates),
             'coordinator_agent': CoordinatorAgent()
         }
+        # Gates always re-check their decision; every other stage reuses its
+        # stored output when its inputs are unchanged, unless forced
+        self.stages = {
+            name: agent if hasattr(agent, 'approval_step')
+            else MemoizedStage(name, agent, self.db, force=force)
+            for name, agent in self.agents.items()
+        }
+        if profile_dir:
+            # Profiled stages run one at a time so allocations are attributed
+            # to the stage that made them; without profiling nothing is wrapped
+            profiled = {name: ProfiledStage(name, stage, profile_dir)
+                        for name, stage in self.stages.items()}
+            self.scheduler = StageScheduler(profiled, max_workers=1,
+                                            on_stage_start=self._announce_stage)
+        else:
+            self.scheduler = StageScheduler(self.stages, on_stage_start=self._announce_stage)
     
-    def run_pipeline(self, pr_number: int) -> Dict[str, Any]:
-        """Execute the 9-agent pipeline in strict sequential order"""
-        print(f"🚀 Starting PR Review Pipeline for PR #{pr_number}")
+    def _announce_stage(self, agent_name: str):
+        print("\n" + "="*50)
+        print(STAGES[agent_name][1])
+    
+    def run_pipeline(self, pr_number: int, completed: Iterable[str] = ()) -> Dict[str, Any]:
+        """Execute the 9-agent pipeline, running independent stages concurrently
+        while honoring the approval gates at steps 3 and 8. Stages listed in
+        completed are skipped when resuming a parked run."""
+        print(f"🚀 {'Resuming' if completed else 'Starting'} PR Review Pipeline for PR #{pr_number}")
         
         # Check if pipeline is already halted
         if self.db.is_pipeline_halted(pr_number):
             print("⏸️ Pipeline is halted. Exiting.")
             return {'status': 'halted'}
         
-        results = {}
-        
+        before = metrics.snapshot()
+        started = time.perf_counter()
+        timings = {}
         try:
-            # 1. Ingestion Agent
-            print("\n" + "="*50)
-            print("1. Running Ingestion Agent...")
-            results['ingestion'] = self.agents['ingestion_agent'].run(pr_number)
-            
-            # 2. Early Policy Agent
-            print("\n" + "="*50)
-            print("2. Running Early Policy Agent...")
-            results['early_policy'] = self.agents['early_policy_agent'].run(pr_number)
-            
-            # 3. Approval Agent #1
-            print("\n" + "="*50)
-            print("3. Running Approval Agent #1...")
-            results['approval_1'] = self.agents['approval_agent_1'].run(pr_number)
-            
-            if not results['approval_1'].get('approved', False):
-                print("❌ Pipeline halted at Approval Step 3")
-                return {'status': 'halted', 'step': 3}
-            
-            # 4. Summarizer Agent
-            print("\n" + "="*50)
-            print("4. Running Summarizer Agent...")
-            results['summarizer'] = self.agents['summarizer_agent'].run(pr_number)
-            
-            # 5. Reviewer Agent
-            print("\n" + "="*50)
-            print("5. Running Reviewer Agent...")
-            results['reviewer'] = self.agents['reviewer_agent'].run(pr_number)
+            pr_details = self.github_client.get_pr_details(pr_number)
+            revision = (f"{pr_details.get('base', {}).get('sha', '')}.."
+                        f"{pr_details.get('head', {}).get('sha', '')}")
+            for stage in self.stages.values():
+                if isinstance(stage, MemoizedStage):
+                    stage.revision = revision
             
-            # 6. Deep Policy Agent
-            print("\n" + "="*50)
-            print("6. Running Deep Policy Agent...")
-            results['deep_policy'] = self.agents['deep_policy_agent'].run(pr_number)
+            outcome = self.scheduler.run(pr_number, completed)
+            timings = outcome['timings']
+            results = {
+                STAGES[name][0]: result for name, result in outcome['results'].items()
+            }
             
-            # 7. Ask Agent
-            print("\n" + "="*50)
-            print("7. Running Ask Agent...")
-            results['ask'] = self.agents['ask_agent'].run(pr_number)
+            if outcome['status'] == 'halted':
+                print(f"❌ Pipeline halted at Approval Step {outcome['step']}")
+                return {'status': 'halted', 'step': outcome['step']}
             
-            # 8. Approval Agent #2
-            print("\n" + "="*50)
-            print("8. Running Approval Agent #2...")
-            results['approval_2'] = self.agents['approval_agent_2'].run(pr_number)
-            
-            if not results['approval_2'].get('approved', False):
-                print("❌ Pipeline halted at Approval Step 8")
-                return {'status': 'halted', 'step': 8}
-            
-            # 9. Coordinator Agent
-            print("\n" + "="*50)
-            print("9. Running Coordinator Agent...")
-            results['coordinator'] = self.agents['coordinator_agent'].run(pr_number)
+            if outcome['status'] == 'parked':
+                print(f"⏸️ Pipeline parked at Approval Step {outcome['step']} awaiting a decision")
+                return {'status': 'parked', 'step': outcome['step'],
+                        'completed': outcome['completed']}
             
             print("\n" + "="*50)
             print("✅ PR Review Pipeline Completed Successfully!")
@@ -108,22 +131,245 @@ class PROrchestrator:
         except Exception as e:
             print(f"❌ Pipeline failed with error: {str(e)}")
             return {'status': 'error', 'error': str(e)}
+        finally:
+            self._record_metrics(pr_number, timings, before, time.perf_counter() - started)
+    
+    def _record_metrics(self, pr_number: int, timings: Dict[str, float],
+                        before: Dict[Any, float], elapsed: float):
+        """Store this run's stage timings and counter changes"""
+        if not Config.METRICS_ENABLED:
+            return
+        
+        rows = [('stage_seconds', name, seconds) for name, seconds in timings.items()]
+        rows.append(('pipeline_seconds', '', elapsed))
+        rows.extend(metrics.since(before))
+        try:
+            self.db.save_metrics(uuid.uuid4().hex, pr_number, rows)
+            if Config.METRICS_TEXTFILE_PATH:
+                metrics.write_textfile(Config.METRICS_TEXTFILE_PATH, pr_number, rows)
+        except Exception as e:
+            print(f"⚠️ Could not record metrics for PR #{pr_number}: {e}")
+
+# One orchestrator per batch worker process, built on first use
+_worker_orchestrator = None
+
+def _init_batch_worker(worker_count: int = 1):
+    """
+    Forget the database connections and poller a forked worker inherits from
+    the parent, and take this worker's share of the LLM rate limits
+    """
+    reset_db_after_fork()
+    reset_approval_after_fork()
+    share_limits(worker_count)
+
+def _run_pipeline_worker(pr_number: int, completed: List[str], force: bool = False,
+                         profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Run one PR's pipeline in a batch worker process, parking at undecided gates"""
+    global _worker_orchestrator
+    if _worker_orchestrator is None:
+        _worker_orchestrator = PROrchestrator(park_at_gates=True, force=force, profile_dir=profile_dir)
+    result = _worker_orchestrator.run_pipeline(pr_number, completed)
+    # Stage results stay in the database; only the outcome goes back to the parent
+    result.pop('results', None)
+    return result
+
+def parse_pr_numbers(spec: str) -> List[int]:
+    """Parse a PR list such as "12,15,20-30" into sorted unique PR numbers"""
+    pr_numbers = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(n) for n in part.split('-', 1))
+            if start > end:
+                raise ValueError(f"Invalid PR range: {part}")
+            pr_numbers.update(range(start, end + 1))
+        else:
+            pr_numbers.add(int(part))
+    return sorted(pr_numbers)
+
+def run_batch(pr_numbers: List[int], max_workers: int = None, force: bool = False,
+              profile_dir: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Review many PRs on a bounded process pool. A PR that reaches an approval
+    gate without a decision is parked: its worker is freed, the shared comment
+    poller watches for the decision, and the PR is resubmitted from where it
+    stopped once the gate is decided (or times out as a rejection).
+    """
+    db = Database()
+    approval_system = ApprovalSystem()
+    poller = get_comment_poller()
+    max_wait = Config.MAX_POLL_ATTEMPTS * Config.POLL_INTERVAL_SECONDS
+    outcomes = {}
+    parked = {}
+    # Set when a worker finishes or the webhook or poller records a decision
+    wakeup = threading.Event()
+    
+    max_workers = max_workers or Config.BATCH_MAX_WORKERS
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker,
+                             initargs=(max_workers,)) as executor:
+        futures = {}
+        
+        def submit(pr_number: int, completed: List[str]):
+            future = executor.submit(_run_pipeline_worker, pr_number, completed, force, profile_dir)
+            future.add_done_callback(lambda _: wakeup.set())
+            futures[future] = pr_number
+        
+        approval_events.subscribe(wakeup)
+        try:
+            for pr_number in pr_numbers:
+                submit(pr_number, [])
+            
+            while futures or parked:
+                # The timeout only bounds how late a parked gate's deadline is noticed
+                wakeup.wait(Config.POLL_INTERVAL_SECONDS)
+                wakeup.clear()
+                finished = [future for future in futures if future.done()]
+                
+                for future in finished:
+                    pr_number = futures.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {'status': 'error', 'error': str(e)}
+                    
+                    if outcome['status'] != 'parked':
+                        outcomes[pr_number] = outcome
+                        print(f"[Batch] PR #{pr_number}: {outcome['status']}")
+                        continue
+                    
+                    step = outcome['step']
+                    db.add_approval_wait(pr_number, step)
+                    poller.register()
+                    parked[pr_number] = {'step': step, 'completed': outcome['completed'],
+                                         'deadline': time.monotonic() + max_wait}
+                    print(f"[Batch] PR #{pr_number}: parked at Approval Step {step}")
+                    # Catch commands posted between the worker's check and registration
+                    approval_system.wait_for_approval(pr_number, step, f"/approve-step {step}",
+                                                      block=False)
+                
+                for pr_number, gate in list(parked.items()):
+                    step = gate['step']
+                    decision = db.get_approval(pr_number, step)
+                    if decision is None and time.monotonic() >= gate['deadline']:
+                        # Timeout - treat as rejection, as a blocking gate would
+                        db.save_approval(pr_number, step, False, "system", "Approval timeout")
+                        decision = {'approved': False}
+                    if decision is None:
+                        continue
+                    
+                    del parked[pr_number]
+                    poller.unregister()
+                    db.remove_approval_wait(pr_number, step)
+                    submit(pr_number, gate['completed'])
+        finally:
+            approval_events.unsubscribe(wakeup)
+    
+    return outcomes
+
+def _print_batch_summary(outcomes: Dict[int, Dict[str, Any]]):
+    print("\n" + "="*50)
+    print(f"📋 Batch summary: {len(outcomes)} PRs")
+    for status in ('completed', 'halted', 'error'):
+        prs = sorted(pr for pr, outcome in outcomes.items() if outcome['status'] == status)
+        print(f"  {status}: {len(prs)}" + (f" ({', '.join(f'#{pr}' for pr in prs)})" if prs else ""))
+    for pr_number, outcome in sorted(outcomes.items()):
+        if outcome['status'] == 'error':
+            print(f"  PR #{pr_number} error: {outcome['error']}")
+
+def print_stats(runs: int):
+    """Print latency percentiles and per-run resource use over recent runs"""
+    recent = Database().get_recent_metrics(runs)
+    if not recent:
+        print("No pipeline runs recorded yet")
+        return
+    
+    def values(kind: str, name: str = '') -> List[float]:
+        return [run['values'][(kind, name)] for run in recent if (kind, name) in run['values']]
+    
+    print(f"📊 Metrics over the last {len(recent)} runs\n")
+    print(f"{'Stage':<20}{'p50 (s)':>10}{'p95 (s)':>10}{'runs':>6}")
+    rows = [(name, values('stage_seconds', name)) for name in STAGES]
+    rows.append(('pipeline', values('pipeline_seconds')))
+    for name, seconds in rows:
+        if seconds:
+            print(f"{name:<20}{metrics.percentile(seconds, 50):>10.2f}"
+                  f"{metrics.percentile(seconds, 95):>10.2f}{len(seconds):>6}")
+    
+    def per_run(kind: str) -> float:
+        total = sum(value for run in recent for (k, _), value in run['values'].items() if k == kind)
+        return total / len(recent)
+    
+    print("\nAverage per run:")
+    print(f"  GitHub requests:   {per_run('github_requests'):.1f}")
+    print(f"  GitHub KiB:        {per_run('github_bytes') / 1024:.1f}")
+    print(f"  LLM calls:         {per_run('llm_calls'):.1f}")
+    print(f"  Prompt tokens:     {per_run('llm_prompt_tokens'):.0f}")
+    print(f"  Completion tokens: {per_run('llm_completion_tokens'):.0f}")
+    
+    caches = sorted({name for run in recent for kind, name in run['values']
+                     if kind in ('cache_hits', 'cache_misses')})
+    if caches:
+        print("\nCache hit rates:")
+        for cache in caches:
+            hits, misses = sum(values('cache_hits', cache)), sum(values('cache_misses', cache))
+            print(f"  {cache:<18} {hits / (hits + misses):>6.1%} of {hits + misses:.0f} lookups")
+
+def stats_main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog='main.py stats',
+                                     description='Summarize metrics of recent pipeline runs')
+    parser.add_argument('--runs', type=int, default=50, help='Number of recent runs to include')
+    args = parser.parse_args(argv)
+    print_stats(args.runs)
 
 def main():
+    if sys.argv[1:2] == ['stats']:
+        stats_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description='PR Review Orchestrator')
-    parser.add_argument('--pr-number', type=int, required=True, help='PR number to review')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--pr-number', type=int, help='PR number to review')
+    target.add_argument('--pr-numbers', type=parse_pr_numbers,
+                        help='Comma-separated PR numbers and ranges to review, e.g. "12,15,20-30"')
+    target.add_argument('--all-open', action='store_true', help='Review every open PR')
+    parser.add_argument('--workers', type=int, default=Config.BATCH_MAX_WORKERS,
+                        help='PR pipelines to run at once in batch mode')
+    parser.add_argument('--force', action='store_true',
+                        help='Recompute every stage even when its inputs are unchanged')
+    parser.add_argument('--profile', nargs='?', const='profiles', metavar='DIR',
+                        help='Write per-stage cProfile .prof files and allocation reports '
+                             'to DIR (default: profiles)')
     args = parser.parse_args()
     
-    orchestrator = PROrchestrator()
-    result = orchestrator.run_pipeline(args.pr_number)
+    # Receive approval comments by webhook so waiting gates wake immediately
+    if Config.APPROVAL_WEBHOOK_ENABLED:
+        ApprovalWebhookServer().start()
+    
+    if args.pr_number is not None:
+        orchestrator = PROrchestrator(force=args.force, profile_dir=args.profile)
+        result = orchestrator.run_pipeline(args.pr_number)
+        statuses = [result['status']]
+    else:
+        if args.all_open:
+            pr_numbers = [pr['number'] for pr in GitHubClient().iter_open_prs()]
+        else:
+            pr_numbers = args.pr_numbers
+        outcomes = run_batch(pr_numbers, args.workers, args.force, args.profile)
+        _print_batch_summary(outcomes)
+        statuses = [outcome['status'] for outcome in outcomes.values()]
+    
+    if args.profile:
+        print(f"\n🔬 Stage profiles and allocation reports written to {args.profile}/")
     
     # Exit with appropriate code
-    if result['status'] == 'completed':
+    if 'error' in statuses:
+        sys.exit(2)
+    elif all(status == 'completed' for status in statuses):
         sys.exit(0)
-    elif result['status'] == 'halted':
-        sys.exit(1)
     else:
-        sys.exit(2)
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
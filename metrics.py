@@ -0,0 +1,67 @@
+import math
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+# Process-wide counters keyed by (kind, name), e.g. ('github_requests', '') or
+# ('cache_hits', 'llm'). Pipeline runs record the change over the run.
+_counters: Dict[Tuple[str, str], float] = defaultdict(float)
+_counters_lock = threading.Lock()
+
+Row = Tuple[str, str, float]
+
+
+def incr(kind: str, name: str = '', value: float = 1):
+    """Add to a process-wide counter"""
+    with _counters_lock:
+        _counters[(kind, name)] += value
+
+
+def snapshot() -> Dict[Tuple[str, str], float]:
+    """Copy of the current counter values"""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def since(before: Dict[Tuple[str, str], float]) -> List[Row]:
+    """Counter increases since a snapshot, as (kind, name, value) rows"""
+    return [
+        (kind, name, value - before.get((kind, name), 0))
+        for (kind, name), value in sorted(snapshot().items())
+        if value != before.get((kind, name), 0)
+    ]
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def write_textfile(path: str, pr_number: int, rows: List[Row]):
+    """
+    Write a run's metrics in the Prometheus text format, for the node_exporter
+    textfile collector. The file is replaced atomically so it is never read half-written.
+    """
+    by_kind = defaultdict(list)
+    for kind, name, value in rows:
+        by_kind[kind].append((name, value))
+
+    lines = []
+    for kind, samples in sorted(by_kind.items()):
+        metric = f"ingagent_{kind}"
+        lines.append(f"# TYPE {metric} gauge")
+        for name, value in samples:
+            labels = f'pr="{pr_number}"' + (f',name="{name}"' if name else '')
+            lines.append(f"{metric}{{{labels}}} {value}")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.prom.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
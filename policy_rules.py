@@ -0,0 +1,164 @@
+import fnmatch
+import re
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+SOURCE_FILES = ['*.py', '*.js', '*.ts', '*.java', '*.cpp', '*.c', '*.go', '*.rs']
+
+# Declarative deterministic policy checks. Rule types:
+#   companion - an included file needs some changed file matching 'companion' in the same PR
+#   filename  - an included file whose path matches 'regex' is a violation
+#   patch     - an added line of an included file matching 'regex' is a violation
+# 'include' / 'exclude' are path globs; a rule without 'include' applies to every file.
+DEFAULT_RULES = [
+    {
+        'id': 'missing-tests',
+        'type': 'companion',
+        'include': SOURCE_FILES,
+        'companion': r'test_|_test\.|spec\.|test/',
+        'message': 'Missing test file for: {filename}'
+    },
+    {
+        'id': 'naming',
+        'type': 'filename',
+        # Paths without '_' or '-' must be lowercase (snake_case or kebab-case)
+        'regex': r'[^_\-]*[A-Z][^_\-]*',
+        'message': 'Poor naming convention: {filename}'
+    },
+    {
+        'id': 'hardcoded-secret',
+        'type': 'patch',
+        'regex': (r'AKIA[0-9A-Z]{16}'
+                  r'|-----BEGIN (?:RSA |EC |OPENSSH )?PRIVATE KEY-----'
+                  r'|(?i:\b(?:api[_-]?key|secret|password|passwd|token)\b\s*[:=]\s*[\'"][^\'"\s]{8,}[\'"])'),
+        'message': 'Possible hardcoded secret in {filename}: {match}'
+    },
+    {
+        'id': 'python-debugger',
+        'type': 'patch',
+        'include': ['*.py'],
+        'regex': r'\b(?:pdb\.set_trace|breakpoint)\(\)',
+        'message': 'Debugger call left in {filename}: {match}'
+    },
+    {
+        'id': 'js-debug',
+        'type': 'patch',
+        'include': ['*.js', '*.jsx', '*.ts', '*.tsx'],
+        'regex': r'\bconsole\.log\(|\bdebugger\b',
+        'message': 'Debug statement left in {filename}: {match}'
+    }
+]
+
+
+class RuleEngine:
+    """
+    Compiles a policy rule set once into a few combined regexes and evaluates
+    it in a single pass over a PR's files and patches.
+
+    Every glob and filename regex becomes an optional lookahead of one anchored
+    path regex, so a single match reports all path patterns a file satisfies.
+    Patch patterns are joined into one alternation scanned over added lines.
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        path_patterns = {}  # regex source -> group name
+
+        def group_for(pattern: str) -> str:
+            if pattern not in path_patterns:
+                path_patterns[pattern] = f"p{len(path_patterns)}"
+            return path_patterns[pattern]
+
+        def globs(patterns: Iterable[str]) -> Set[str]:
+            return {group_for(fnmatch.translate(glob)[:-2].replace(r'(?s:', '(?:'))
+                    for glob in patterns}
+
+        self._compiled = []
+        patch_alternatives = []
+        for i, rule in enumerate(self.rules):
+            compiled = {
+                'rule': rule,
+                'include': globs(rule.get('include', ())),
+                'exclude': globs(rule.get('exclude', ()))
+            }
+            if rule['type'] == 'filename':
+                compiled['match'] = group_for(rule['regex'])
+            elif rule['type'] == 'companion':
+                compiled['companion'] = group_for(f".*?(?:{rule['companion']}).*")
+            elif rule['type'] == 'patch':
+                compiled['group'] = f"r{i}"
+                patch_alternatives.append(f"(?P<r{i}>{rule['regex']})")
+            else:
+                raise ValueError(f"Unknown policy rule type: {rule['type']}")
+            self._compiled.append(compiled)
+
+        self._path_regex = re.compile(''.join(
+            f"(?:(?=(?P<{name}>{pattern})$))?" for pattern, name in path_patterns.items()
+        ))
+        self._patch_regex = re.compile('|'.join(patch_alternatives)) if patch_alternatives else None
+
+    def _applies(self, compiled: Dict[str, Any], matched: Set[str]) -> bool:
+        if compiled['include'] and not compiled['include'] & matched:
+            return False
+        return not compiled['exclude'] & matched
+
+    def evaluate(self, files: List[Dict[str, Any]],
+                 report_for: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Check files (dicts with 'filename' and optional 'patch' and parsed
+        'hunks', which locate patch findings by line number). Companion rules
+        look at every file; violations are reported only for files in report_for
+        (all files by default).
+        """
+        report_for = set(report_for) if report_for is not None else None
+        violations = []
+        companions_found = set()
+        awaiting_companion = []
+
+        for file in files:
+            filename = file['filename']
+            groups = self._path_regex.match(filename).groupdict()
+            matched = {name for name, value in groups.items() if value is not None}
+            reported = report_for is None or filename in report_for
+            patch_groups = set()
+
+            for index, compiled in enumerate(self._compiled):
+                if 'companion' in compiled and compiled['companion'] in matched:
+                    companions_found.add(index)
+                if not reported or not self._applies(compiled, matched):
+                    continue
+                if 'match' in compiled and compiled['match'] in matched:
+                    violations.append(self._violation(compiled['rule'], filename))
+                elif 'companion' in compiled:
+                    awaiting_companion.append((index, filename))
+                elif 'group' in compiled:
+                    patch_groups.add(compiled['group'])
+
+            if patch_groups and file.get('patch'):
+                # GitHub patches carry no file headers, so every '+' line is an addition
+                added = '\n'.join(line[1:] for line in file['patch'].split('\n')
+                                  if line.startswith('+'))
+                # Parsed hunks give each added line's number in the new file
+                line_numbers = [n for hunk in file.get('hunks') or () for n in hunk.added]
+                for found in self._patch_regex.finditer(added):
+                    if found.lastgroup in patch_groups:
+                        rule = self._compiled[int(found.lastgroup[1:])]['rule']
+                        index = added.count('\n', 0, found.start())
+                        line = line_numbers[index] if index < len(line_numbers) else None
+                        violations.append(self._violation(rule, filename, found.group(), line))
+
+        # Companion rules are settled once every file has been seen
+        for index, filename in awaiting_companion:
+            if index not in companions_found:
+                violations.append(self._violation(self._compiled[index]['rule'], filename))
+
+        return violations
+
+    def _violation(self, rule: Dict[str, Any], filename: str, match: str = '',
+                   line: Optional[int] = None) -> Dict[str, Any]:
+        location = f"{filename}:{line}" if line else filename
+        return {
+            'rule': rule['id'],
+            'filename': filename,
+            'line': line,
+            'message': rule['message'].format(filename=location, match=match.strip()[:80])
+        }
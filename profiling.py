@@ -0,0 +1,63 @@
+import cProfile
+import os
+import tracemalloc
+from typing import Dict, Any, List
+
+# Allocations made by the tracing machinery itself are left out of reports
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+
+
+class ProfiledStage:
+    """
+    Wraps a pipeline stage to record a CPU profile (cProfile) and the memory
+    allocated by each run (tracemalloc). Each stage's profile is written to
+    <output_dir>/pr<N>_<stage>.prof and the allocation sites that grew the
+    most to <output_dir>/pr<N>_<stage>_allocations.txt, both replaced on
+    every run.
+
+    Stages should run one at a time while profiled, so that allocations are
+    attributed to the stage that made them.
+    """
+
+    def __init__(self, name: str, stage: Any, output_dir: str, top_n: int = 25):
+        self.name = name
+        self.stage = stage
+        self.output_dir = output_dir
+        self.top_n = top_n
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __getattr__(self, attr: str) -> Any:
+        # reads, writes and approval_step come from the wrapped stage
+        return getattr(self.stage, attr)
+
+    def run(self, pr_number: int) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return self.stage.run(pr_number)
+        finally:
+            profiler.disable()
+            peak = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+            prefix = os.path.join(self.output_dir, f"pr{pr_number}")
+            profiler.dump_stats(f"{prefix}_{self.name}.prof")
+            self._write_allocations(f"{prefix}_{self.name}_allocations.txt",
+                                    after.compare_to(before, 'lineno'), peak)
+
+    def _write_allocations(self, path: str, stats: List[tracemalloc.StatisticDiff], peak: int):
+        growth = sum(stat.size_diff for stat in stats)
+        lines = [f"== {self.name}: {growth / 2**20:+.2f} MiB retained, "
+                 f"{peak / 2**20:.2f} MiB peak traced =="]
+        lines.extend(str(stat) for stat in stats[:self.top_n])
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
@@ -0,0 +1,145 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from config import Config
+
+# Multiplicative decrease applied to the concurrency limit when throttled,
+# at most once per interval so one burst of 429s counts as a single signal
+DECREASE_FACTOR = 0.5
+DECREASE_INTERVAL_SECONDS = 1.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float):
+        """Block until amount is available, then consume it"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, amount: float):
+        """Charge (or refund, if negative) an amount after the fact; the level may go negative"""
+        with self.lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+class ProviderLimiter:
+    """
+    Client-side limiter for one LLM provider: request and token buckets sized
+    to the provider's per-minute quotas, plus an AIMD concurrency limit that
+    grows by one slot per window of successful calls and halves when throttled.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int):
+        self.requests = TokenBucket(rpm / 60, rpm)
+        self.tokens = TokenBucket(tpm / 60, tpm)
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, estimated_tokens: int):
+        """Wait for a concurrency slot, any Retry-After pause, and quota for one call"""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+        try:
+            while True:
+                with self.condition:
+                    pause = self.blocked_until - time.monotonic()
+                if pause <= 0:
+                    break
+                time.sleep(pause)
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self, throttled: bool = False, succeeded: bool = False,
+                retry_after: Optional[float] = None):
+        """Free the call's slot and feed its outcome back into the concurrency limit"""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self.last_decrease >= DECREASE_INTERVAL_SECONDS:
+                    self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                    self.last_decrease = now
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+            elif succeeded:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+# Number of processes sharing each provider's quota; set in batch workers
+_process_count = 1
+
+
+def share_limits(process_count: int):
+    """
+    Split every provider's limits evenly across process_count processes, so
+    batch workers together stay within the configured quotas. Limiters are
+    rebuilt on next use.
+    """
+    global _process_count, _limiters_lock
+    _process_count = max(1, process_count)
+    # Called right after fork: the inherited lock may have been held by another thread
+    _limiters_lock = threading.Lock()
+    _limiters.clear()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Get the process-wide limiter for a provider"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = Config.LLM_RATE_LIMITS.get(provider, Config.LLM_RATE_LIMITS['openai'])
+            limiter = ProviderLimiter(max(1, limits['rpm'] // _process_count),
+                                      max(1, limits['tpm'] // _process_count),
+                                      max(1, Config.LLM_MAX_CONCURRENCY // _process_count))
+            _limiters[provider] = limiter
+        return limiter
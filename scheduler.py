@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Set, Callable, Iterable, Optional, Tuple
+from config import Config
+
+class StageScheduler:
+    """Runs pipeline agents as a dependency graph, executing ready stages concurrently.
+
+    Each agent declares the outputs it ``reads`` and ``writes``. An agent with an
+    ``approval_step`` is a gate: if its result is not approved, no further stages
+    are started and the run reports the halted step. A gate whose decision is
+    still pending (``approved`` is None) parks the run instead, and it can be
+    resumed later by passing the stages that already completed.
+    """
+
+    def __init__(self, agents: Dict[str, Any], max_workers: Optional[int] = None,
+                 on_stage_start: Optional[Callable[[str], None]] = None):
+        self.agents = agents
+        self.max_workers = max_workers or Config.PIPELINE_MAX_WORKERS
+        self.on_stage_start = on_stage_start
+        self.dependencies = self._build_graph()
+
+    def _build_graph(self) -> Dict[str, Set[str]]:
+        """Map each stage to the stages producing the outputs it reads"""
+        producers = {}
+        for name, agent in self.agents.items():
+            for output in getattr(agent, 'writes', (name,)):
+                if output in producers:
+                    raise ValueError(f"Output '{output}' is written by both "
+                                     f"{producers[output]} and {name}")
+                producers[output] = name
+
+        dependencies = {}
+        for name, agent in self.agents.items():
+            dependencies[name] = set()
+            for output in getattr(agent, 'reads', ()):
+                if output not in producers:
+                    raise ValueError(f"Stage {name} reads '{output}' but no stage writes it")
+                dependencies[name].add(producers[output])
+
+        self._check_acyclic(dependencies)
+        return dependencies
+
+    def _check_acyclic(self, dependencies: Dict[str, Set[str]]):
+        """Raise if the stage graph contains a cycle"""
+        resolved = set()
+        remaining = dict(dependencies)
+        while remaining:
+            ready = [name for name, deps in remaining.items() if deps <= resolved]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+            for name in ready:
+                resolved.add(name)
+                del remaining[name]
+
+    def run(self, pr_number: int, completed: Iterable[str] = ()) -> Dict[str, Any]:
+        """Run every stage once its dependencies have completed, skipping stages in completed"""
+        done = set(completed)
+        results = {}
+        timings = {}
+        running = {}
+        stop = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if stop is None:
+                    for name in self.agents:
+                        if (name not in done and name not in running.values()
+                                and self.dependencies[name] <= done):
+                            if self.on_stage_start:
+                                self.on_stage_start(name)
+                            future = executor.submit(self._timed, name, pr_number)
+                            running[future] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name], timings[name] = future.result()
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        raise
+
+                    step = getattr(self.agents[name], 'approval_step', None)
+                    if step is not None:
+                        approved = results[name].get('approved', False)
+                        if approved is None:
+                            stop = {'status': 'parked', 'step': step}
+                            continue
+                        if not approved:
+                            stop = {'status': 'halted', 'step': step}
+                    done.add(name)
+
+        outcome = stop or {'status': 'completed'}
+        outcome.update(results=results, timings=timings, completed=sorted(done))
+        return outcome
+
+    def _timed(self, name: str, pr_number: int) -> Tuple[Dict[str, Any], float]:
+        """Run one stage, returning its result and wall time in seconds"""
+        started = time.perf_counter()
+        result = self.agents[name].run(pr_number)
+        return result, time.perf_counter() - started
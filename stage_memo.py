@@ -0,0 +1,62 @@
+import hashlib
+import json
+from typing import Dict, Any, Optional
+from db import Database
+import metrics
+
+
+def output_hash(output: Optional[Dict[str, Any]]) -> str:
+    """Stable hash of a stored agent output"""
+    canonical = json.dumps(output, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class MemoizedStage:
+    """
+    Wraps a pipeline agent so a stored output is reused when the agent's inputs
+    are unchanged. The input fingerprint covers the hashes of the upstream
+    outputs the agent reads, the PR revision, the LLM model and the agent's
+    prompt template version. Failed outputs (carrying an 'error') are never reused.
+    """
+
+    def __init__(self, name: str, agent: Any, db: Optional[Database] = None, force: bool = False):
+        self.name = name
+        self.agent = agent
+        self.db = db or Database()
+        self.force = force
+        self.reads = getattr(agent, 'reads', ())
+        self.writes = getattr(agent, 'writes', (name,))
+        self.revision = None  # Set by the orchestrator before each run
+
+    def fingerprint(self, pr_number: int) -> str:
+        """Hash everything the agent's output depends on"""
+        llm_client = getattr(self.agent, 'llm_client', None)
+        inputs = {
+            'agent': self.name,
+            'revision': self.revision,
+            'model': llm_client.llm_config.get('model') if llm_client else None,
+            'prompt_version': getattr(self.agent, 'prompt_version', 1),
+            'upstream': {
+                name: output_hash(self.db.get_agent_output(pr_number, name))
+                for name in sorted(self.reads)
+            }
+        }
+        return output_hash(inputs)
+
+    def run(self, pr_number: int) -> Dict[str, Any]:
+        input_hash = self.fingerprint(pr_number)
+
+        if not self.force and self.db.get_agent_fingerprint(pr_number, self.name) == input_hash:
+            stored = self.db.get_agent_output(pr_number, self.name)
+            if stored is not None:
+                print(f"♻️ Reusing {self.name} output for PR #{pr_number} (inputs unchanged)")
+                metrics.incr('cache_hits', 'stage_memo')
+                return stored
+        metrics.incr('cache_misses', 'stage_memo')
+
+        # Forget the old fingerprint first so a crash mid-run cannot pair it with a new output
+        self.db.delete_agent_fingerprint(pr_number, self.name)
+        result = self.agent.run(pr_number)
+        if 'error' not in result:
+            self.db.save_agent_fingerprint(pr_number, self.name, input_hash)
+        return result
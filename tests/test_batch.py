@@ -0,0 +1,85 @@
+# tests/test_batch.py
+
+import threading
+import time
+
+import pytest
+
+import main
+from approval import approval_events
+from config import Config
+from db import Database
+from main import parse_pr_numbers
+
+
+def test_parse_pr_numbers_expands_ranges():
+    """Test that lists and ranges are merged into sorted unique PR numbers."""
+
+    assert parse_pr_numbers("12,15,20-23, 15") == [12, 15, 20, 21, 22, 23]
+
+
+def test_parse_pr_numbers_rejects_backwards_range():
+    """Test that a descending range is an error rather than an empty batch."""
+
+    with pytest.raises(ValueError):
+        parse_pr_numbers("30-20")
+
+
+class FakeApprovalSystem:
+    """Finds no decision at park time; one arrives shortly after, as from a webhook"""
+
+    def wait_for_approval(self, pr_number, approval_step, expected_command, block=True):
+        def decide():
+            Database().save_approval(pr_number, approval_step, True, 'reviewer', expected_command)
+            approval_events.notify()
+        threading.Timer(0.2, decide).start()
+        return None
+
+
+class FakePoller:
+    def register(self):
+        pass
+
+    def unregister(self):
+        pass
+
+
+SLOW_PR = 99
+
+
+def fake_pipeline_worker(pr_number, completed, force=False, profile_dir=None):
+    """Parks every PR at step 3 on its first run and completes it when resumed;
+    SLOW_PR runs straight through but takes a while"""
+    connection = Database()._connect()
+    if pr_number == SLOW_PR:
+        time.sleep(3)
+        return {'status': 'completed', 'finished_at': time.time()}
+    if not completed:
+        return {'status': 'parked', 'step': 3, 'completed': ['ingestion_agent', 'early_policy_agent']}
+    return {'status': 'completed', 'resumed_from': completed, 'connection_id': id(connection),
+            'finished_at': time.time()}
+
+
+def test_run_batch_parks_and_resumes_prs(tmp_path, monkeypatch):
+    """Test that parked PRs resume as soon as a decision arrives, from their completed stages."""
+
+    monkeypatch.chdir(tmp_path)
+    # Resuming must be driven by the decision event, not by this interval
+    monkeypatch.setattr(Config, 'POLL_INTERVAL_SECONDS', 30)
+    monkeypatch.setattr(main, 'ApprovalSystem', FakeApprovalSystem)
+    monkeypatch.setattr(main, 'get_comment_poller', FakePoller)
+    monkeypatch.setattr(main, '_run_pipeline_worker', fake_pipeline_worker)
+    parent_connection = Database()._connect()
+
+    outcomes = main.run_batch([11, 12, SLOW_PR], max_workers=3)
+
+    assert sorted(outcomes) == [11, 12, SLOW_PR]
+    slow = outcomes.pop(SLOW_PR)
+    for outcome in outcomes.values():
+        # Resumed on the decision, without waiting for the busy worker to finish
+        assert outcome['finished_at'] < slow['finished_at']
+        assert outcome['status'] == 'completed'
+        assert outcome['resumed_from'] == ['ingestion_agent', 'early_policy_agent']
+        # Forked workers open their own connection instead of the parent's
+        assert outcome['connection_id'] != id(parent_connection)
+    assert Database().get_approval_waits() == []
@@ -0,0 +1,23 @@
+# tests/test_blob_store.py
+
+from blob_store import BlobStore, git_blob_sha
+
+
+def test_blob_store_round_trip_and_rejects_mismatched_content(tmp_path):
+    """Test storing by git blob SHA, compressed and raw, and SHA verification."""
+
+    content = "print('hello world')\n"
+    sha = git_blob_sha(content.encode('utf-8'))
+    # Same value `git hash-object` reports for this content
+    assert sha == "75d9766db981cf4e8c59be50ff01e574581d43fc"
+
+    for compress in (True, False):
+        store = BlobStore(str(tmp_path / str(compress)), compress=compress)
+        assert store.get(sha) is None
+
+        assert store.put(sha, content)
+        assert sha in store
+        assert store.get(sha) == content
+
+        assert not store.put(sha[::-1], content)
+        assert store.get(sha[::-1]) is None
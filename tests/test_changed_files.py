@@ -0,0 +1,29 @@
+# tests/test_changed_files.py
+
+from db import Database
+
+
+def test_changed_files_load_bodies_only_on_request(tmp_path):
+    """Test per-file storage, column selection, filtering and SQL diff stats."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_changed_files(3, [
+        {'filename': 'b.py', 'status': 'modified', 'changes': 7, 'sha': 'b1',
+         'patch': '@@ -1 +1 @@', 'content': 'print(1)'},
+        {'filename': 'a.py', 'status': 'added', 'changes': 5, 'sha': 'a1',
+         'patch': '@@ -0,0 +1 @@', 'content': None}
+    ])
+
+    metadata = db.get_changed_files(3)
+    assert [f['filename'] for f in metadata] == ['b.py', 'a.py']
+    assert 'patch' not in metadata[0] and 'content' not in metadata[0]
+
+    with_patch = db.get_changed_files(3, include_patch=True, filenames=['a.py'])
+    assert with_patch == [{'filename': 'a.py', 'status': 'added', 'additions': 0, 'deletions': 0,
+                           'changes': 5, 'sha': 'a1', 'patch': '@@ -0,0 +1 @@'}]
+
+    assert db.get_diff_stats(3) == {'num_files': 2, 'total_changes': 12}
+
+    # Re-ingestion replaces the previous file set
+    db.save_changed_files(3, [{'filename': 'c.py', 'changes': 1}])
+    assert db.get_diff_stats(3) == {'num_files': 1, 'total_changes': 1}
@@ -0,0 +1,72 @@
+# tests/test_chunker.py
+
+from agents.reviewer_agent import ReviewerAgent
+from chunker import estimate_tokens, pack_chunks, render_chunk, split_hunks
+from db import Database
+
+
+def _patch(hunks, lines_per_hunk=20):
+    return "".join(
+        f"@@ -{h * 100},{lines_per_hunk} +{h * 100},{lines_per_hunk} @@\n" +
+        "".join(f"+line {h}.{i} of the change\n" for i in range(lines_per_hunk))
+        for h in range(hunks)
+    )
+
+
+def test_split_hunks_keeps_every_line():
+    """Test that splitting a patch into hunks loses nothing."""
+
+    patch = _patch(3)
+    hunks = split_hunks(patch)
+
+    assert len(hunks) == 3
+    assert "".join(hunks) == patch
+    assert all(h.startswith('@@ ') for h in hunks)
+
+
+def test_pack_chunks_covers_whole_diff_under_budget():
+    """Test that chunks respect the budget and together contain every changed line."""
+
+    files = [
+        {'filename': 'big.py', 'patch': _patch(30)},
+        {'filename': 'huge_hunk.py', 'patch': _patch(1, lines_per_hunk=400)},
+        {'filename': 'small.py', 'patch': _patch(1, lines_per_hunk=2)},
+        {'filename': 'image.png', 'patch': ''}
+    ]
+    chunks = pack_chunks(files, budget=500)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(render_chunk(chunk)) <= 500 for chunk in chunks)
+
+    for file in files:
+        joined = "".join(text for chunk in chunks for name, text in chunk if name == file['filename'])
+        assert joined == file['patch']
+
+
+def test_small_diff_is_a_single_chunk():
+    """Test that a diff under the budget is sent as one prompt."""
+
+    chunks = pack_chunks([{'filename': 'a.py', 'patch': _patch(2)},
+                          {'filename': 'b.py', 'patch': _patch(2)}], budget=6000)
+
+    assert [[name for name, _ in chunk] for chunk in chunks] == [['a.py', 'b.py']]
+
+
+class FailingLLM:
+    def complete(self, prompt):
+        raise AssertionError('no LLM call expected')
+
+
+def test_patchless_files_are_not_sent_for_review(tmp_path):
+    """Test that a change with no textual diff is reported without an LLM call."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_agent_output(7, 'ingestion_agent', {'head_sha': 'aaa', 'files_to_review': ['logo.png']})
+    db.save_changed_files(7, [{'filename': 'logo.png', 'status': 'modified', 'sha': 'sha-png',
+                               'patch': '', 'content': None, 'hunks': []}])
+    agent = ReviewerAgent.__new__(ReviewerAgent)
+    agent.db, agent.llm_client = db, FailingLLM()
+
+    result = agent.run(7)
+    assert result['review_success'] and result['chunks_reviewed'] == 0
+    assert result['review_findings'] == "No reviewable changes (no textual diff)."
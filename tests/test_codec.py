@@ -0,0 +1,41 @@
+# tests/test_codec.py
+
+import sqlite3
+
+import codec
+from db import Database
+
+
+def test_codec_round_trips_every_combination():
+    """Test that each serializer/compression pair decodes back to the original value."""
+
+    data = {'title': 'PR', 'changed_files': [{'filename': 'a.py', 'patch': '+x\n' * 500}]}
+    for serializer in codec.SERIALIZERS:
+        for compression in codec.COMPRESSIONS:
+            encoded = codec.encode(data, serializer, compression)
+            assert isinstance(encoded, bytes)
+            assert codec.decode(encoded) == data
+
+    # Small payloads skip compression entirely
+    assert codec.encode({'ok': True}, 'json', 'zlib')[0] & 0x0F == codec.COMPRESSIONS['none']
+
+
+def test_legacy_json_rows_stay_readable(tmp_path):
+    """Test that rows written as JSON text before the codec existed still load."""
+
+    db_path = str(tmp_path / 'review.db')
+    db = Database(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            INSERT INTO agent_outputs (pr_number, agent_name, output_data)
+            VALUES (1, 'ask_agent', '{"questions_count": 2}')
+        ''')
+
+    db.save_agent_output(1, 'reviewer_agent', {'review_success': True})
+
+    assert db.get_agent_output(1, 'ask_agent') == {'questions_count': 2}
+    assert db.get_all_agent_outputs(1) == {
+        'ask_agent': {'questions_count': 2},
+        'reviewer_agent': {'review_success': True}
+    }
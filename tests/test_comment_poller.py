@@ -0,0 +1,93 @@
+# tests/test_comment_poller.py
+
+import time
+
+from approval import RepoCommentPoller
+from config import Config
+from db import Database
+
+
+class FakeRepoComments:
+    """Stands in for GitHubClient.iter_repo_comments and records each call"""
+
+    def __init__(self, comments):
+        self.comments = comments
+        self.calls = []
+
+    def iter_repo_comments(self, since=None):
+        self.calls.append(since)
+        return iter([c for c in self.comments if since is None or c['updated_at'] >= since])
+
+
+def _comment(pr_number, body, updated_at):
+    return {
+        'issue_url': f'https://api.github.com/repos/o/r/issues/{pr_number}',
+        'body': body,
+        'user': {'login': 'reviewer'},
+        'updated_at': updated_at
+    }
+
+
+def test_one_repo_poll_dispatches_to_every_waiting_pr(tmp_path):
+    """Test that a single repository-level request serves all waiting gates and moves the cursor."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    github = FakeRepoComments([
+        _comment(1, '/approve-step 3', '2026-01-01T10:00:00Z'),
+        _comment(2, '/reject-step 8', '2026-01-01T10:01:00Z'),
+        _comment(3, '/approve-step 3', '2026-01-01T10:02:00Z'),  # PR 3 is not waiting
+        _comment(1, 'unrelated chatter', '2026-01-01T10:03:00Z')
+    ])
+    poller = RepoCommentPoller(github, db)
+
+    db.add_approval_wait(1, 3)
+    db.add_approval_wait(2, 8)
+    db.save_poll_cursor(RepoCommentPoller.NAME, '2026-01-01T09:00:00Z')
+
+    assert poller.poll_once() is True
+    assert github.calls == ['2026-01-01T09:00:00Z']
+    assert db.get_approval(1, 3)['approved'] is True
+    assert db.get_approval(2, 8)['approved'] is False
+    assert db.get_approval(3, 3) is None
+    assert db.get_poll_cursor(RepoCommentPoller.NAME) == '2026-01-01T10:03:00Z'
+
+    # Nothing newer than the cursor: the poll reports no change so the interval backs off
+    assert poller.poll_once() is False
+
+
+def test_poller_lease_has_a_single_owner(tmp_path):
+    """Test that only one process at a time may poll."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    assert db.acquire_poller_lease('repo_comments', 'a', 60)
+    assert not db.acquire_poller_lease('repo_comments', 'b', 60)
+    assert db.is_poller_lease_held('repo_comments')
+
+    db.release_poller_lease('repo_comments', 'a')
+    assert db.acquire_poller_lease('repo_comments', 'b', 60)
+
+
+def test_quick_reregister_does_not_spin_the_poller(tmp_path, monkeypatch):
+    """Test that registering right after the last unregister leaves the poller waiting its interval."""
+
+    monkeypatch.setattr(Config, 'POLL_INTERVAL_SECONDS', 60)
+    db = Database(str(tmp_path / 'review.db'))
+    github = FakeRepoComments([])
+    poller = RepoCommentPoller(github, db)
+
+    poller.register()
+    time.sleep(0.1)
+    poller.unregister()
+    poller.register()  # Before the woken thread has had a chance to exit
+    time.sleep(0.5)
+
+    try:
+        # One poll at start, at most one more on the wake-up; no tight loop
+        assert len(github.calls) <= 2
+    finally:
+        thread = poller._thread
+        poller.unregister()
+        if thread is not None:
+            thread.join(2)
+    assert poller._thread is None
+    assert not db.is_poller_lease_held(RepoCommentPoller.NAME)
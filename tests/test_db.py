@@ -1,5 +1,6 @@
 import sqlite3
 import json
+import codec
 
 conn = sqlite3.connect("review.db")
 cursor = conn.execute("SELECT agent_name, output_data FROM agent_outputs")
@@ -7,4 +8,4 @@ cursor = conn.execute("SELECT agent_name, output_data FROM agent_outputs")
 for row in cursor.fetchall():
     print("\nAgent:", row[0])
     print("Data:")
-    print(json.dumps(json.loads(row[1]), indent=4))
+    print(json.dumps(codec.decode(row[1]), indent=4))
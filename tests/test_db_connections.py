@@ -0,0 +1,50 @@
+# tests/test_db_connections.py
+
+import sqlite3
+import threading
+
+from db import Database
+
+
+def test_database_handles_concurrent_writers(tmp_path):
+    """Test WAL mode, per-thread connections and concurrent writes without lock errors."""
+
+    db_path = str(tmp_path / 'review.db')
+    db = Database(db_path)
+    assert db._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert db._connect() is Database(db_path)._connect()
+
+    errors = []
+
+    def write_outputs(worker):
+        try:
+            writer = Database(db_path)
+            with writer.transaction():
+                for pr_number in range(50):
+                    writer.save_agent_output(pr_number, f'agent_{worker}', {'worker': worker})
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write_outputs, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.get_agent_output(49, 'agent_7') == {'worker': 7}
+    assert len(db.get_all_agent_outputs(0)) == 8
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    """Test that a failed batch leaves no partial writes behind."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    try:
+        with db.transaction():
+            db.save_agent_output(1, 'ingestion_agent', {'title': 'partial'})
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+
+    assert db.get_agent_output(1, 'ingestion_agent') is None
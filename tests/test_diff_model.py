@@ -0,0 +1,81 @@
+# tests/test_diff_model.py
+
+from agents.early_policy_agent import EarlyPolicyAgent
+from db import Database
+from diff_model import parse_patch
+from policy_rules import RuleEngine
+
+PATCH = (
+    "@@ -1,4 +1,5 @@\n"
+    " import os\n"
+    "-import sys\n"
+    "+import json\n"
+    "+import re\n"
+    " \n"
+    " def main():\n"
+    "@@ -20,3 +21,3 @@ def helper():\n"
+    "     value = 1\n"
+    "-    return value\n"
+    "+    return value + 1\n"
+    "\\ No newline at end of file"
+)
+
+
+def test_parse_patch_tracks_hunks_and_line_numbers():
+    """Test hunk boundaries, added/removed line numbers and per-hunk stats."""
+
+    first, second = parse_patch(PATCH)
+
+    assert (first.old_start, first.old_count, first.new_start, first.new_count) == (1, 4, 1, 5)
+    assert first.added_ranges() == [(2, 3)]
+    assert first.removed_ranges() == [(2, 2)]
+    assert (first.additions, first.deletions) == (2, 1)
+    assert list(second.added) == [22]
+    assert list(second.removed) == [21]
+    assert first.text(PATCH) + second.text(PATCH) == PATCH
+    assert parse_patch('') == []
+
+
+def test_hunks_are_persisted_with_changed_files(tmp_path):
+    """Test that parsed hunks round-trip through the changed_files table."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_changed_files(3, [{'filename': 'app.py', 'patch': PATCH, 'hunks': parse_patch(PATCH)},
+                              {'filename': 'image.png', 'patch': ''}])
+
+    stored = {f['filename']: f for f in db.get_changed_files(3, include_hunks=True)}
+
+    assert [h.added_ranges() for h in stored['app.py']['hunks']] == [[(2, 3)], [(22, 22)]]
+    assert stored['image.png']['hunks'] == []
+    assert 'hunks' not in db.get_changed_files(3)[0]
+
+
+def test_patch_findings_report_new_file_line_numbers():
+    """Test that rule findings are located with the parsed hunks."""
+
+    patch = "@@ -10,2 +10,3 @@\n context\n+x = 1\n+breakpoint()"
+    violations = RuleEngine().evaluate([
+        {'filename': 'tests/test_x.py', 'patch': patch, 'hunks': parse_patch(patch)}
+    ])
+
+    assert [(v['rule'], v['line']) for v in violations] == [('python-debugger', 12)]
+
+
+def test_early_policy_sizes_come_from_hunks(tmp_path):
+    """Test that diff size checks count hunk lines, with GitHub's counts for files without hunks."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_agent_output(3, 'ingestion_agent', {'description': 'Adds imports', 'base_branch': 'main'})
+    # GitHub's change counts disagree with the patch; the parsed hunks win
+    db.save_changed_files(3, [
+        {'filename': 'app.py', 'patch': PATCH, 'hunks': parse_patch(PATCH), 'changes': 900},
+        {'filename': 'image.png', 'patch': '', 'additions': 0, 'deletions': 0, 'changes': 0},
+        {'filename': 'huge.json', 'patch': '', 'additions': 600, 'deletions': 0, 'changes': 600}
+    ])
+    agent = EarlyPolicyAgent.__new__(EarlyPolicyAgent)
+    agent.db = db
+
+    result = agent.run(3)
+    assert (result['total_additions'], result['total_deletions']) == (603, 2)
+    assert result['total_changes'] == 605 and result['num_files'] == 3
+    assert result['warnings'] == ["Large PR (605 changes). Review may take longer."]
@@ -0,0 +1,72 @@
+# tests/test_file_summaries.py
+
+from agents.summarizer_agent import SummarizerAgent
+from db import Database
+
+
+class FakeLLM:
+    """LLM stub recording the prompts it receives"""
+
+    llm_config = {'model': 'test-model'}
+
+    def __init__(self):
+        self.prompts = []
+
+    def complete(self, prompt):
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)}"
+
+
+def _summarizer(db):
+    agent = SummarizerAgent.__new__(SummarizerAgent)
+    agent.db = db
+    agent.llm_client = FakeLLM()
+    return agent
+
+
+def test_unchanged_files_are_not_resummarized(tmp_path):
+    """Test that per-file summaries are reused by blob SHA across pushes."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    first = [{'filename': 'a.py', 'sha': 'sha-a1', 'patch': '+a'},
+             {'filename': 'b.py', 'sha': 'sha-b1', 'patch': '+b'}]
+    agent = _summarizer(db)
+    summaries, generated = agent._summarize_files(first)
+
+    assert generated == 2
+    assert set(summaries) == {'a.py', 'b.py'}
+
+    # A later push changes only b.py
+    second = [{'filename': 'a.py', 'sha': 'sha-a1', 'patch': '+a'},
+              {'filename': 'b.py', 'sha': 'sha-b2', 'patch': '+b2'}]
+    agent = _summarizer(db)
+    summaries2, generated = agent._summarize_files(second)
+
+    assert generated == 1
+    assert summaries2['a.py'] == summaries['a.py']
+    assert len(agent.llm_client.prompts) == 1
+    assert 'b.py' in agent.llm_client.prompts[0]
+
+
+def test_renamed_file_with_the_same_blob_is_resummarized(tmp_path):
+    """Test that a summary is not reused for another filename or diff of the same blob."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    agent = _summarizer(db)
+    agent._summarize_files([{'filename': 'old.py', 'status': 'modified', 'sha': 'sha-1', 'patch': '+x'}])
+
+    agent = _summarizer(db)
+    summaries, generated = agent._summarize_files([
+        {'filename': 'new.py', 'status': 'renamed', 'sha': 'sha-1', 'patch': ''}
+    ])
+
+    assert generated == 1
+    assert 'new.py' in agent.llm_client.prompts[0]
+    assert summaries['new.py'] == 'summary 1'
+
+    # Same blob, name and status, but reached by a different diff after a rebase
+    agent = _summarizer(db)
+    _, generated = agent._summarize_files([
+        {'filename': 'old.py', 'status': 'modified', 'sha': 'sha-1', 'patch': '+y\n+x'}
+    ])
+    assert generated == 1
@@ -0,0 +1,106 @@
+# tests/test_github.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from db import Database
+from github_client import GitHubClient
+
+TOTAL_FILES = 150
+
+
+class FakePaginatedHandler(BaseHTTPRequestHandler):
+    """Serves /pulls/1/files in pages with GitHub-style Link headers"""
+
+    protocol_version = 'HTTP/1.1'
+    pages_served = []
+    not_modified = 0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        per_page = int(query['per_page'][0])
+        page = int(query.get('page', ['1'])[0])
+        FakePaginatedHandler.pages_served.append(page)
+
+        etag = f'"page-{page}"'
+        if self.headers.get('If-None-Match') == etag:
+            FakePaginatedHandler.not_modified += 1
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start = (page - 1) * per_page
+        items = [{'filename': f'file_{i}.py'} for i in range(start, min(start + per_page, TOTAL_FILES))]
+        body = json.dumps(items).encode()
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        if start + per_page < TOTAL_FILES:
+            base = f'http://127.0.0.1:{self.server.server_port}/pulls/1/files'
+            self.send_header('Link', f'<{base}?per_page={per_page}&page={page + 1}>; rel="next"')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pr_files_follow_link_header_lazily(tmp_path):
+    """Test that listings follow rel="next", stop when the caller stops and revalidate by ETag."""
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakePaginatedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        client = GitHubClient(Database(str(tmp_path / 'review.db')))
+        client.base_url = f'http://127.0.0.1:{server.server_port}'
+
+        files = client.get_pr_files(1)
+        assert len(files) == TOTAL_FILES
+        assert files[-1]['filename'] == f'file_{TOTAL_FILES - 1}.py'
+        assert FakePaginatedHandler.pages_served == [1, 2]
+
+        FakePaginatedHandler.pages_served.clear()
+        first = next(client.iter_pr_files(1))
+        assert first['filename'] == 'file_0.py'
+        assert FakePaginatedHandler.pages_served == [1]
+        assert FakePaginatedHandler.not_modified == 1
+
+        # Every page is now cached, so a full re-listing is answered with 304s
+        assert client.get_pr_files(1) == files
+        assert FakePaginatedHandler.not_modified == 3
+    finally:
+        server.shutdown()
+
+
+def test_http_cache_is_bounded_and_ignores_poll_cursors(tmp_path, monkeypatch):
+    """Test that the ETag cache keys polls without their cursor and evicts by TTL and LRU."""
+
+    from config import Config
+    monkeypatch.setattr(Config, 'GITHUB_HTTP_CACHE_MAX_ENTRIES', 2)
+
+    db = Database(str(tmp_path / 'review.db'))
+    client = GitHubClient(db)
+    url = f'{client.base_url}/issues/comments'
+    assert (client._cache_key(url, {'sort': 'updated', 'since': '2024-01-01T00:00:00Z'})
+            == client._cache_key(url, {'sort': 'updated', 'since': '2024-02-01T00:00:00Z'}))
+
+    db.save_http_cache('a', '"a"', None, [{'patch': 'x' * 4096}], {})
+    db.save_http_cache('b', '"b"', None, [], {})
+    db.touch_http_cache('a')
+    db.save_http_cache('c', '"c"', None, [], {})
+
+    # b is least recently used and evicted first; a's body survives compression
+    assert db.get_http_cache('b') is None
+    assert db.get_http_cache('a')['body'] == [{'patch': 'x' * 4096}]
+    assert db.get_http_cache('c')['etag'] == '"c"'
+
+    monkeypatch.setattr(Config, 'GITHUB_HTTP_CACHE_TTL_SECONDS', -1)
+    assert db.get_http_cache('a') is None
+    db.save_http_cache('d', '"d"', None, [], {})
+    assert db._connect().execute('SELECT COUNT(*) FROM http_cache').fetchone()[0] == 0
@@ -0,0 +1,165 @@
+# tests/test_hedging.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import llm_client
+import metrics
+from config import Config
+from llm_cache import LLMCache
+from llm_client import HedgedLLMClient, LLMCancelledError, LLMClient, create_llm_client
+from rate_limiter import ProviderLimiter
+
+
+def _provider_server(answer, delay=0.0, status=200):
+    """Fake OpenAI-compatible endpoint answering after a delay"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        requests_seen = 0
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            Handler.requests_seen += 1
+            time.sleep(delay)
+            body = json.dumps({'choices': [{'message': {'content': answer}}]}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.handler = Handler
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _client(provider, server):
+    return LLMClient({
+        'provider': provider,
+        'model': 'fake-model',
+        'api_key': 'test',
+        'base_url': f'http://127.0.0.1:{server.server_port}',
+        'temperature': 0.1
+    })
+
+
+def _configure(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr(Config, 'LLM_STREAMING', False)
+    monkeypatch.setattr(Config, 'LLM_RETRY_BACKOFF_SECONDS', 0)
+    monkeypatch.setattr(Config, 'LLM_HEDGE_INITIAL_DELAY_SECONDS', 0.2)
+    monkeypatch.setattr(Config, 'LLM_HEDGE_MIN_SAMPLES', 10 ** 6)
+
+
+def test_slow_primary_is_hedged_by_secondary(monkeypatch):
+    """Test that the secondary answers when the primary is slower than the hedge delay."""
+
+    _configure(monkeypatch)
+    slow, fast = _provider_server('slow answer', delay=3), _provider_server('fast answer')
+    try:
+        client = HedgedLLMClient([_client('hedge-a', slow), _client('hedge-b', fast)])
+        started = time.monotonic()
+
+        assert client.complete('hello') == 'fast answer'
+        assert time.monotonic() - started < 2
+        # The losing primary still counts towards its latency percentile
+        assert min(llm_client._latencies['hedge-a']) >= 0.2
+    finally:
+        slow.shutdown()
+        fast.shutdown()
+
+
+def test_failed_primary_fails_over(monkeypatch):
+    """Test that a primary error sends the prompt to the next provider at once."""
+
+    _configure(monkeypatch)
+    broken, healthy = _provider_server('', status=400), _provider_server('backup answer')
+    try:
+        client = HedgedLLMClient([_client('failover-a', broken), _client('failover-b', healthy)])
+        assert client.complete('hello') == 'backup answer'
+    finally:
+        broken.shutdown()
+        healthy.shutdown()
+
+
+def test_hedging_only_uses_listed_providers(monkeypatch):
+    """Test that enabling hedging alone never sends prompts to another provider."""
+
+    monkeypatch.setattr(Config, 'LLM_HEDGE_ENABLED', True)
+    monkeypatch.setattr(Config, 'LLM_HEDGE_PROVIDERS', [])
+    monkeypatch.setattr(Config, 'LLM_PROVIDER', 'openai')
+    monkeypatch.setattr(Config, 'OPENAI_API_KEY', 'openai-key')
+    monkeypatch.setattr(Config, 'MISTRAL_API_KEY', None)
+    monkeypatch.setattr(Config, 'GROQ_API_KEY', 'groq-key')
+
+    assert isinstance(create_llm_client(), LLMClient)
+    # Mistral keeps using the OpenAI key until its own is set
+    assert Config.get_llm_config('mistral')['api_key'] == 'openai-key'
+    monkeypatch.setattr(Config, 'MISTRAL_API_KEY', 'mistral-key')
+    assert Config.get_llm_config('mistral')['api_key'] == 'mistral-key'
+
+    monkeypatch.setattr(Config, 'LLM_HEDGE_PROVIDERS', ['llama'])
+    client = create_llm_client()
+    assert [c.provider for c in client.clients] == ['openai', 'llama']
+
+
+def test_call_cancelled_while_rate_limited_is_never_sent(monkeypatch):
+    """Test that a call cancelled while waiting in the limiter does not post its request."""
+
+    _configure(monkeypatch)
+    server = _provider_server('late answer')
+    try:
+        client = _client('cancel-a', server)
+        client.limiter = ProviderLimiter(6000, 10 ** 6, max_concurrency=1)
+        client.limiter.acquire(0)  # Hold the only slot
+        cancelled = threading.Event()
+        errors = []
+
+        def call():
+            try:
+                client.complete('hello', cancelled=cancelled)
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        time.sleep(0.1)
+        cancelled.set()
+        client.limiter.release()
+        thread.join(2)
+
+        assert len(errors) == 1 and isinstance(errors[0], LLMCancelledError)
+        assert server.handler.requests_seen == 0
+        assert client.limiter.in_flight == 0
+    finally:
+        server.shutdown()
+
+
+def test_hedged_cache_lookup_is_counted_once(monkeypatch, tmp_path):
+    """Test that a hedged call looks up the cache once per call, and a cached answer skips the network."""
+
+    _configure(monkeypatch)
+    server = _provider_server('fresh answer')
+    try:
+        cache = LLMCache(str(tmp_path / 'llm_cache.db'))
+        primary = LLMClient(_client('cached-a', server).llm_config, cache=cache)
+        client = HedgedLLMClient([primary, LLMClient(_client('cached-b', server).llm_config, cache=cache)])
+
+        before = metrics.snapshot()
+        assert client.complete('hello') == 'fresh answer'
+        assert client.complete('hello') == 'fresh answer'
+
+        counted = {(kind, name): value for kind, name, value in metrics.since(before)}
+        assert counted[('cache_misses', 'llm')] == 1
+        assert counted[('cache_hits', 'llm')] == 1
+        assert server.handler.requests_seen == 1
+    finally:
+        server.shutdown()
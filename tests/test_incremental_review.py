@@ -0,0 +1,149 @@
+# tests/test_incremental_review.py
+
+from agents.coordinator_agent import CoordinatorAgent
+from agents.ingestion_agent import IngestionAgent
+from agents.reviewer_agent import ReviewerAgent
+from blob_store import BlobStore
+from db import Database
+
+
+def test_review_findings_are_superseded_per_file(tmp_path):
+    """Test that re-reviewed files drop their old findings and untouched ones carry over."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    assert db.get_review_state(7) is None
+
+    db.save_review_findings(7, 'reviewer_agent', 'aaa', ['a.py', 'b.py'], [
+        (['a.py'], 'a.py findings'),
+        (['b.py'], 'b.py findings')
+    ])
+    db.save_review_state(7, 'aaa', {'a.py': 'sha-a1', 'b.py': 'sha-b1'})
+
+    # A push touching only b.py re-reviews b.py alone
+    db.save_review_findings(7, 'reviewer_agent', 'bbb', ['b.py'], [(['b.py'], 'new b.py findings')])
+
+    findings = db.get_review_findings(7)
+    assert [(f['head_sha'], f['filenames'], f['findings']) for f in findings] == [
+        ('aaa', ['a.py'], 'a.py findings'),
+        ('bbb', ['b.py'], 'new b.py findings')
+    ]
+    assert db.get_review_state(7) == {'head_sha': 'aaa', 'file_shas': {'a.py': 'sha-a1', 'b.py': 'sha-b1'}}
+
+
+def test_findings_covering_a_re_reviewed_file_are_dropped_whole(tmp_path):
+    """Test that findings not attributable to one file never carry over once any of their files changes."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_review_findings(7, 'deep_policy_agent', 'aaa', ['a.py', 'b.py'], [
+        (['a.py', 'b.py'], ['general finding']),
+        (['b.py'], ['b.py finding']),
+        (['a.py'], [])  # Empty findings are not stored
+    ])
+    assert len(db.get_review_findings(7)) == 2
+
+    db.save_review_findings(7, 'deep_policy_agent', 'bbb', ['a.py'], [])
+
+    assert [(f['filenames'], f['findings']) for f in db.get_review_findings(7)] == [
+        (['b.py'], ['b.py finding'])
+    ]
+
+
+def test_chunk_review_is_split_at_file_headings():
+    """Test that a chunk review is attributed per file, with unheaded text kept for the whole chunk."""
+
+    agent = ReviewerAgent.__new__(ReviewerAgent)
+    review = "\n".join([
+        "Overall the change looks reasonable.",
+        "### `src/a.py`",
+        "- **Critical Issues**: off-by-one in loop",
+        "### File: src/b.py",
+        "- **Suggestions**: rename helper",
+        "### Not a file in this chunk",
+        "- still about b.py"
+    ])
+
+    assert agent._findings_by_file(review, ['src/a.py', 'src/b.py']) == [
+        (['src/a.py'], "- **Critical Issues**: off-by-one in loop"),
+        (['src/b.py'], "- **Suggestions**: rename helper\n### Not a file in this chunk\n- still about b.py"),
+        (['src/a.py', 'src/b.py'], "Overall the change looks reasonable.")
+    ]
+    assert agent._findings_by_file("No headings here", ['src/a.py']) == [
+        (['src/a.py'], "No headings here")
+    ]
+
+
+class FakeGitHub:
+    def create_comment(self, pr_number, body):
+        return {'id': 1}
+
+
+def test_review_state_waits_for_every_incremental_stage(tmp_path):
+    """Test that the reviewed head is recorded only when reviewer and deep policy both succeeded."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    agent = CoordinatorAgent.__new__(CoordinatorAgent)
+    agent.db = db
+    agent.github_client = FakeGitHub()
+
+    db.save_agent_output(7, 'ingestion_agent', {
+        'head_sha': 'aaa', 'changed_files': [{'filename': 'a.py', 'sha': 'sha-a1'}]
+    })
+    db.save_agent_output(7, 'reviewer_agent', {'review_success': True, 'review_findings': 'ok'})
+    db.save_agent_output(7, 'deep_policy_agent', {'analysis_success': False, 'error': 'timeout'})
+
+    agent.run(7)
+    assert db.get_review_state(7) is None
+
+    db.save_agent_output(7, 'deep_policy_agent', {'analysis_success': True, 'policy_violations': []})
+    agent.run(7)
+    assert db.get_review_state(7) == {'head_sha': 'aaa', 'file_shas': {'a.py': 'sha-a1'}}
+
+
+class FakePRGitHub(FakeGitHub):
+    """Serves one unchanged head and records posted comments"""
+
+    def __init__(self):
+        self.comments = []
+
+    def get_pr_details(self, pr_number):
+        return {'title': 'Rerun', 'head': {'sha': 'aaa', 'ref': 'feature'}, 'base': {'ref': 'main'}}
+
+    def iter_pr_files(self, pr_number):
+        yield {'filename': 'a.py', 'status': 'modified', 'sha': 'sha-a1', 'patch': '@@ -1 +1 @@\n-x\n+y'}
+
+    def get_file_content(self, filename, ref):
+        return 'y\n'
+
+    def create_comment(self, pr_number, body):
+        self.comments.append(body)
+        return {'id': len(self.comments)}
+
+
+class FakeLLM:
+    def complete(self, prompt):
+        return "### a.py\n- **Critical Issues**: unchecked input"
+
+
+def test_rerun_at_a_reviewed_head_keeps_its_findings(tmp_path):
+    """Test that re-running the pipeline at an already reviewed head still reports its findings."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    github = FakePRGitHub()
+
+    ingestion = IngestionAgent.__new__(IngestionAgent)
+    ingestion.db, ingestion.github_client = db, github
+    ingestion.blob_store = BlobStore(str(tmp_path / 'blobs'))
+    reviewer = ReviewerAgent.__new__(ReviewerAgent)
+    reviewer.db, reviewer.llm_client = db, FakeLLM()
+    coordinator = CoordinatorAgent.__new__(CoordinatorAgent)
+    coordinator.db, coordinator.github_client = db, github
+
+    for _ in range(2):
+        ingestion.run(7)
+        reviewer.run(7)
+        db.save_agent_output(7, 'deep_policy_agent', {'analysis_success': True, 'policy_violations': []})
+        coordinator.run(7)
+
+    assert db.get_agent_output(7, 'ingestion_agent')['files_to_review'] == []
+    assert 'unchecked input' in github.comments[0]
+    assert 'unchecked input' in github.comments[1]
@@ -0,0 +1,51 @@
+# tests/test_ingestion.py
+
+import time
+
+from agents.ingestion_agent import IngestionAgent
+from blob_store import BlobStore
+from db import Database
+
+
+class FakeGitHubClient:
+    """Serves a PR whose first files are the slowest to fetch, and one file that fails"""
+
+    def __init__(self, filenames, failing):
+        self.filenames = filenames
+        self.failing = failing
+
+    def get_pr_details(self, pr_number):
+        return {'title': 'Ordering', 'head': {'sha': 'head-sha', 'ref': 'feature'}, 'base': {'ref': 'main'}}
+
+    def iter_pr_files(self, pr_number):
+        for i, filename in enumerate(self.filenames):
+            yield {'filename': filename, 'status': 'modified', 'sha': f'blob-{i}',
+                   'patch': f'@@ -1 +1 @@\n-old {i}\n+new {i}'}
+
+    def get_file_content(self, filename, ref):
+        index = self.filenames.index(filename)
+        # Earlier files finish last
+        time.sleep(0.02 * (len(self.filenames) - index))
+        if filename == self.failing:
+            raise ConnectionError('connection reset')
+        return f'content of {filename}'
+
+
+def test_concurrent_fetches_keep_file_order_and_survive_a_failure(tmp_path):
+    """Test that out-of-order fetches keep the API's file order and one failure spares the rest."""
+
+    filenames = [f'src/module_{i}.py' for i in range(8)]
+    agent = IngestionAgent.__new__(IngestionAgent)
+    agent.github_client = FakeGitHubClient(filenames, failing='src/module_3.py')
+    agent.db = Database(str(tmp_path / 'review.db'))
+    agent.blob_store = BlobStore(str(tmp_path / 'blobs'))
+
+    result = agent.run(5)
+
+    assert [f['filename'] for f in result['changed_files']] == filenames
+    stored = agent.db.get_changed_files(5, include_patch=True, include_content=True)
+    assert [f['filename'] for f in stored] == filenames
+    for i, file in enumerate(stored):
+        expected = None if file['filename'] == 'src/module_3.py' else f"content of {file['filename']}"
+        assert file['content'] == expected
+        assert file['patch'] == f'@@ -1 +1 @@\n-old {i}\n+new {i}'
@@ -0,0 +1,61 @@
+# tests/test_llm_cache.py
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from llm_cache import LLMCache
+
+
+def test_llm_cache_hits_expires_and_evicts(tmp_path):
+    """Test cache hits, TTL expiry and LRU eviction on a sidecar database."""
+
+    cache = LLMCache(str(tmp_path / 'llm_cache.db'), max_entries=2, ttl_seconds=3600)
+
+    key_a = LLMCache.make_key('openai', 'gpt-4', 0.1, 'prompt a')
+    key_b = LLMCache.make_key('openai', 'gpt-4', 0.1, 'prompt b')
+    key_c = LLMCache.make_key('openai', 'gpt-4', 0.1, 'prompt c')
+    assert key_a != LLMCache.make_key('llama', 'gpt-4', 0.1, 'prompt a')
+
+    assert cache.get(key_a) is None
+    cache.put(key_a, 'answer a')
+    cache.put(key_b, 'answer b')
+    assert cache.get(key_a) == 'answer a'
+
+    # key_b is now least recently used and is evicted first
+    cache.put(key_c, 'answer c')
+    assert cache.get(key_b) is None
+    assert cache.get(key_a) == 'answer a'
+    assert cache.get(key_c) == 'answer c'
+
+    stats = cache.stats()
+    assert stats['hits'] == 3
+    assert stats['misses'] == 2
+    assert stats['entries'] == 2
+
+    expired = LLMCache(str(tmp_path / 'llm_cache.db'), ttl_seconds=-1)
+    assert expired.get(key_a) is None
+
+
+def _hammer_cache(db_path, worker):
+    cache = LLMCache(db_path, max_entries=50, ttl_seconds=3600)
+    for i in range(200):
+        key = LLMCache.make_key('openai', 'gpt-4', 0.1, f'prompt {i % 20}')
+        if cache.get(key) is None:
+            cache.put(key, f'answer from {worker}')
+    return cache.stats()['entries']
+
+
+def test_llm_cache_is_shared_by_worker_processes(tmp_path):
+    """Test that concurrent processes read and write one cache file without lock errors."""
+
+    db_path = str(tmp_path / 'llm_cache.db')
+    cache = LLMCache(db_path)
+    assert cache._connect() is cache._connect()
+    assert cache._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    with ProcessPoolExecutor(max_workers=4, mp_context=get_context('spawn')) as executor:
+        entries = list(executor.map(_hammer_cache, [db_path] * 4, range(4)))
+
+    assert entries and all(count == 20 for count in entries)
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 800
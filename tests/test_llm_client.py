@@ -0,0 +1,143 @@
+# tests/test_llm_client.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from config import Config
+from db import Database
+from llm_client import LLMClient, get_session
+
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    """Fails the first request with 503, then answers every completion"""
+
+    protocol_version = 'HTTP/1.1'
+    requests_seen = 0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        FakeCompletionHandler.requests_seen += 1
+
+        if FakeCompletionHandler.requests_seen == 1:
+            status, body = 503, b'{}'
+        else:
+            status = 200
+            body = json.dumps({'choices': [{'message': {'content': 'ok'}}]}).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_llm_client_retries_and_reuses_session(monkeypatch):
+    """Test that a retryable status is retried and sessions are shared per base_url."""
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(Config, 'LLM_RETRY_BACKOFF_SECONDS', 0)
+    monkeypatch.setattr(Config, 'LLM_CACHE_ENABLED', False)
+
+    try:
+        llm_config = {
+            'model': 'fake-model',
+            'api_key': 'test',
+            'base_url': f'http://127.0.0.1:{server.server_port}',
+            'temperature': 0.1
+        }
+        client = LLMClient(llm_config)
+
+        assert client.complete('hello') == 'ok'
+        assert FakeCompletionHandler.requests_seen == 2
+        assert LLMClient(llm_config).session is get_session(client.base_url)
+    finally:
+        server.shutdown()
+
+
+class FakeStreamHandler(BaseHTTPRequestHandler):
+    """Streams a completion as server-sent events, optionally stalling after the first token"""
+
+    protocol_version = 'HTTP/1.1'
+    stall_seconds = 0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        assert json.loads(self.rfile.read(length))['stream'] is True
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        for i, token in enumerate(['Hel', 'lo', ' world']):
+            chunk = {'choices': [{'delta': {'content': token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if i == 0 and self.stall_seconds:
+                time.sleep(self.stall_seconds)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def _stream_server(monkeypatch, stall_seconds=0):
+    handler = type('Handler', (FakeStreamHandler,), {'stall_seconds': stall_seconds})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(Config, 'LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr(Config, 'LLM_STREAMING', True)
+    monkeypatch.setattr(Config, 'LLM_RETRY_BACKOFF_SECONDS', 0)
+    llm_config = {
+        'model': 'fake-model',
+        'api_key': 'test',
+        'base_url': f'http://127.0.0.1:{server.server_port}',
+        'temperature': 0.1
+    }
+    return server, llm_config
+
+
+def test_streamed_completion_records_timings(monkeypatch, tmp_path):
+    """Test that SSE chunks are assembled and TTFT/throughput are stored per agent."""
+
+    server, llm_config = _stream_server(monkeypatch)
+    try:
+        db = Database(str(tmp_path / 'review.db'))
+        client = LLMClient(llm_config, agent_name='reviewer_agent', db=db)
+
+        assert client.complete('hello') == 'Hello world'
+
+        stats = db.get_llm_call_stats()['reviewer_agent']
+        assert stats['calls'] == 1
+        assert stats['avg_ttft_ms'] is not None
+        assert stats['avg_ttft_ms'] <= stats['avg_duration_ms']
+    finally:
+        server.shutdown()
+
+
+def test_stalled_stream_is_aborted(monkeypatch):
+    """Test that a stream that stops producing tokens fails fast instead of waiting out the read timeout."""
+
+    server, llm_config = _stream_server(monkeypatch, stall_seconds=3)
+    monkeypatch.setattr(Config, 'LLM_STREAM_STALL_SECONDS', 0.5)
+    monkeypatch.setattr(Config, 'LLM_MAX_RETRIES', 0)
+    try:
+        client = LLMClient(llm_config)
+        started = time.monotonic()
+        with pytest.raises(requests.RequestException):
+            client.complete('hello')
+        assert time.monotonic() - started < 2.5
+    finally:
+        server.shutdown()
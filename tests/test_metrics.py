@@ -0,0 +1,63 @@
+# tests/test_metrics.py
+
+import metrics
+from db import Database
+
+
+def test_since_reports_counter_changes_over_a_run():
+    """Test that only counters changed after the snapshot are reported, as deltas."""
+
+    metrics.incr('github_requests', value=2)
+    before = metrics.snapshot()
+    metrics.incr('github_requests')
+    metrics.incr('cache_hits', 'llm', 3)
+
+    rows = metrics.since(before)
+
+    assert ('github_requests', '', 1) in rows
+    assert ('cache_hits', 'llm', 3) in rows
+    assert all(value != 0 for _, _, value in rows)
+
+
+def test_percentile_uses_nearest_rank():
+    """Test nearest-rank percentiles, including the empty case."""
+
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+
+    assert metrics.percentile(values, 50) == 3.0
+    assert metrics.percentile(values, 95) == 5.0
+    assert metrics.percentile(values, 0) == 1.0
+    assert metrics.percentile([], 50) == 0.0
+
+
+def test_textfile_uses_prometheus_format(tmp_path):
+    """Test that a run's rows are written as labelled gauges."""
+
+    path = tmp_path / 'ingagent.prom'
+    metrics.write_textfile(str(path), 42, [
+        ('stage_seconds', 'reviewer_agent', 1.5),
+        ('pipeline_seconds', '', 3.0)
+    ])
+
+    lines = path.read_text().splitlines()
+    assert '# TYPE ingagent_stage_seconds gauge' in lines
+    assert 'ingagent_stage_seconds{pr="42",name="reviewer_agent"} 1.5' in lines
+    assert 'ingagent_pipeline_seconds{pr="42"} 3.0' in lines
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_recent_metrics_are_grouped_by_run_newest_first(tmp_path):
+    """Test that stored metrics come back per run, limited to the newest runs."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_metrics('run-a', 1, [('stage_seconds', 'ingestion_agent', 2.0)])
+    db.save_metrics('run-b', 2, [('stage_seconds', 'ingestion_agent', 4.0),
+                                 ('github_requests', '', 7)])
+    db.save_metrics('run-c', 3, [('pipeline_seconds', '', 9.0)])
+
+    recent = db.get_recent_metrics(2)
+
+    assert [run['run_id'] for run in recent] == ['run-c', 'run-b']
+    assert recent[1]['pr_number'] == 2
+    assert recent[1]['values'] == {('stage_seconds', 'ingestion_agent'): 4.0,
+                                   ('github_requests', ''): 7}
@@ -0,0 +1,46 @@
+# tests/test_policy_rules.py
+
+from policy_rules import RuleEngine
+
+
+def _messages(violations):
+    return sorted(v['message'] for v in violations)
+
+
+def test_missing_tests_and_naming_match_the_old_helpers():
+    """Test that the file rules flag the same files the per-file helpers did."""
+
+    engine = RuleEngine()
+    files = [{'filename': 'src/App.py'}, {'filename': 'src/util_helpers.py'}, {'filename': 'README'}]
+
+    assert _messages(engine.evaluate(files)) == [
+        'Missing test file for: src/App.py',
+        'Missing test file for: src/util_helpers.py',
+        'Poor naming convention: README',
+        'Poor naming convention: src/App.py'
+    ]
+
+    # Any test file in the PR satisfies the companion rule
+    files.append({'filename': 'tests/test_app.py'})
+    assert _messages(engine.evaluate(files)) == ['Poor naming convention: README',
+                                                 'Poor naming convention: src/App.py']
+
+
+def test_patch_rules_scan_only_added_lines_of_reported_files():
+    """Test secret and debug detection on added lines, limited to the files under review."""
+
+    engine = RuleEngine()
+    files = [
+        {'filename': 'app/settings.py',
+         'patch': '@@ -1,2 +1,3 @@\n-password = "oldvalue123"\n+API_KEY = "sk-live-abcdef123456"\n+breakpoint()'},
+        {'filename': 'web/main.js', 'patch': '@@ -1 +1 @@\n+console.log(state)'},
+        {'filename': 'tests/test_settings.py', 'patch': '+import pdb; pdb.set_trace()'}
+    ]
+
+    violations = engine.evaluate(files, report_for=['app/settings.py', 'web/main.js'])
+
+    assert sorted((v['rule'], v['filename']) for v in violations) == [
+        ('hardcoded-secret', 'app/settings.py'),
+        ('js-debug', 'web/main.js'),
+        ('python-debugger', 'app/settings.py')
+    ]
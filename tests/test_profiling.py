@@ -0,0 +1,39 @@
+# tests/test_profiling.py
+
+import pstats
+
+from profiling import ProfiledStage
+from scheduler import StageScheduler
+
+
+class AllocatingGate:
+    """Gate stub that allocates memory and approves"""
+
+    reads = ()
+    writes = ('gate',)
+    approval_step = 3
+
+    def run(self, pr_number):
+        self.buffer = [bytearray(1024) for _ in range(1000)]
+        return {'approved': True}
+
+
+def test_profiled_stage_writes_profile_and_allocation_report(tmp_path):
+    """Test that a profiled stage keeps its gate behavior and writes both reports."""
+
+    stage = ProfiledStage('gate', AllocatingGate(), str(tmp_path))
+    outcome = StageScheduler({'gate': stage}, max_workers=1).run(7)
+
+    assert outcome['status'] == 'completed'
+    assert stage.approval_step == 3
+
+    stats = pstats.Stats(str(tmp_path / 'pr7_gate.prof'))
+    assert any(func[2] == 'run' for func in stats.stats)
+
+    report = (tmp_path / 'pr7_gate_allocations.txt').read_text()
+    assert report.startswith('== gate: +')
+    assert 'test_profiling.py' in report
+
+    # Re-profiling replaces the report instead of appending to it
+    stage.run(7)
+    assert (tmp_path / 'pr7_gate_allocations.txt').read_text().count('== gate:') == 1
@@ -0,0 +1,76 @@
+# tests/test_rate_limiter.py
+
+import time
+
+from config import Config
+from rate_limiter import ProviderLimiter, TokenBucket, get_limiter, parse_retry_after, share_limits
+
+
+def test_token_bucket_paces_to_its_rate():
+    """Test that once the burst is spent, takes are spaced by the refill rate."""
+
+    bucket = TokenBucket(rate_per_second=20, capacity=2)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.take(1)
+
+    # Two from the initial burst, then four refilled at 20/s
+    assert 0.15 <= time.monotonic() - started < 1.0
+
+
+def test_concurrency_halves_when_throttled_and_recovers_additively():
+    """Test the AIMD feedback on the concurrency limit."""
+
+    limiter = ProviderLimiter(rpm=6000, tpm=10 ** 6, max_concurrency=8)
+
+    limiter.acquire(10)
+    limiter.release(throttled=True)
+    assert limiter.limit == 4
+
+    # A burst of 429s within the decrease interval counts once
+    limiter.acquire(10)
+    limiter.release(throttled=True)
+    assert limiter.limit == 4
+
+    for _ in range(4):
+        limiter.acquire(10)
+        limiter.release(succeeded=True)
+    assert 4.9 < limiter.limit < 5.1
+
+
+def test_retry_after_pauses_new_calls():
+    """Test that a Retry-After from one call delays the next acquire."""
+
+    limiter = ProviderLimiter(rpm=6000, tpm=10 ** 6, max_concurrency=2)
+    limiter.acquire(10)
+    limiter.release(throttled=True, retry_after=0.3)
+
+    started = time.monotonic()
+    limiter.acquire(10)
+    limiter.release(succeeded=True)
+    assert time.monotonic() - started >= 0.25
+
+
+def test_parse_retry_after_formats():
+    """Test seconds and HTTP-date Retry-After values."""
+
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_batch_workers_split_the_provider_quota(monkeypatch):
+    """Test that each of N worker processes gets 1/N of the configured limits."""
+
+    monkeypatch.setattr(Config, 'LLM_RATE_LIMITS', {'openai': {'rpm': 500, 'tpm': 30000}})
+    monkeypatch.setattr(Config, 'LLM_MAX_CONCURRENCY', 8)
+    try:
+        share_limits(4)
+        limiter = get_limiter('openai')
+        assert limiter.requests.capacity == 125
+        assert limiter.tokens.capacity == 7500
+        assert limiter.max_concurrency == 2
+        share_limits(1)
+        assert get_limiter('openai').requests.capacity == 500
+    finally:
+        share_limits(1)
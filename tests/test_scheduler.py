@@ -0,0 +1,89 @@
+# tests/test_scheduler.py
+
+import threading
+import pytest
+
+from scheduler import StageScheduler
+
+
+class FakeAgent:
+    """Stage stub recording its start order and optionally waiting on a barrier"""
+
+    def __init__(self, name, reads=(), approval_step=None, barrier=None, approved=True, log=None):
+        self.reads = reads
+        self.writes = (name,)
+        self.name = name
+        self.barrier = barrier
+        self.approved = approved
+        self.log = log if log is not None else []
+        if approval_step is not None:
+            self.approval_step = approval_step
+
+    def run(self, pr_number):
+        self.log.append(self.name)
+        if self.barrier:
+            # Both independent stages must be running at the same time to pass
+            self.barrier.wait(timeout=5)
+        return {'approved': self.approved}
+
+
+def _pipeline(approved=True):
+    log = []
+    barrier = threading.Barrier(2)
+    agents = {
+        'ingest': FakeAgent('ingest', log=log),
+        'gate': FakeAgent('gate', ('ingest',), approval_step=3, approved=approved, log=log),
+        'summarize': FakeAgent('summarize', ('ingest', 'gate'), barrier=barrier, log=log),
+        'review': FakeAgent('review', ('ingest', 'gate'), barrier=barrier, log=log),
+        'report': FakeAgent('report', ('summarize', 'review'), log=log)
+    }
+    return agents, log
+
+
+def test_scheduler_runs_independent_stages_concurrently():
+    """Test that stages sharing only upstream dependencies overlap."""
+
+    agents, log = _pipeline()
+    outcome = StageScheduler(agents, max_workers=4).run(1)
+
+    assert outcome['status'] == 'completed'
+    assert log[:2] == ['ingest', 'gate']
+    assert set(log[2:4]) == {'summarize', 'review'}
+    assert log[4] == 'report'
+
+
+def test_scheduler_stops_at_rejected_gate():
+    """Test that nothing downstream of a rejected approval gate runs."""
+
+    agents, log = _pipeline(approved=False)
+    outcome = StageScheduler(agents, max_workers=4).run(1)
+
+    assert outcome['status'] == 'halted'
+    assert outcome['step'] == 3
+    assert log == ['ingest', 'gate']
+
+
+def test_scheduler_rejects_unknown_inputs():
+    """Test that reading an output nobody writes fails fast."""
+
+    with pytest.raises(ValueError):
+        StageScheduler({'review': FakeAgent('review', ('ingest',))})
+
+
+def test_scheduler_parks_and_resumes_at_pending_gate():
+    """Test that an undecided gate parks the run and a resumed run skips completed stages."""
+
+    agents, log = _pipeline(approved=None)
+    outcome = StageScheduler(agents, max_workers=4).run(1)
+
+    assert outcome['status'] == 'parked'
+    assert outcome['step'] == 3
+    assert outcome['completed'] == ['ingest']
+
+    agents['gate'].approved = True
+    resumed = StageScheduler(agents, max_workers=4).run(1, outcome['completed'])
+
+    assert resumed['status'] == 'completed'
+    assert log[:3] == ['ingest', 'gate', 'gate']
+    assert log.count('ingest') == 1
+    assert log[-1] == 'report'
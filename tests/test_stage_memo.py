@@ -0,0 +1,59 @@
+# tests/test_stage_memo.py
+
+from db import Database
+from stage_memo import MemoizedStage
+
+
+class CountingAgent:
+    """Stage stub that saves and returns an output, counting its runs"""
+
+    def __init__(self, db, name, reads=(), output=None):
+        self.db = db
+        self.name = name
+        self.reads = reads
+        self.writes = (name,)
+        self.output = output or {'value': name}
+        self.runs = 0
+
+    def run(self, pr_number):
+        self.runs += 1
+        self.db.save_agent_output(pr_number, self.name, self.output)
+        return self.output
+
+
+def test_stage_output_is_reused_until_inputs_change(tmp_path):
+    """Test that unchanged inputs reuse the stored output and upstream changes recompute it."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    db.save_agent_output(5, 'ingestion_agent', {'head_sha': 'aaa'})
+    agent = CountingAgent(db, 'reviewer_agent', reads=('ingestion_agent',))
+    stage = MemoizedStage('reviewer_agent', agent, db)
+    stage.revision = 'base..aaa'
+
+    assert stage.run(5) == {'value': 'reviewer_agent'}
+    assert stage.run(5) == {'value': 'reviewer_agent'}
+    assert agent.runs == 1
+
+    db.save_agent_output(5, 'ingestion_agent', {'head_sha': 'bbb'})
+    stage.run(5)
+    assert agent.runs == 2
+
+    stage.revision = 'base..bbb'
+    stage.run(5)
+    assert agent.runs == 3
+
+    stage.force = True
+    stage.run(5)
+    assert agent.runs == 4
+
+
+def test_failed_output_is_not_reused(tmp_path):
+    """Test that an output carrying an error is recomputed on the next run."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    agent = CountingAgent(db, 'summarizer_agent', output={'error': 'timeout'})
+    stage = MemoizedStage('summarizer_agent', agent, db)
+
+    stage.run(5)
+    stage.run(5)
+    assert agent.runs == 2
@@ -0,0 +1,58 @@
+# tests/test_webhook.py
+
+import threading
+import time
+
+from approval import approval_events, parse_approval_command
+from db import Database
+from webhook_server import ApprovalWebhookServer, send_webhook
+
+SECRET = 'test-secret'
+
+
+def _comment_event(pr_number, body):
+    return {
+        'action': 'created',
+        'issue': {'number': pr_number, 'pull_request': {}},
+        'comment': {'body': body, 'user': {'login': 'reviewer'}}
+    }
+
+
+def test_parse_approval_command():
+    """Test approve/reject parsing; the last command in a comment wins."""
+
+    assert parse_approval_command('/approve-step 3') == (True, 3)
+    assert parse_approval_command('LGTM\n/Reject-Step 8 needs tests') == (False, 8)
+    assert parse_approval_command('/approve-step 3 ... /reject-step 3') == (False, 3)
+    assert parse_approval_command('looks good') is None
+
+
+def test_webhook_records_decision_and_wakes_waiters(tmp_path):
+    """Test signed delivery, signature rejection and immediate wake-up of waiting gates."""
+
+    db = Database(str(tmp_path / 'review.db'))
+    server = ApprovalWebhookServer('127.0.0.1', 0, SECRET, db)
+    server.start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+
+    try:
+        # A bad signature is refused and nothing is recorded
+        assert send_webhook(url, 'wrong-secret', _comment_event(5, '/approve-step 3')) == 401
+        assert db.get_approval(5, 3) is None
+
+        seen = approval_events.generation
+        woke = []
+        waiter = threading.Thread(target=lambda: woke.append(approval_events.wait(seen, 10)))
+        waiter.start()
+
+        started = time.monotonic()
+        assert send_webhook(url, SECRET, _comment_event(5, '/reject-step 3')) == 200
+        waiter.join()
+
+        assert woke == [True]
+        assert time.monotonic() - started < 5
+        assert db.get_approval(5, 3)['approved'] is False
+        assert db.get_approval(5, 3)['comment_author'] == 'reviewer'
+    finally:
+        server.shutdown()
+        server.server_close()
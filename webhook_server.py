@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import hashlib
+import hmac
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from approval import approval_events, parse_approval_command
+from config import Config
+from db import Database
+
+
+def sign_payload(secret: str, payload: bytes) -> str:
+    """Compute the X-Hub-Signature-256 header value GitHub sends for a payload"""
+    digest = hmac.new(secret.encode('utf-8'), payload, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret: str, payload: bytes, signature: Optional[str]) -> bool:
+    """Check a webhook payload against its X-Hub-Signature-256 header"""
+    if not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, payload), signature)
+
+
+class ApprovalWebhookHandler(BaseHTTPRequestHandler):
+    """Records /approve-step and /reject-step decisions from issue_comment webhooks"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length)
+
+        if not verify_signature(self.server.secret, payload,
+                                self.headers.get('X-Hub-Signature-256')):
+            self._respond(401, 'invalid signature')
+            return
+
+        if self.headers.get('X-GitHub-Event') != 'issue_comment':
+            self._respond(202, 'ignored event')
+            return
+
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            self._respond(400, 'invalid JSON')
+            return
+
+        decision = self.server.record_decision(event)
+        self._respond(200 if decision else 202, json.dumps(decision) if decision else 'no decision')
+
+    def _respond(self, status: int, message: str):
+        body = message.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"[ApprovalWebhook] {self.address_string()} {format % args}")
+
+
+class ApprovalWebhookServer(ThreadingHTTPServer):
+    """Local HTTP endpoint receiving GitHub issue_comment webhooks for approval gates"""
+
+    daemon_threads = True
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 secret: Optional[str] = None, db: Optional[Database] = None):
+        self.secret = secret or Config.GITHUB_WEBHOOK_SECRET
+        if not self.secret:
+            raise ValueError("GITHUB_WEBHOOK_SECRET is required for the approval webhook")
+
+        self.db = db or Database()
+        host = host if host is not None else Config.APPROVAL_WEBHOOK_HOST
+        port = port if port is not None else Config.APPROVAL_WEBHOOK_PORT
+        super().__init__((host, port), ApprovalWebhookHandler)
+
+    def record_decision(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Save an approval command from a new PR comment and wake waiting pipelines"""
+        if event.get('action') != 'created':
+            return None
+
+        issue = event.get('issue', {})
+        if 'pull_request' not in issue:
+            return None
+
+        comment = event.get('comment', {})
+        command = parse_approval_command(comment.get('body', ''))
+        if command is None:
+            return None
+
+        approved, step = command
+        pr_number = issue['number']
+        self.db.save_approval(pr_number, step, approved,
+                              comment.get('user', {}).get('login', ''), comment.get('body'))
+        approval_events.notify()
+
+        print(f"[ApprovalWebhook] PR #{pr_number} step {step}: "
+              f"{'approved' if approved else 'rejected'}")
+        return {'pr_number': pr_number, 'step': step, 'approved': approved}
+
+    def start(self) -> threading.Thread:
+        """Serve in a background daemon thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        print(f"[ApprovalWebhook] Listening on {self.server_address[0]}:{self.server_address[1]}")
+        return thread
+
+
+def send_webhook(url: str, secret: str, event: Dict[str, Any],
+                 event_name: str = 'issue_comment') -> int:
+    """Local stand-in for GitHub: POST a signed webhook payload and return the status code"""
+    payload = json.dumps(event).encode('utf-8')
+    request = urllib.request.Request(url, data=payload, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-GitHub-Event': event_name,
+        'X-Hub-Signature-256': sign_payload(secret, payload)
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+if __name__ == '__main__':
+    # Standalone listener; pipelines in other processes pick decisions up from the database
+    ApprovalWebhookServer().serve_forever()